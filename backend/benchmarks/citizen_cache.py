@@ -0,0 +1,86 @@
+"""Citizen lookup cost for an L1 hit, an L2 (Redis) hit and a full miss.
+
+Needs the Redis from the environment configuration; the ASAN call is
+replaced with a zero-latency fake so a miss measures only our overhead:
+
+    python -m benchmarks.citizen_cache --iterations 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import summarize
+from src.core.domain.citizen import CitizenDomain
+from src.core.redis import get_redis
+from src.modules.citizens.asan_service import AsanService
+from src.modules.citizens.cache import citizen_l1
+from src.modules.citizens.service import CitizenService
+
+BENCH_PIN_CODE = "2dnxyd8"
+
+
+class InstantAsanService(AsanService):
+    async def get_citizen(self, pin_code: str) -> CitizenDomain:
+        return CitizenDomain(
+            pin_code=pin_code.upper(),
+            first_name="Bench",
+            last_name="Citizen",
+            patronymic="Bench",
+            document_number="AA1234567",
+            address_line="Azerbaijan, Baku",
+            date_of_birth="2002-03-12T00:00:00Z",
+        )
+
+
+async def measure(name: str, iterations: int, prepare, lookup) -> str:
+    latencies = []
+    elapsed = 0.0
+
+    for _ in range(iterations):
+        await prepare()
+        start = time.perf_counter()
+        await lookup()
+        latency = time.perf_counter() - start
+        latencies.append(latency)
+        elapsed += latency
+
+    return summarize(name, latencies, elapsed)
+
+
+async def main(args: argparse.Namespace) -> None:
+    redis_client = get_redis()
+    citizen_service = CitizenService(redis_client, InstantAsanService())
+
+    async def lookup():
+        await citizen_service.get_citizen(BENCH_PIN_CODE)
+
+    async def keep_l1():
+        pass
+
+    async def drop_l1():
+        citizen_l1.clear()
+
+    async def drop_l1_and_l2():
+        citizen_l1.clear()
+        await redis_client.delete(f"citizen:{BENCH_PIN_CODE}")
+
+    await drop_l1_and_l2()
+    await lookup()
+    await lookup()
+
+    print(await measure("L1 hit", args.iterations, keep_l1, lookup))
+    print(await measure("L2 hit (Redis + parse)", args.iterations, drop_l1, lookup))
+    print(
+        await measure(
+            "miss (lease + ASAN + write)", args.iterations, drop_l1_and_l2, lookup
+        )
+    )
+
+    await drop_l1_and_l2()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
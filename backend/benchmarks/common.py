@@ -0,0 +1,73 @@
+import statistics
+from uuid import uuid4
+
+import httpx
+from sqlalchemy import delete
+
+from src.core.domain.principal import Principal
+from src.core.enums import UserRole
+from src.database.core import SessionLocal
+from src.database.entities.citizen import Citizen
+from src.database.entities.meeting import Meeting
+from src.database.entities.user import User
+
+# "o" never appears in a real PIN, so seeded citizens cannot clash with them
+BENCH_PIN_PREFIX = "o"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: list[float], elapsed: float) -> str:
+    """One line of throughput and latency percentiles, latencies in seconds"""
+    ms = [latency * 1000 for latency in latencies]
+    return (
+        f"{name:<32} n={len(ms):<7} {len(ms) / elapsed:>10.1f} ops/s  "
+        f"mean={statistics.fmean(ms):.2f}ms p50={percentile(ms, 50):.2f}ms "
+        f"p95={percentile(ms, 95):.2f}ms p99={percentile(ms, 99):.2f}ms"
+    )
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> dict:
+    response = await client.post(
+        "/auth/login", json={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['accessToken']}"}
+
+
+def create_bench_operator() -> Principal:
+    """Throwaway operator in the configured database, see drop_bench_operator"""
+    operator = User(
+        id=uuid4(),
+        username=f"bench-{uuid4().hex[:8]}",
+        first_name="Bench",
+        last_name="Operator",
+        password_hash="-",
+        role=UserRole.OPERATOR,
+    )
+    with SessionLocal() as db:
+        db.add(operator)
+        db.commit()
+        return Principal(
+            id=operator.id,
+            username=operator.username,
+            role=operator.role,
+            session_id="bench",
+        )
+
+
+def drop_bench_operator(principal: Principal) -> None:
+    """Removes the operator with its meetings and the citizens they booked"""
+    with SessionLocal() as db:
+        citizen_ids = db.scalars(
+            delete(Meeting)
+            .where(Meeting.operator_id == principal.id)
+            .returning(Meeting.citizen_id)
+        ).all()
+        db.execute(delete(Citizen).where(Citizen.id.in_(citizen_ids)))
+        db.execute(delete(User).where(User.id == principal.id))
+        db.commit()
@@ -0,0 +1,66 @@
+"""Concurrent load against the citizen lookup and meeting list routes.
+
+Run against a live API (e.g. `fastapi run src/main.py`) with an existing
+operator account, once per build you want to compare:
+
+    python -m benchmarks.http_concurrency --username operator --password operator
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import login, summarize
+
+
+async def run_route(
+    client: httpx.AsyncClient, path: str, headers: dict, concurrency: int, total: int
+) -> str:
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request_once():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            errors += response.is_error
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request_once() for _ in range(total)))
+    summary = summarize(
+        f"GET {path} c={concurrency}", latencies, time.perf_counter() - start
+    )
+    return f"{summary} errors={errors}"
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=60
+    ) as client:
+        headers = await login(client, args.username, args.password)
+
+        # Warm the citizen cache so both builds measure the cached path
+        await client.get(f"/citizens/{args.pin}", headers=headers)
+
+        for concurrency in args.concurrency:
+            for path in (f"/citizens/{args.pin}", "/meetings/"):
+                print(
+                    await run_route(client, path, headers, concurrency, args.requests)
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:80")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--pin", default="2DNXYD8")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""Login latency under a login storm, alongside a cheap authenticated route.
+
+Run against a live API (e.g. `fastapi run src/main.py`) with an existing
+operator account. The meeting list probe shows whether password hashing
+still starves other requests while logins queue:
+
+    python -m benchmarks.login_concurrency --username operator --password operator
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import login, summarize
+
+
+async def storm(
+    client: httpx.AsyncClient, args: argparse.Namespace, concurrency: int
+) -> tuple[list[float], int, list[float], float]:
+    login_latencies: list[float] = []
+    probe_latencies: list[float] = []
+    rejected = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    payload = {"username": args.username, "password": args.password}
+    headers = await login(client, args.username, args.password)
+    done = asyncio.Event()
+
+    async def login_once():
+        nonlocal rejected
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/auth/login", json=payload)
+            if response.status_code in (429, 503):
+                rejected += 1
+            else:
+                response.raise_for_status()
+                login_latencies.append(time.perf_counter() - start)
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/meetings/", headers=headers)
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login_once() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return login_latencies, rejected, probe_latencies, elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 1)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=120
+    ) as client:
+        for concurrency in args.concurrency:
+            logins, rejected, probes, elapsed = await storm(client, args, concurrency)
+            print(
+                summarize(f"POST /auth/login c={concurrency}", logins, elapsed)
+                + f" rejected={rejected}"
+            )
+            print(summarize(f"  GET /meetings/ during", probes, elapsed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:80")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,155 @@
+"""Meeting booking throughput and the double-booking guard under contention.
+
+Books meetings for distinct, pre-cached citizens at increasing concurrency
+and through the bulk path in batches, then fires concurrent bookings for one
+citizen, which must yield exactly one meeting. Runs against the configured
+database and Redis and cleans up:
+
+    python -m benchmarks.meeting_booking --bookings 2000 --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import create_bench_operator, drop_bench_operator, summarize
+from src.core.domain.citizen import CitizenDomain
+from src.core.domain.principal import Principal
+from src.core.exceptions import MeetingAlreadyScheduledError
+from src.core.redis import get_redis
+from src.database.core import AsyncSessionLocal
+from src.modules.citizens.cache import CitizenCache
+from src.modules.meetings.model import MeetingRequest
+from src.modules.meetings.service import MeetingService
+
+
+def bench_pin_code(index: int) -> str:
+    # Bookings go through the validated models, so bench PINs have to be real
+    # looking, the cache and the database rows are removed by key afterwards
+    return f"ZZ{index:05X}"
+
+
+def booking_request(pin_code: str) -> MeetingRequest:
+    return MeetingRequest(
+        citizen_pin_code=pin_code,
+        citizen_phone="994501234567",
+        scheduled_at=datetime.now(timezone.utc) + timedelta(days=1),
+    )
+
+
+# OTP keys of booked meetings, removed with the rest of the bench data
+booked_meeting_keys = []
+
+
+async def book(redis_client, principal: Principal, pin_code: str) -> bool:
+    async with AsyncSessionLocal() as db:
+        try:
+            meeting = await MeetingService(db, redis_client).create_meeting(
+                booking_request(pin_code), principal
+            )
+        except MeetingAlreadyScheduledError:
+            return False
+    booked_meeting_keys.append(f"meeting:{meeting.id}")
+    return True
+
+
+async def run(redis_client, principal: Principal, pin_codes, concurrency: int):
+    latencies = []
+    queue = iter(pin_codes)
+
+    async def worker():
+        for pin_code in queue:
+            start = time.perf_counter()
+            await book(redis_client, principal, pin_code)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def run_bulk(redis_client, principal: Principal, pin_codes, batch_size: int):
+    latencies = []
+    for batch_start in range(0, len(pin_codes), batch_size):
+        batch = pin_codes[batch_start : batch_start + batch_size]
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            response = await MeetingService(db, redis_client).create_meetings(
+                [booking_request(pin_code) for pin_code in batch], principal
+            )
+        latencies.append(time.perf_counter() - start)
+        booked_meeting_keys.extend(
+            f"meeting:{item.meeting.id}" for item in response.items if item.meeting
+        )
+    return latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    redis_client = get_redis()
+    citizen_cache = CitizenCache(redis_client)
+    principal = create_bench_operator()
+
+    total = args.bookings * (len(args.concurrency) + len(args.batch)) + 1
+    try:
+        for index in range(total):
+            pin_code = bench_pin_code(index)
+            await citizen_cache.set(
+                pin_code,
+                CitizenDomain(
+                    pin_code=pin_code,
+                    first_name="Bench",
+                    last_name="Citizen",
+                    patronymic="Bench",
+                    document_number="AA0000000",
+                    address_line="Bench",
+                    date_of_birth=datetime(2000, 1, 1, tzinfo=timezone.utc),
+                ),
+            )
+
+        offset = 0
+        for concurrency in args.concurrency:
+            pin_codes = [bench_pin_code(offset + i) for i in range(args.bookings)]
+            offset += args.bookings
+            latencies, elapsed = await run(
+                redis_client, principal, pin_codes, concurrency
+            )
+            print(summarize(f"create_meeting c={concurrency}", latencies, elapsed))
+
+        for batch_size in args.batch:
+            pin_codes = [bench_pin_code(offset + i) for i in range(args.bookings)]
+            offset += args.bookings
+            latencies = await run_bulk(redis_client, principal, pin_codes, batch_size)
+            print(
+                summarize(
+                    f"create_meetings batch={batch_size}", latencies, sum(latencies)
+                )
+                + f"  {args.bookings / sum(latencies):.1f} meetings/s"
+            )
+
+        contended_pin = bench_pin_code(offset)
+        booked = await asyncio.gather(
+            *(
+                book(redis_client, principal, contended_pin)
+                for _ in range(max(args.concurrency))
+            )
+        )
+        print(
+            f"same citizen x{len(booked)}: {sum(booked)} booked, "
+            f"{len(booked) - sum(booked)} rejected"
+        )
+    finally:
+        drop_bench_operator(principal)
+        await redis_client.delete(
+            *(f"citizen:{bench_pin_code(index).lower()}" for index in range(total)),
+            *booked_meeting_keys,
+        )
+        await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--batch", type=int, nargs="+", default=[100, 500])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,124 @@
+"""Fan-out latency of meeting status events to many open event streams.
+
+Run against a live API (e.g. `fastapi run src/main.py --workers 4`) sharing
+the configured Redis, with an existing operator account. Opens the streams,
+publishes status events of that operator's meetings to Redis at the given
+rate, and times each event from publish to arrival on every stream:
+
+    python -m benchmarks.meeting_status_push --username operator \\
+        --password operator --streams 100 1000 --events 200
+
+Streams spread over the workers, /metrics reports each worker's
+meeting_events connections and its share of the fan-out latency.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+import httpx
+from jose import jwt
+
+from benchmarks.common import login, summarize
+from src.core.enums import MeetingStatus
+from src.core.redis import get_redis
+from src.modules.meetings.events import publish_status_changed
+from src.modules.meetings.model import MeetingStatusEvent
+from src.modules.meetings.transitions import MeetingStatusChanged
+
+
+async def listen(
+    client: httpx.AsyncClient,
+    headers: dict,
+    expected: int,
+    opened: asyncio.Event,
+    latencies: list,
+) -> None:
+    received = 0
+    async with client.stream("GET", "/meetings/events", headers=headers) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith(": connected"):
+                opened.set()
+            elif line.startswith("data: "):
+                event = MeetingStatusEvent.model_validate_json(line[6:])
+                latencies.append(time.time() - event.published_at)
+                received += 1
+                if received == expected:
+                    return
+
+
+async def run(
+    client: httpx.AsyncClient,
+    headers: dict,
+    operator_id: UUID,
+    streams: int,
+    events: int,
+    rate: float,
+) -> str:
+    latencies: list[float] = []
+    opened = [asyncio.Event() for _ in range(streams)]
+    listeners = [
+        asyncio.create_task(listen(client, headers, events, event, latencies))
+        for event in opened
+    ]
+    await asyncio.gather(*(event.wait() for event in opened))
+
+    start = time.perf_counter()
+    for version in range(events):
+        await publish_status_changed(
+            MeetingStatusChanged(
+                meeting_id=uuid4(),
+                operator_id=operator_id,
+                previous=MeetingStatus.CREATED,
+                status=MeetingStatus.PENDING,
+                version=version,
+                changed_at=datetime.now(timezone.utc),
+            ),
+            get_redis(),
+        )
+        await asyncio.sleep(1 / rate)
+
+    _, pending = await asyncio.wait(listeners, timeout=30)
+    for listener in pending:
+        listener.cancel()
+    elapsed = time.perf_counter() - start
+
+    missing = streams * events - len(latencies)
+    return (
+        summarize(f"streams={streams} events={events}", latencies, elapsed)
+        + f"  missing={missing}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=max(args.streams) + 10)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=60
+    ) as client:
+        headers = await login(client, args.username, args.password)
+        token = headers["Authorization"].removeprefix("Bearer ")
+        operator_id = UUID(jwt.get_unverified_claims(token)["sub"])
+
+        try:
+            for streams in args.streams:
+                print(
+                    await run(
+                        client, headers, operator_id, streams, args.events, args.rate
+                    )
+                )
+        finally:
+            await get_redis().aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:80")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--streams", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=50, help="events per second")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,143 @@
+"""Meeting join throughput and correctness when joins of one meeting race.
+
+Seeds created meetings for a throwaway operator in the configured database,
+then fires several joins per meeting in random order at each concurrency.
+Every meeting must end IN_PROGRESS at version 3 with exactly two status
+events, however the joins interleave. Removes the rows afterwards:
+
+    python -m benchmarks.meeting_transitions --meetings 1000 --joins 10
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import (
+    BENCH_PIN_PREFIX,
+    create_bench_operator,
+    drop_bench_operator,
+    summarize,
+)
+from src.core.enums import MeetingStatus
+from src.database.core import AsyncSessionLocal, SessionLocal
+from src.database.entities.citizen import Citizen
+from src.database.entities.meeting import Meeting
+from src.modules.meetings import transitions
+from src.modules.meetings.service import MeetingService
+
+
+def seed(operator_id, start: int, stop: int) -> list:
+    citizen_ids = [uuid4() for _ in range(start, stop)]
+    meeting_ids = [uuid4() for _ in range(start, stop)]
+    with SessionLocal() as db:
+        db.execute(
+            insert(Citizen),
+            [
+                {
+                    "id": citizen_id,
+                    "first_name": "Bench",
+                    "last_name": "Citizen",
+                    "patronymic": "Bench",
+                    "pin_code": f"{BENCH_PIN_PREFIX}{index:06x}",
+                    "phone": "994501234567",
+                }
+                for index, citizen_id in zip(range(start, stop), citizen_ids)
+            ],
+        )
+        db.execute(
+            insert(Meeting),
+            [
+                {
+                    "id": meeting_id,
+                    "operator_id": operator_id,
+                    "citizen_id": citizen_id,
+                    "scheduled_at": datetime.now(timezone.utc) + timedelta(hours=1),
+                    "status": MeetingStatus.CREATED,
+                }
+                for meeting_id, citizen_id in zip(meeting_ids, citizen_ids)
+            ],
+        )
+        db.commit()
+    return meeting_ids
+
+
+async def join(meeting_id) -> None:
+    async with AsyncSessionLocal() as db:
+        await MeetingService(db, None).join_meeting(meeting_id)
+
+
+async def run(jobs: list, concurrency: int):
+    latencies = []
+    queue = iter(jobs)
+
+    async def worker():
+        for meeting_id in queue:
+            start = time.perf_counter()
+            await join(meeting_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+def check(meeting_ids: list, events: list) -> str:
+    with SessionLocal() as db:
+        states = db.execute(
+            select(Meeting.status, Meeting.version).where(Meeting.id.in_(meeting_ids))
+        ).all()
+    wrong = sum(state != (MeetingStatus.IN_PROGRESS, 3) for state in states)
+    moves = {}
+    for event in events:
+        moves.setdefault(event.meeting_id, set()).add((event.previous, event.status))
+    expected = {
+        (MeetingStatus.CREATED, MeetingStatus.PENDING),
+        (MeetingStatus.PENDING, MeetingStatus.IN_PROGRESS),
+    }
+    wrong += sum(moves.get(meeting_id) != expected for meeting_id in meeting_ids)
+    if len(events) != 2 * len(meeting_ids):
+        wrong += 1
+    return "ok" if not wrong else f"{wrong} WRONG"
+
+
+async def main(args: argparse.Namespace) -> None:
+    principal = create_bench_operator()
+    events = []
+
+    async def record(event, redis_client):
+        events.append(event)
+
+    transitions.on_status_changed(record)
+
+    try:
+        offset = 0
+        for concurrency in args.concurrency:
+            meeting_ids = seed(principal.id, offset, offset + args.meetings)
+            offset += args.meetings
+            jobs = meeting_ids * args.joins
+            random.shuffle(jobs)
+
+            events.clear()
+            counters = transitions.meeting_transition_counters
+            conflicts = counters.snapshot()["conflicts"]
+            latencies, elapsed = await run(jobs, concurrency)
+            print(
+                summarize(f"join c={concurrency}", latencies, elapsed)
+                + f"  conflicts={counters.snapshot()['conflicts'] - conflicts}"
+                + f"  {check(meeting_ids, events)}"
+            )
+    finally:
+        drop_bench_operator(principal)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meetings", type=int, default=1000)
+    parser.add_argument("--joins", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""GET /meetings page latency as one operator's meeting count grows.
+
+Seeds meetings for a throwaway operator in the configured database, measures
+the first page and a page deep into the keyset, then removes the rows:
+
+    python -m benchmarks.meetings_pagination --rows 1000 10000 100000 300000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import insert
+
+from benchmarks.common import (
+    BENCH_PIN_PREFIX,
+    create_bench_operator,
+    drop_bench_operator,
+    summarize,
+)
+from src.core.domain.principal import Principal
+from src.core.enums import MeetingStatus
+from src.core.utils.pagination import encode_cursor
+from src.database.core import AsyncSessionLocal, SessionLocal
+from src.database.entities.citizen import Citizen
+from src.database.entities.meeting import Meeting
+from src.modules.meetings.model import MeetingListQuery
+from src.modules.meetings.service import MeetingService
+
+BASE_TIME = datetime(2030, 1, 1, tzinfo=timezone.utc)
+SEED_BATCH_SIZE = 5000
+
+
+def seed(operator_id, start: int, stop: int) -> None:
+    with SessionLocal() as db:
+        for batch_start in range(start, stop, SEED_BATCH_SIZE):
+            batch = range(batch_start, min(batch_start + SEED_BATCH_SIZE, stop))
+            citizen_ids = [uuid4() for _ in batch]
+            db.execute(
+                insert(Citizen),
+                [
+                    {
+                        "id": citizen_id,
+                        "first_name": "Bench",
+                        "last_name": "Citizen",
+                        "patronymic": "Bench",
+                        "pin_code": f"{BENCH_PIN_PREFIX}{index:06x}",
+                        "phone": "994501234567",
+                    }
+                    for index, citizen_id in zip(batch, citizen_ids)
+                ],
+            )
+            db.execute(
+                insert(Meeting),
+                [
+                    {
+                        "operator_id": operator_id,
+                        "citizen_id": citizen_id,
+                        "scheduled_at": BASE_TIME + timedelta(minutes=index),
+                        "status": MeetingStatus.FINISHED,
+                    }
+                    for index, citizen_id in zip(batch, citizen_ids)
+                ],
+            )
+        db.commit()
+
+
+async def measure(principal: Principal, query: MeetingListQuery, iterations: int):
+    latencies = []
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await MeetingService(db, None).get_meetings(principal, query)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    principal = create_bench_operator()
+
+    seeded = 0
+    try:
+        for rows in sorted(args.rows):
+            seed(principal.id, seeded, rows)
+            seeded = rows
+
+            middle = BASE_TIME + timedelta(minutes=rows // 2)
+            deep_cursor = encode_cursor(middle, uuid4())
+
+            for name, query in (
+                ("first page", MeetingListQuery(limit=args.limit)),
+                ("deep page", MeetingListQuery(limit=args.limit, cursor=deep_cursor)),
+            ):
+                latencies = await measure(principal, query, args.iterations)
+                print(summarize(f"{name} rows={rows}", latencies, sum(latencies)))
+    finally:
+        drop_bench_operator(principal)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
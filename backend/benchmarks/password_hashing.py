@@ -0,0 +1,58 @@
+"""Password verify latency per hashing cost on this host.
+
+Prints the verify latency of every bcrypt cost and of the configured argon2id
+parameters, then the policy the API would calibrate at startup, to pick
+PASSWORD_TARGET_VERIFY_MS or pin PASSWORD_BCRYPT_ROUNDS:
+
+    python -m benchmarks.password_hashing --iterations 5
+"""
+
+import argparse
+import time
+
+from benchmarks.common import summarize
+from src.core.constants import BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS
+from src.core.utils.auth import (
+    calibrate_password_policy,
+    get_password_hash,
+    get_password_policy,
+    verify_password,
+)
+
+
+def measure(policy, iterations: int) -> list[float]:
+    password_hash = get_password_hash("benchmark", policy)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        verify_password("benchmark", password_hash, policy)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main(args: argparse.Namespace) -> None:
+    policy = get_password_policy()
+
+    for rounds in range(BCRYPT_MIN_ROUNDS, args.max_rounds + 1):
+        bcrypt_policy = policy._replace(scheme="bcrypt", bcrypt_rounds=rounds)
+        latencies = measure(bcrypt_policy, args.iterations)
+        print(summarize(f"bcrypt rounds={rounds}", latencies, sum(latencies)))
+
+    argon2_policy = policy._replace(scheme="argon2")
+    latencies = measure(argon2_policy, args.iterations)
+    print(
+        summarize(
+            f"argon2id m={policy.argon2_memory_cost} t={policy.argon2_time_cost}",
+            latencies,
+            sum(latencies),
+        )
+    )
+
+    print(f"calibrated: {calibrate_password_policy()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--max-rounds", type=int, default=min(14, BCRYPT_MAX_ROUNDS))
+    main(parser.parse_args())
@@ -0,0 +1,134 @@
+"""Redis footprint and codec time of cached citizens per serializer.
+
+Encodes and decodes sample citizen entries with the legacy pydantic JSON and
+every tagged format, with and without a zstd dictionary trained on the
+samples, writes a sample of each to Redis to measure memory per key, and
+extrapolates it to one million cached citizens:
+
+    python -m benchmarks.redis_serialization --samples 5000 --keys 1000
+
+--train-dict writes the trained dictionary for REDIS_ZSTD_DICT_PATH.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from redis.exceptions import ResponseError
+
+from benchmarks.common import BENCH_PIN_PREFIX, summarize
+from src.core.domain.citizen import CitizenDomain
+from src.core.enums import RedisKeys
+from src.core.redis import get_redis
+from src.core.serialization import RedisSerializer
+from src.modules.citizens.model import CitizenRedisData
+
+PIN_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ0123456789"
+NAMES = ["Ahmad", "Leyla", "Rashad", "Aysel", "Elvin", "Nigar", "Tural", "Gunel"]
+SURNAMES = ["Jafarov", "Aliyeva", "Mammadov", "Huseynova", "Guliyev", "Hasanova"]
+STREETS = ["Nizami", "Istiqlaliyyat", "Azadliq", "Neftchilar", "Fuzuli"]
+
+
+def sample_citizen(rng: random.Random) -> CitizenRedisData:
+    return CitizenRedisData(
+        citizen=CitizenDomain(
+            pin_code="".join(rng.choices(PIN_ALPHABET, k=7)),
+            first_name=rng.choice(NAMES),
+            last_name=rng.choice(SURNAMES),
+            patronymic=rng.choice(NAMES),
+            document_number=f"AA{rng.randrange(10**7):07d}",
+            address_line=(
+                f"Azerbaijan, Baku, {rng.choice(STREETS)} str. "
+                f"{rng.randrange(1, 200)}, apt. {rng.randrange(1, 120)}"
+            ),
+            date_of_birth=datetime(1950, 1, 1, tzinfo=timezone.utc)
+            + timedelta(days=rng.randrange(25000)),
+        ),
+        fresh_until=time.time() + rng.randrange(43200),
+    )
+
+
+def measure(operation, items) -> list[float]:
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        operation(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def key_bytes(redis_client, key: str) -> int:
+    try:
+        return await redis_client.memory_usage(key, samples=0) or 0
+    except ResponseError:
+        # No MEMORY command, fall back to the payload size of key and value
+        value = await redis_client.dump(key)
+        return len(key) + len(value or b"")
+
+
+async def redis_bytes_per_key(redis_client, values: list[bytes]) -> float:
+    keys = [
+        f"{RedisKeys.CITIZEN.value}:{BENCH_PIN_PREFIX}{index:06x}"
+        for index in range(len(values))
+    ]
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key, value in zip(keys, values):
+                pipe.set(key, value, ex=600)
+            await pipe.execute()
+        return sum([await key_bytes(redis_client, key) for key in keys]) / len(keys)
+    finally:
+        await redis_client.delete(*keys)
+
+
+def train_zstd_dict(values: list[bytes], size: int) -> bytes:
+    import zstandard
+
+    return zstandard.train_dictionary(size, values).as_bytes()
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    citizens = [sample_citizen(rng) for _ in range(args.samples)]
+
+    serializers = {"json": RedisSerializer("json")}
+    for codec in ("orjson", "msgpack"):
+        serializers[codec] = RedisSerializer(codec)
+        plain = [serializers[codec].dumps(citizen)[1:] for citizen in citizens]
+        zstd_dict = train_zstd_dict(plain, args.dict_size)
+        serializers[f"{codec}+zstd"] = RedisSerializer(codec, zstd_dict)
+        if args.train_dict and codec == "msgpack":
+            with open(args.train_dict, "wb") as dict_file:
+                dict_file.write(zstd_dict)
+            print(f"wrote {len(zstd_dict)}B msgpack dictionary to {args.train_dict}")
+
+    redis_client = get_redis()
+    try:
+        for name, serializer in serializers.items():
+            values = [serializer.dumps(citizen) for citizen in citizens]
+            encode = measure(serializer.dumps, citizens)
+            decode = measure(
+                lambda value: serializer.loads(value, CitizenRedisData), values
+            )
+            print(summarize(f"{name} encode", encode, sum(encode)))
+            print(summarize(f"{name} decode", decode, sum(decode)))
+
+            per_key = await redis_bytes_per_key(redis_client, values[: args.keys])
+            print(
+                f"{name:<32} value={sum(map(len, values)) / len(values):.1f}B "
+                f"redis={per_key:.1f}B/key  1M citizens={per_key:.0f}MB"
+            )
+    finally:
+        await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--dict-size", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--train-dict")
+    asyncio.run(main(parser.parse_args()))
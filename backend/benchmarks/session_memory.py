@@ -0,0 +1,53 @@
+"""Redis memory held by one user's sessions as devices log in.
+
+Logs a throwaway user in on more devices than MAX_USER_SESSIONS allows and
+reports MEMORY USAGE of the session hash, which holds the refresh tokens too
+and has to level off at the cap. Needs the Redis from the environment
+configuration (a real Redis, MEMORY USAGE is not emulated everywhere):
+
+    python -m benchmarks.session_memory --devices 8
+"""
+
+import argparse
+import asyncio
+from uuid import uuid4
+
+from redis.exceptions import ResponseError
+
+from src.core.constants import MAX_USER_SESSIONS
+from src.core.enums import UserRole
+from src.core.redis import get_redis
+from src.core.utils.auth import delete_session, set_session, user_sessions_key
+from src.database.entities.user import User
+
+
+async def key_bytes(redis_client, key: str) -> int:
+    try:
+        return await redis_client.memory_usage(key, samples=0) or 0
+    except ResponseError:
+        # No MEMORY command, fall back to the payload size of key and value
+        value = await redis_client.dump(key)
+        return len(key) + len(value or b"")
+
+
+async def main(args: argparse.Namespace) -> None:
+    redis_client = get_redis()
+    user = User(id=uuid4(), username="bench", role=UserRole.OPERATOR)
+    sessions_key = user_sessions_key(user.id)
+
+    try:
+        for device in range(1, args.devices + 1):
+            await set_session(user, redis_client)
+            print(
+                f"devices={device:<3} sessions={await redis_client.hlen(sessions_key)}"
+                f"/{MAX_USER_SESSIONS} hash={await key_bytes(redis_client, sessions_key)}B"
+            )
+    finally:
+        await delete_session(user.id, redis_client)
+        await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=MAX_USER_SESSIONS + 3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,59 @@
+"""Refresh token rotation throughput against Redis.
+
+Every simulated user keeps one refresh chain and rotates it in a loop, the
+Redis side of POST /auth/refresh. Needs the Redis from the environment
+configuration and removes the keys it created:
+
+    python -m benchmarks.session_rotation --users 1 16 64 --rotations 500
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from benchmarks.common import summarize
+from src.core.enums import UserRole
+from src.core.redis import get_redis
+from src.core.utils.auth import get_refresh_session, set_session, user_sessions_key
+from src.database.entities.user import User
+
+
+async def rotate(redis_client, user: User, rotations: int, latencies: list[float]):
+    refresh_token = (await set_session(user, redis_client)).refresh_token
+    _, session_id = await get_refresh_session(refresh_token, redis_client)
+    for _ in range(rotations):
+        start = time.perf_counter()
+        auth_response = await set_session(user, redis_client, session_id, refresh_token)
+        latencies.append(time.perf_counter() - start)
+        refresh_token = auth_response.refresh_token
+    return refresh_token
+
+
+async def main(args: argparse.Namespace) -> None:
+    redis_client = get_redis()
+
+    for user_count in args.users:
+        users = [
+            User(id=uuid4(), username=f"bench-{index}", role=UserRole.OPERATOR)
+            for index in range(user_count)
+        ]
+        latencies: list[float] = []
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(rotate(redis_client, user, args.rotations, latencies) for user in users)
+        )
+        elapsed = time.perf_counter() - start
+        print(summarize(f"rotate users={user_count}", latencies, elapsed))
+
+        await redis_client.delete(*(user_sessions_key(user.id) for user in users))
+
+    await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--rotations", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
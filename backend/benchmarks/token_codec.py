@@ -0,0 +1,101 @@
+"""Access token encode and decode throughput per backend and algorithm.
+
+Signs and verifies the same payload with every token library for HS256,
+ES256 and EdDSA (python-jose has no EdDSA), with throwaway keys, then decodes
+through the verified-token cache as the API does on repeat requests:
+
+    python -m benchmarks.token_codec --iterations 5000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from benchmarks.common import summarize
+from src.core.cache import TTLCache
+from src.core.utils.tokens import (
+    TOKEN_CODECS,
+    CachedTokenDecoder,
+    build_token_codec,
+    load_signing_keys,
+)
+
+PRIVATE_KEYS = {
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def signing_keys(algorithm: str, keys_dir: Path):
+    if algorithm == "HS256":
+        return load_signing_keys(algorithm, "benchmark-secret")
+
+    algorithm_dir = keys_dir / algorithm
+    algorithm_dir.mkdir()
+    (algorithm_dir / "bench.pem").write_bytes(
+        PRIVATE_KEYS[algorithm]().private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return load_signing_keys(algorithm, keys_dir=str(algorithm_dir), active_kid="bench")
+
+
+def measure(operation, iterations: int) -> list[float]:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    print(summarize(name, latencies, sum(latencies)))
+
+
+def main(args: argparse.Namespace) -> None:
+    payload = {
+        "sub": "00000000-0000-0000-0000-000000000000",
+        "username": "bench",
+        "role": "OPERATOR",
+        "sid": "bench",
+        "exp": int(time.time()) + 15 * 60,
+    }
+
+    with tempfile.TemporaryDirectory() as keys_dir:
+        for algorithm in args.algorithms:
+            keys = signing_keys(algorithm, Path(keys_dir))
+
+            for backend in TOKEN_CODECS:
+                if backend == "jose" and algorithm == "EdDSA":
+                    continue
+                codec = build_token_codec(backend, keys)
+                token = codec.encode(payload)
+
+                report(
+                    f"{backend} {algorithm} encode",
+                    measure(lambda: codec.encode(payload), args.iterations),
+                )
+                report(
+                    f"{backend} {algorithm} decode",
+                    measure(lambda: codec.decode(token), args.iterations),
+                )
+
+            decoder = CachedTokenDecoder(codec, TTLCache(args.iterations, 60))
+            report(
+                f"cached {algorithm} decode",
+                measure(lambda: decoder.decode(token), args.iterations),
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--algorithms", nargs="+", default=["HS256", "ES256", "EdDSA"])
+    main(parser.parse_args())
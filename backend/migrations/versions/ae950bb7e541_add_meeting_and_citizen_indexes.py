@@ -0,0 +1,84 @@
+"""add meeting and citizen indexes
+
+Revision ID: ae950bb7e541
+Revises: 91fccaf906c4
+Create Date: 2026-10-17 12:41:07.311529
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "ae950bb7e541"
+down_revision: Union[str, Sequence[str], None] = "91fccaf906c4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Merge citizens created twice for one PIN into the oldest row
+    op.execute("""
+        WITH ranked AS (
+            SELECT id, FIRST_VALUE(id) OVER (
+                PARTITION BY pin_code ORDER BY created_at, id
+            ) AS keep_id
+            FROM citizens
+        )
+        UPDATE meetings SET citizen_id = ranked.keep_id
+        FROM ranked
+        WHERE meetings.citizen_id = ranked.id AND ranked.id <> ranked.keep_id
+        """)
+    op.execute("""
+        DELETE FROM citizens WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY pin_code ORDER BY created_at, id
+                ) AS row_number
+                FROM citizens
+            ) ranked
+            WHERE row_number > 1
+        )
+        """)
+    # Keep the earliest active meeting of a citizen, cancel double bookings
+    op.execute("""
+        UPDATE meetings SET status = 'CANCELLED' WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY citizen_id ORDER BY created_at, id
+                ) AS row_number
+                FROM meetings
+                WHERE status NOT IN ('FINISHED', 'CANCELLED')
+            ) ranked
+            WHERE row_number > 1
+        )
+        """)
+
+    op.create_index(op.f("ix_citizens_pin_code"), "citizens", ["pin_code"], unique=True)
+    op.create_index(
+        "ix_meetings_operator_id_scheduled_at",
+        "meetings",
+        ["operator_id", "scheduled_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_meetings_citizen_id_active",
+        "meetings",
+        ["citizen_id"],
+        unique=True,
+        postgresql_where=sa.text("status NOT IN ('FINISHED', 'CANCELLED')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_meetings_citizen_id_active",
+        table_name="meetings",
+        postgresql_where=sa.text("status NOT IN ('FINISHED', 'CANCELLED')"),
+    )
+    op.drop_index("ix_meetings_operator_id_scheduled_at", table_name="meetings")
+    op.drop_index(op.f("ix_citizens_pin_code"), table_name="citizens")
@@ -0,0 +1,38 @@
+"""add upcoming active meetings index
+
+Revision ID: c3d9a51e7f20
+Revises: ae950bb7e541
+Create Date: 2026-10-17 16:05:12.418203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d9a51e7f20"
+down_revision: Union[str, Sequence[str], None] = "ae950bb7e541"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_meetings_scheduled_at_active",
+        "meetings",
+        ["scheduled_at"],
+        unique=False,
+        postgresql_where=sa.text("status NOT IN ('FINISHED', 'CANCELLED')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_meetings_scheduled_at_active",
+        table_name="meetings",
+        postgresql_where=sa.text("status NOT IN ('FINISHED', 'CANCELLED')"),
+    )
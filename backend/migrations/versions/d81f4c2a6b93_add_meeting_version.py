@@ -0,0 +1,31 @@
+"""add meeting version
+
+Revision ID: d81f4c2a6b93
+Revises: c3d9a51e7f20
+Create Date: 2026-10-17 18:20:44.905127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d81f4c2a6b93"
+down_revision: Union[str, Sequence[str], None] = "c3d9a51e7f20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "meetings",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("meetings", "version")
@@ -15,16 +15,100 @@ BASE_DATABASE_URL = (
     f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}"
 )
 
+BASE_ASYNC_DATABASE_URL = BASE_DATABASE_URL.replace(
+    "postgresql://", "postgresql+asyncpg://", 1
+)
+
 DATABASE_URL = f"{BASE_DATABASE_URL}/{POSTGRES_DB}"
 TEST_DATABASE_URL = f"{BASE_DATABASE_URL}/{TEST_POSTGRES_DB}"
 
+ASYNC_DATABASE_URL = f"{BASE_ASYNC_DATABASE_URL}/{POSTGRES_DB}"
+TEST_ASYNC_DATABASE_URL = f"{BASE_ASYNC_DATABASE_URL}/{TEST_POSTGRES_DB}"
+
+# Connections per engine and worker: DB_POOL_SIZE kept open plus up to
+# DB_MAX_OVERFLOW more under load, checkouts beyond that wait up to the pool
+# timeout. Connections are replaced after DB_POOL_RECYCLE_SECONDS
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 10))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Behind PgBouncer in transaction mode server-side prepared statements cannot
+# be reused across transactions, so asyncpg's statement cache is turned off
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+# Compiled SQL kept per engine, and prepared statements per asyncpg connection
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", 1000))
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(
+    os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", 256)
+)
+# Read replicas ("postgresql://...,..."), read-only queries rotate over those
+# within the max lag and fall back to the primary. A user's reads stay on the
+# primary until the replicas have replayed past their own last write
+DATABASE_REPLICA_URLS = [
+    url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url
+]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 5))
+DB_REPLICA_CHECK_INTERVAL_SECONDS = float(
+    os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", 1)
+)
+
 # Auth
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
+# Token library, "jose" or "pyjwt" (needed for EdDSA). Asymmetric algorithms
+# (EdDSA, ES256) read <kid>.pem signing keys and <kid>.pub.pem retired public
+# keys from the directory and sign with the active kid
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose")
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+# Verified access tokens are trusted without a signature check for this long
+VERIFIED_TOKEN_CACHE_MAX_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_MAX_SIZE", 10000))
+VERIFIED_TOKEN_CACHE_TTL_SECONDS = int(
+    os.getenv("VERIFIED_TOKEN_CACHE_TTL_SECONDS", 60)
+)
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 REFRESH_TOKEN_EXPIRE_SECONDS = (
     int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS")) * 24 * 60 * 60
 )
+# Device sessions per user, logging in beyond it ends the least recently used
+MAX_USER_SESSIONS = int(os.getenv("MAX_USER_SESSIONS", 5))
+
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 1024))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+
+# Pagination
+MEETINGS_PAGE_DEFAULT_LIMIT = int(os.getenv("MEETINGS_PAGE_DEFAULT_LIMIT", 50))
+MEETINGS_PAGE_MAX_LIMIT = int(os.getenv("MEETINGS_PAGE_MAX_LIMIT", 200))
+
+# Bulk scheduling, bounded by the bind parameter limit of one statement
+MEETINGS_BULK_MAX_SIZE = int(os.getenv("MEETINGS_BULK_MAX_SIZE", 500))
+
+# Meeting status push (GET /meetings/events). A stream that falls this many
+# events behind is closed for the client to reconnect and reload the list,
+# idle streams get a keep-alive comment every heartbeat
+MEETING_EVENTS_QUEUE_SIZE = int(os.getenv("MEETING_EVENTS_QUEUE_SIZE", 100))
+MEETING_EVENTS_HEARTBEAT_SECONDS = float(
+    os.getenv("MEETING_EVENTS_HEARTBEAT_SECONDS", 15)
+)
+
+# Password hashing policy: "bcrypt" or "argon2" (argon2id). Bcrypt rounds of 0
+# are calibrated at startup to the largest cost verifying within the target
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 0))
+PASSWORD_TARGET_VERIFY_MS = int(os.getenv("PASSWORD_TARGET_VERIFY_MS", 250))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", 19456))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 1))
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_DEFAULT_ROUNDS = 12
+BCRYPT_MAX_ROUNDS = 16
+
+# Password hashing pool, per API worker. Logins beyond max pending get a 503
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", os.cpu_count() or 1))
+PASSWORD_POOL_MAX_PENDING = int(
+    os.getenv("PASSWORD_POOL_MAX_PENDING", PASSWORD_POOL_WORKERS * 8)
+)
 
 # Redis
 REDIS_HOST = os.getenv("REDIS_HOST")
@@ -39,8 +123,84 @@ BASE_REDIS_URL = f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}"
 REDIS_URL = f"{BASE_REDIS_URL}/{REDIS_DB}"
 TEST_REDIS_URL = f"{BASE_REDIS_URL}/{TEST_REDIS_DB}"
 
+# "standalone" on REDIS_URL, "sentinel" asking REDIS_SENTINELS ("host:port,...")
+# for the master of REDIS_SENTINEL_SERVICE, or "cluster" seeded from REDIS_URL
+REDIS_MODE = os.getenv("REDIS_MODE", "standalone")
+REDIS_SENTINELS = os.getenv("REDIS_SENTINELS", "")
+REDIS_SENTINEL_SERVICE = os.getenv("REDIS_SENTINEL_SERVICE", "mymaster")
+# Connections per worker, callers beyond it queue up to the pool timeout
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT_SECONDS = float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", 5))
+REDIS_SOCKET_TIMEOUT_SECONDS = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", 5))
+REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS = float(
+    os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS", 2)
+)
+# Idle connections are pinged before use once older than this
+REDIS_HEALTH_CHECK_INTERVAL_SECONDS = int(
+    os.getenv("REDIS_HEALTH_CHECK_INTERVAL_SECONDS", 30)
+)
+
+# Format of objects written to Redis: "json" (pydantic JSON, the only one
+# releases before the versioned formats can read), "msgpack" or "orjson".
+# Switch away from json only once no worker of such a release runs. A zstd
+# dictionary, e.g. trained with benchmarks.redis_serialization, also
+# compresses the tagged formats
+REDIS_SERIALIZER = os.getenv("REDIS_SERIALIZER", "json")
+REDIS_ZSTD_DICT_PATH = os.getenv("REDIS_ZSTD_DICT_PATH")
+
 CITIZEN_EXPIRE_SECONDS = int(os.getenv("CITIZEN_EXPIRE_DAYS")) * 24 * 60 * 60
 
+# Cached citizens older than this are still served but refreshed in background
+CITIZEN_FRESH_SECONDS = min(
+    int(os.getenv("CITIZEN_FRESH_HOURS", 12)) * 60 * 60, CITIZEN_EXPIRE_SECONDS
+)
+CITIZEN_NOT_FOUND_EXPIRE_SECONDS = int(
+    os.getenv("CITIZEN_NOT_FOUND_EXPIRE_SECONDS", 300)
+)
+
+# Per-worker cache of parsed citizens in front of Redis
+CITIZEN_L1_MAX_SIZE = int(os.getenv("CITIZEN_L1_MAX_SIZE", 10000))
+CITIZEN_L1_TTL_SECONDS = int(os.getenv("CITIZEN_L1_TTL_SECONDS", 30))
+
+# Lease held by the worker fetching a PIN from ASAN, and how long other
+# workers wait for its result before fetching themselves
+CITIZEN_FETCH_LOCK_SECONDS = float(os.getenv("CITIZEN_FETCH_LOCK_SECONDS", 5))
+CITIZEN_FETCH_WAIT_SECONDS = float(os.getenv("CITIZEN_FETCH_WAIT_SECONDS", 5))
+CITIZEN_FETCH_POLL_SECONDS = float(os.getenv("CITIZEN_FETCH_POLL_SECONDS", 0.05))
+
+# Citizens of meetings starting within the window are refreshed ahead of time
+# every interval (0 disables it). The window stays within the fresh TTL so a
+# refreshed entry is still fresh when the meeting starts
+CITIZEN_PREFETCH_INTERVAL_SECONDS = float(
+    os.getenv("CITIZEN_PREFETCH_INTERVAL_SECONDS", 60)
+)
+CITIZEN_PREFETCH_WINDOW_SECONDS = min(
+    int(os.getenv("CITIZEN_PREFETCH_WINDOW_MINUTES", 60)) * 60, CITIZEN_FRESH_SECONDS
+)
+CITIZEN_PREFETCH_CONCURRENCY = int(os.getenv("CITIZEN_PREFETCH_CONCURRENCY", 8))
+
+# PINs per POST /citizens/batch and ASAN calls it runs at once for misses
+CITIZENS_BATCH_MAX_SIZE = int(os.getenv("CITIZENS_BATCH_MAX_SIZE", 200))
+CITIZENS_BATCH_CONCURRENCY = int(os.getenv("CITIZENS_BATCH_CONCURRENCY", 16))
+
+# ASAN citizen registry, required to start. Locally point it at the fake
+# registry run standalone (see src/modules/citizens/asan_fake.py)
+ASAN_BASE_URL = os.getenv("ASAN_BASE_URL")
+ASAN_FAKE_LATENCY_SECONDS = float(os.getenv("ASAN_FAKE_LATENCY_SECONDS", 1))
+# One attempt is cut at the timeout and the whole call, retries included, at
+# the deadline, which stays below the fetch lease so waiters are not stranded
+ASAN_TIMEOUT_SECONDS = float(os.getenv("ASAN_TIMEOUT_SECONDS", 2))
+ASAN_DEADLINE_SECONDS = float(os.getenv("ASAN_DEADLINE_SECONDS", 4))
+ASAN_MAX_RETRIES = int(os.getenv("ASAN_MAX_RETRIES", 2))
+ASAN_RETRY_BACKOFF_SECONDS = float(os.getenv("ASAN_RETRY_BACKOFF_SECONDS", 0.1))
+ASAN_RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("ASAN_RETRY_BACKOFF_MAX_SECONDS", 1))
+ASAN_MAX_CONNECTIONS = int(os.getenv("ASAN_MAX_CONNECTIONS", 50))
+ASAN_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ASAN_MAX_KEEPALIVE_CONNECTIONS", 20))
+ASAN_KEEPALIVE_SECONDS = float(os.getenv("ASAN_KEEPALIVE_SECONDS", 30))
+# Consecutive failed attempts that open the circuit, and how long it stays open
+ASAN_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("ASAN_CIRCUIT_FAILURE_THRESHOLD", 5))
+ASAN_CIRCUIT_RESET_SECONDS = float(os.getenv("ASAN_CIRCUIT_RESET_SECONDS", 30))
+
 # Jitsi Configuration
 JITSI_JWT_SECRET = os.getenv("JITSI_JWT_SECRET")
 JITSI_ISSUER = os.getenv("JITSI_ISSUER")
@@ -48,3 +208,5 @@ JITSI_AUDIENCE = os.getenv("JITSI_AUDIENCE")
 JITSI_SUBJECT = os.getenv("JITSI_SUBJECT")
 JITSI_GROUP = os.getenv("JITSI_GROUP")
 JITSI_TOKEN_EXPIRY_HOURS = int(os.getenv("JITSI_TOKEN_EXPIRY_HOURS"))
+# Tokens are handed out again to the same user and room for half their life
+JITSI_TOKEN_CACHE_MAX_SIZE = int(os.getenv("JITSI_TOKEN_CACHE_MAX_SIZE", 4096))
@@ -0,0 +1,13 @@
+# src/core/domain/principal.py
+from uuid import UUID
+from pydantic import BaseModel
+from src.core.enums import UserRole
+
+
+class Principal(BaseModel):
+    """Authenticated identity built from verified access token claims"""
+
+    id: UUID
+    username: str
+    role: UserRole
+    session_id: str
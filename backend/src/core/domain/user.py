@@ -0,0 +1,16 @@
+# src/core/domain/user.py
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict
+from src.core.enums import UserRole
+
+
+class UserDomain(BaseModel):
+    """Detached snapshot of a users row, safe to share across sessions"""
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    id: UUID
+    username: str
+    first_name: str
+    last_name: str
+    role: UserRole
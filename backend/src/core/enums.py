@@ -2,10 +2,20 @@ from enum import Enum
 
 
 class RedisKeys(str, Enum):
+    # Refresh tokens issued before they named their session, read only
     REFRESH_TOKEN = "refresh_token"
-    USER_SESSION = "user_session"
+    USER_SESSIONS = "user_sessions"
     CITIZEN = "citizen"
+    CITIZEN_LOCK = "citizen_lock"
+    CITIZEN_PREFETCH_LOCK = "citizen_prefetch_lock"
     MEETING = "meeting"
+    LAST_WRITE = "last_write"
+
+
+class RedisChannels(str, Enum):
+    USER_INVALIDATION = "user_invalidation"
+    CITIZEN_INVALIDATION = "citizen_invalidation"
+    MEETING_STATUS = "meeting_status"
 
 
 class UserRole(str, Enum):
@@ -37,6 +37,14 @@ class MeetingAlreadyScheduledError(HTTPException):
         )
 
 
+class MeetingTimePassedError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Meeting time has already passed",
+        )
+
+
 class MeetingNotFoundError(HTTPException):
     def __init__(self):
         super().__init__(
@@ -55,3 +63,28 @@ class MeetingAlreadyInProgressError(HTTPException):
             status_code=status.HTTP_409_CONFLICT,
             detail="Meeting already in progress",
         )
+
+
+class InvalidCursorError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+class ServiceBusyError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service busy, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+class UpstreamUnavailableError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Citizen registry unavailable, retry shortly",
+            headers={"Retry-After": "5"},
+        )
@@ -0,0 +1,61 @@
+from collections import Counter
+from typing import Callable
+
+_collectors: dict[str, Callable[[], dict]] = {}
+
+
+def register_collector(name: str, collector: Callable[[], dict]) -> None:
+    """Register a callable returning a snapshot of a component's counters"""
+    _collectors[name] = collector
+
+
+def collect() -> dict[str, dict]:
+    return {name: collector() for name, collector in _collectors.items()}
+
+
+class Counters:
+    """Named event counters of one component"""
+
+    def __init__(self, *names: str):
+        self._values = Counter(dict.fromkeys(names, 0))
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        self._values[name] += amount
+
+    def snapshot(self) -> dict:
+        return dict(self._values)
+
+
+class LatencyHistograms:
+    """Latency histograms of one component, one per outcome label"""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self._counts: dict[str, list[int]] = {}
+        self._sums: Counter = Counter()
+
+    def observe(self, outcome: str, seconds: float) -> None:
+        counts = self._counts.setdefault(outcome, [0] * (len(self.buckets) + 1))
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._sums[outcome] += seconds
+
+    def snapshot(self) -> dict:
+        """Cumulative bucket counts per outcome, keyed by upper bound"""
+        snapshot = {}
+        for outcome, counts in self._counts.items():
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip((*self.buckets, "inf"), counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            snapshot[outcome] = {
+                "count": cumulative,
+                "sum": round(self._sums[outcome], 6),
+                "buckets": buckets,
+            }
+        return snapshot
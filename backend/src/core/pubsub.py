@@ -0,0 +1,75 @@
+import asyncio
+from typing import Callable
+from redis.asyncio.client import PubSub
+from src.core.enums import RedisChannels
+from src.core.logging import logger
+from src.core.redis import RedisClient, get_redis
+
+_handlers: dict[str, list[Callable[[str], None]]] = {}
+_pubsub: PubSub | None = None
+_listener: asyncio.Task | None = None
+
+
+def subscribe(channel: RedisChannels, handler: Callable[[str], None]) -> None:
+    """Register a handler called with every message published on the channel"""
+    _handlers.setdefault(channel.value, []).append(handler)
+
+
+async def publish(
+    redis_client: RedisClient, channel: RedisChannels, message: str
+) -> int:
+    return await redis_client.publish(channel.value, message) if redis_client else 0
+
+
+def _dispatch(message: dict) -> None:
+    for handler in _handlers.get(message["channel"], []):
+        try:
+            handler(message["data"])
+        except Exception as e:
+            logger.warning(f"Pub/sub handler for {message['channel']} failed: {e}")
+
+
+async def _listen(pubsub: PubSub) -> None:
+    while True:
+        try:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=1.0
+            )
+            if message:
+                _dispatch(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Pub/sub listener error: {e}")
+            await asyncio.sleep(1.0)
+
+
+async def start_listener() -> None:
+    """Listen on every registered channel in a background task of this worker"""
+    global _pubsub, _listener
+
+    if _listener or not _handlers:
+        return
+
+    try:
+        _pubsub = get_redis().pubsub()
+        await _pubsub.subscribe(*_handlers)
+        _listener = asyncio.create_task(_listen(_pubsub))
+    except Exception as e:
+        logger.warning(f"Pub/sub listener could not start: {e}")
+
+
+async def stop_listener() -> None:
+    global _pubsub, _listener
+
+    if _listener:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
+
+    if _pubsub:
+        await _pubsub.aclose()
+        _pubsub = None
@@ -1,36 +1,289 @@
-from typing import Annotated
+import asyncio
+import time
+from typing import Annotated, Dict, List, Tuple, Type, TypeVar
 from fastapi import Depends
-from redis import Redis, ConnectionPool
-from src.core.constants import REDIS_URL
+from pydantic import BaseModel, ValidationError
+from redis.asyncio import BlockingConnectionPool, Redis, RedisCluster
+from redis.asyncio.lock import Lock
+from redis.asyncio.sentinel import Sentinel
+from redis.client import NEVER_DECODE
+from redis.commands.core import AsyncScript
+from redis.exceptions import ConnectionError
+from src.core.constants import (
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_MODE,
+    REDIS_PASSWORD,
+    REDIS_POOL_TIMEOUT_SECONDS,
+    REDIS_SENTINEL_SERVICE,
+    REDIS_SENTINELS,
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+    REDIS_SOCKET_TIMEOUT_SECONDS,
+    REDIS_URL,
+)
 from src.core.enums import RedisKeys
+from src.core.logging import logger
+from src.core.metrics import register_collector
+from src.core.serialization import SerializationError, redis_serializer
 
-pool = ConnectionPool.from_url(REDIS_URL, decode_responses=True, max_connections=20)
+M = TypeVar("M", bound=BaseModel)
 
+CONNECTION_OPTIONS = {
+    "decode_responses": True,
+    "socket_timeout": REDIS_SOCKET_TIMEOUT_SECONDS,
+    "socket_connect_timeout": REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+    "socket_keepalive": True,
+    "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+}
 
-def get_redis():
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Pool that queues callers for up to `timeout` seconds once every
+    connection is in use, instead of failing, and counts those waits"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.wait_timeouts = 0
+
+    async def get_connection(self, *args, **kwargs):
+        if self.can_get_connection():
+            return await super().get_connection(*args, **kwargs)
+
+        self.waits += 1
+        start = time.monotonic()
+        try:
+            return await super().get_connection(*args, **kwargs)
+        except ConnectionError:
+            self.wait_timeouts += 1
+            raise
+        finally:
+            self.wait_seconds += time.monotonic() - start
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self._in_use_connections),
+            "idle": len(self._available_connections),
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 6),
+            "wait_timeouts": self.wait_timeouts,
+        }
+
+
+def create_redis_client(mode: str = REDIS_MODE) -> Redis:
+    if mode == "sentinel":
+        sentinels = [
+            (host, int(port))
+            for host, port in (
+                address.rsplit(":", 1) for address in REDIS_SENTINELS.split(",")
+            )
+        ]
+        return Sentinel(sentinels, password=REDIS_PASSWORD).master_for(
+            REDIS_SENTINEL_SERVICE,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            password=REDIS_PASSWORD,
+            **CONNECTION_OPTIONS,
+        )
+
+    if mode == "cluster":
+        return RedisCluster.from_url(
+            REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, **CONNECTION_OPTIONS
+        )
+
+    if mode != "standalone":
+        raise ValueError(f"Unknown Redis mode {mode!r}")
+
+    pool = InstrumentedConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT_SECONDS,
+        **CONNECTION_OPTIONS,
+    )
     return Redis(connection_pool=pool)
 
 
+# One client per worker, shared by every request and background task
+shared_redis_client = create_redis_client()
+
+
+def redis_pool_stats() -> dict:
+    pool = getattr(shared_redis_client, "connection_pool", None)
+    stats = pool.stats() if isinstance(pool, InstrumentedConnectionPool) else {}
+    return {"mode": REDIS_MODE, **stats}
+
+
+register_collector("redis_pool", redis_pool_stats)
+
+
+def get_redis():
+    return shared_redis_client
+
+
 RedisClient = Annotated[Redis, Depends(get_redis)]
 
 
-def get_redis_value(
+def register_script(source: str) -> AsyncScript:
+    """Lua script run through EVALSHA (loaded on first NOSCRIPT), call it with
+    client=redis_client to run it on the request's client"""
+    return get_redis().register_script(source)
+
+
+async def get_redis_value(
     redis_client: RedisClient, namespace: RedisKeys, key: str
 ) -> str | None:
-    return redis_client.get(f"{namespace.value}:{key}") if redis_client else None
+    return await redis_client.get(f"{namespace.value}:{key}") if redis_client else None
 
 
-def set_redis_value(
-    redis_client: RedisClient, namespace: RedisKeys, key: str, value: str, expire: int
+async def set_redis_value(
+    redis_client: RedisClient,
+    namespace: RedisKeys,
+    key: str,
+    value: str | bytes,
+    expire: int,
 ) -> bool:
     return (
-        redis_client.set(f"{namespace.value}:{key}", value, ex=expire)
+        await redis_client.set(f"{namespace.value}:{key}", value, ex=expire)
         if redis_client
         else False
     )
 
 
-def delete_redis_value(
+async def mget(redis_client: RedisClient, keys: List[str], **options) -> List:
+    """MGET of the keys in order. A cluster only serves an MGET within one
+    hash slot, there it runs one per slot concurrently. mget_nonatomic does
+    the same but cannot read binary values past the client's decoding"""
+    if not isinstance(redis_client, RedisCluster):
+        return await redis_client.execute_command("MGET", *keys, **options)
+
+    slots: Dict[int, List[int]] = {}
+    for index, key in enumerate(keys):
+        slots.setdefault(redis_client.keyslot(key), []).append(index)
+
+    replies = await asyncio.gather(
+        *(
+            redis_client.execute_command(
+                "MGET", *(keys[index] for index in indexes), **options
+            )
+            for indexes in slots.values()
+        )
+    )
+
+    values = [None] * len(keys)
+    for indexes, reply in zip(slots.values(), replies):
+        for index, value in zip(indexes, reply):
+            values[index] = value
+    return values
+
+
+async def get_redis_values(
+    redis_client: RedisClient, namespace: RedisKeys, keys: List[str]
+) -> List[str | None]:
+    if not redis_client or not keys:
+        return [None] * len(keys)
+    return await mget(redis_client, [f"{namespace.value}:{key}" for key in keys])
+
+
+async def set_redis_values(
+    redis_client: RedisClient,
+    namespace: RedisKeys,
+    values: Dict[str, Tuple[str | bytes, int]],
+) -> None:
+    """Sets every key to its (value, expire) in one pipelined round trip"""
+    if not redis_client or not values:
+        return
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key, (value, expire) in values.items():
+            pipe.set(f"{namespace.value}:{key}", value, ex=expire)
+        await pipe.execute()
+
+
+async def delete_redis_value(
+    redis_client: RedisClient, namespace: RedisKeys, key: str
+) -> bool:
+    return (
+        await redis_client.delete(f"{namespace.value}:{key}") if redis_client else False
+    )
+
+
+async def increment_redis_value(
     redis_client: RedisClient, namespace: RedisKeys, key: str
+) -> int:
+    return await redis_client.incr(f"{namespace.value}:{key}") if redis_client else 0
+
+
+def _load_object(value: bytes | None, model_type: Type[M]) -> M | None:
+    if value is None:
+        return None
+    try:
+        return redis_serializer.loads(value, model_type)
+    except (SerializationError, ValidationError) as e:
+        # Written by a release with another schema, callers refetch it
+        logger.debug(f"Unreadable {model_type.__name__} in Redis: {e}")
+        return None
+
+
+async def get_redis_object(
+    redis_client: RedisClient, namespace: RedisKeys, key: str, model_type: Type[M]
+) -> M | None:
+    """Model stored with set_redis_object, None if missing or unreadable"""
+    if not redis_client:
+        return None
+    # Values are binary, they bypass the client's response decoding
+    value = await redis_client.execute_command(
+        "GET", f"{namespace.value}:{key}", **{NEVER_DECODE: True}
+    )
+    return _load_object(value, model_type)
+
+
+async def get_redis_objects(
+    redis_client: RedisClient,
+    namespace: RedisKeys,
+    keys: List[str],
+    model_type: Type[M],
+) -> List[M | None]:
+    if not redis_client or not keys:
+        return [None] * len(keys)
+    values = await mget(
+        redis_client,
+        [f"{namespace.value}:{key}" for key in keys],
+        **{NEVER_DECODE: True},
+    )
+    return [_load_object(value, model_type) for value in values]
+
+
+async def set_redis_object(
+    redis_client: RedisClient,
+    namespace: RedisKeys,
+    key: str,
+    value: BaseModel,
+    expire: int,
 ) -> bool:
-    return redis_client.delete(f"{namespace.value}:{key}") if redis_client else False
+    return await set_redis_value(
+        redis_client, namespace, key, redis_serializer.dumps(value), expire
+    )
+
+
+async def set_redis_objects(
+    redis_client: RedisClient,
+    namespace: RedisKeys,
+    values: Dict[str, Tuple[BaseModel, int]],
+) -> None:
+    await set_redis_values(
+        redis_client,
+        namespace,
+        {
+            key: (redis_serializer.dumps(value), expire)
+            for key, (value, expire) in values.items()
+        },
+    )
+
+
+def get_redis_lock(
+    redis_client: RedisClient, namespace: RedisKeys, key: str, timeout: float
+) -> Lock:
+    """Non-blocking lease that expires on its own if the holder dies"""
+    return redis_client.lock(
+        f"{namespace.value}:{key}", timeout=timeout, blocking=False
+    )
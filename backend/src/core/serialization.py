@@ -0,0 +1,158 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import UnionType
+from typing import Any, Type, TypeVar, Union, get_args, get_origin
+from uuid import UUID
+
+import msgpack
+import orjson
+import zstandard
+from pydantic import BaseModel
+from src.core.constants import REDIS_SERIALIZER, REDIS_ZSTD_DICT_PATH
+
+M = TypeVar("M", bound=BaseModel)
+
+# Versioned values start with one header byte: the schema version in the high
+# nibble and the codec in the low one. Values in the legacy pydantic JSON
+# format start with "{" instead. Models are stored as lists of their field
+# values in declaration order, the position standing in for the field name:
+# appending optional fields is compatible, anything else bumps the version.
+SCHEMA_VERSION = 1
+
+ORJSON = 0x1
+MSGPACK = 0x2
+ZSTD = 0x8
+
+CODECS = {"orjson": ORJSON, "msgpack": MSGPACK}
+
+
+class SerializationError(ValueError):
+    """Value this release cannot read, callers treat it as missing"""
+
+
+@lru_cache
+def nested_models(model_type: Type[BaseModel]) -> tuple:
+    """Model type of every field, None for fields that are not models"""
+    nested = []
+    for field in model_type.model_fields.values():
+        annotation = field.annotation
+        if get_origin(annotation) in (Union, UnionType):
+            annotation = next(
+                (arg for arg in get_args(annotation) if arg is not type(None)), None
+            )
+        is_model = isinstance(annotation, type) and issubclass(annotation, BaseModel)
+        nested.append(annotation if is_model else None)
+    return tuple(nested)
+
+
+def to_tagged(model: BaseModel) -> list:
+    return [
+        to_tagged(value) if isinstance(value, BaseModel) else value
+        for value in (getattr(model, name) for name in type(model).model_fields)
+    ]
+
+
+def from_tagged(model_type: Type[BaseModel], values: list) -> dict:
+    data = {}
+    for name, nested, value in zip(
+        model_type.model_fields, nested_models(model_type), values
+    ):
+        if nested and isinstance(value, list):
+            value = from_tagged(nested, value)
+        data[name] = value
+    return data
+
+
+def msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Aware datetimes are packed natively, naive ones are taken as UTC
+        return msgpack.Timestamp.from_datetime(value.replace(tzinfo=timezone.utc))
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class RedisSerializer:
+    """Turns models into Redis values and back, reading every format and
+    schema version this release knows whatever it writes itself"""
+
+    def __init__(self, codec: str, zstd_dict: bytes | None = None):
+        if codec != "json" and codec not in CODECS:
+            raise ValueError(f"Unknown Redis serializer {codec!r}")
+
+        self.codec = codec
+        self.zstd_dict = zstd_dict
+        self._compressor = None
+        self._decompressor = None
+
+    def dumps(self, model: BaseModel) -> bytes:
+        if self.codec == "json":
+            return model.model_dump_json().encode()
+
+        codec = CODECS[self.codec]
+        payload = self._encode(codec, to_tagged(model))
+
+        if self.zstd_dict:
+            codec |= ZSTD
+            payload = self._zstd()[0].compress(payload)
+
+        return bytes([SCHEMA_VERSION << 4 | codec]) + payload
+
+    def loads(self, data: bytes | str, model_type: Type[M]) -> M:
+        if isinstance(data, str):
+            data = data.encode()
+
+        if data[:1] == b"{":
+            return model_type.model_validate_json(data)
+
+        header, payload = data[0], data[1:]
+        if header >> 4 != SCHEMA_VERSION:
+            raise SerializationError(f"Unknown schema version {header >> 4}")
+
+        codec = header & 0xF
+        if codec & ZSTD:
+            if not self.zstd_dict:
+                raise SerializationError("Compressed value without a zstd dictionary")
+            payload = self._zstd()[1].decompress(payload)
+
+        try:
+            values = self._decode(codec & ~ZSTD, payload)
+        except SerializationError:
+            raise
+        except Exception as e:
+            raise SerializationError(str(e)) from e
+
+        return model_type.model_validate(from_tagged(model_type, values))
+
+    def _encode(self, codec: int, values: list) -> bytes:
+        if codec == MSGPACK:
+            return msgpack.packb(values, datetime=True, default=msgpack_default)
+
+        return orjson.dumps(values)
+
+    def _decode(self, codec: int, payload: bytes) -> list:
+        if codec == MSGPACK:
+            return msgpack.unpackb(payload, timestamp=3)
+        if codec == ORJSON:
+            return orjson.loads(payload)
+
+        raise SerializationError(f"Unknown codec {codec}")
+
+    def _zstd(self):
+        if self._compressor is None:
+            dictionary = zstandard.ZstdCompressionDict(self.zstd_dict)
+            self._compressor = zstandard.ZstdCompressor(dict_data=dictionary)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return self._compressor, self._decompressor
+
+
+def load_zstd_dict(path: str | None) -> bytes | None:
+    if not path:
+        return None
+    with open(path, "rb") as dict_file:
+        return dict_file.read()
+
+
+redis_serializer = RedisSerializer(
+    REDIS_SERIALIZER, load_zstd_dict(REDIS_ZSTD_DICT_PATH)
+)
@@ -1,102 +1,344 @@
 import secrets
+import time
+import timeit
 from datetime import timedelta, datetime, timezone
+from functools import lru_cache
+from typing import NamedTuple
 from uuid import UUID
-from jose import JWTError, jwt
 from passlib.context import CryptContext
-from src.core.enums import RedisKeys
-from src.core.redis import (
-    get_redis_value,
-    set_redis_value,
-    delete_redis_value,
-    RedisClient,
-)
+from passlib.hash import bcrypt
+from passlib.registry import get_crypt_handler
+from src.core.cache import TTLCache
+from src.core.enums import RedisChannels, RedisKeys
+from src.core.redis import get_redis_value, register_script, RedisClient
 from src.core.constants import (
+    BCRYPT_DEFAULT_ROUNDS,
+    BCRYPT_MAX_ROUNDS,
+    BCRYPT_MIN_ROUNDS,
+    MAX_USER_SESSIONS,
+    PASSWORD_ARGON2_MEMORY_COST,
+    PASSWORD_ARGON2_PARALLELISM,
+    PASSWORD_ARGON2_TIME_COST,
+    PASSWORD_BCRYPT_ROUNDS,
+    PASSWORD_HASH_SCHEME,
+    PASSWORD_TARGET_VERIFY_MS,
     REFRESH_TOKEN_EXPIRE_SECONDS,
     SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    JWT_ACTIVE_KID,
+    JWT_BACKEND,
+    JWT_KEYS_DIR,
+    VERIFIED_TOKEN_CACHE_MAX_SIZE,
+    VERIFIED_TOKEN_CACHE_TTL_SECONDS,
 )
 from src.core.exceptions import AuthenticationError
 from src.core.logging import logger
+from src.core.metrics import register_collector
+from src.core.utils.tokens import (
+    CachedTokenDecoder,
+    TokenError,
+    build_token_codec,
+    load_signing_keys,
+)
 from src.modules.auth.model import AuthResponse
 from src.database.entities.user import User
 
+
 # Password utilities
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+class PasswordPolicy(NamedTuple):
+    scheme: str
+    bcrypt_rounds: int
+    argon2_memory_cost: int
+    argon2_time_cost: int
+    argon2_parallelism: int
+
+
+password_policy = PasswordPolicy(
+    scheme=PASSWORD_HASH_SCHEME,
+    bcrypt_rounds=PASSWORD_BCRYPT_ROUNDS or BCRYPT_DEFAULT_ROUNDS,
+    argon2_memory_cost=PASSWORD_ARGON2_MEMORY_COST,
+    argon2_time_cost=PASSWORD_ARGON2_TIME_COST,
+    argon2_parallelism=PASSWORD_ARGON2_PARALLELISM,
+)
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt"""
-    return bcrypt_context.hash(password)
+def get_password_policy() -> PasswordPolicy:
+    return password_policy
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return bcrypt_context.verify(plain_password, hashed_password)
+def calibrate_password_policy() -> PasswordPolicy:
+    """Picks the bcrypt rounds whose verify stays within the target latency
+    on this host, unless the rounds are pinned through the environment"""
+    global password_policy
+
+    if password_policy.scheme == "bcrypt" and not PASSWORD_BCRYPT_ROUNDS:
+        rounds = calibrate_bcrypt_rounds(PASSWORD_TARGET_VERIFY_MS / 1000)
+        password_policy = password_policy._replace(bcrypt_rounds=rounds)
+
+    logger.info(f"Password hashing policy: {password_policy}")
+    return password_policy
+
+
+def calibrate_bcrypt_rounds(target_seconds: float) -> int:
+    # Every round doubles the cost, so one timing at the floor is enough
+    password_hash = bcrypt.hash("calibration", rounds=BCRYPT_MIN_ROUNDS)
+    elapsed = min(
+        timeit.repeat(lambda: bcrypt.verify("calibration", password_hash), number=1)
+    )
+
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS and elapsed * 2 <= target_seconds:
+        rounds += 1
+        elapsed *= 2
+    return rounds
+
+
+@lru_cache
+def get_password_context(policy: PasswordPolicy) -> CryptContext:
+    """Hashes with the policy scheme, and flags hashes of the other scheme or
+    with a lower cost as deprecated so verify_and_update replaces them"""
+    schemes = [policy.scheme]
+    for scheme in ("bcrypt", "argon2"):
+        if scheme not in schemes and get_crypt_handler(scheme).has_backend():
+            schemes.append(scheme)
+
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__default_rounds=policy.bcrypt_rounds,
+        bcrypt__min_rounds=policy.bcrypt_rounds,
+        argon2__type="ID",
+        argon2__memory_cost=policy.argon2_memory_cost,
+        argon2__time_cost=policy.argon2_time_cost,
+        argon2__parallelism=policy.argon2_parallelism,
+    )
+
+
+def get_password_hash(password: str, policy: PasswordPolicy) -> str:
+    """Hash a password with the given policy"""
+    return get_password_context(policy).hash(password)
+
+
+def verify_password(
+    plain_password: str, hashed_password: str, policy: PasswordPolicy
+) -> tuple[bool, str | None]:
+    """Verify a password against its hash, returning a new hash as well when
+    the stored one falls below the policy"""
+    return get_password_context(policy).verify_and_update(
+        plain_password, hashed_password
+    )
 
 
 # Token utilities
+# Keys are parsed once, the codec is shared by every request
+access_token_codec = build_token_codec(
+    JWT_BACKEND,
+    load_signing_keys(ALGORITHM, SECRET_KEY, JWT_KEYS_DIR, JWT_ACTIVE_KID),
+)
+
+verified_tokens = TTLCache(
+    VERIFIED_TOKEN_CACHE_MAX_SIZE, VERIFIED_TOKEN_CACHE_TTL_SECONDS
+)
+access_token_decoder = CachedTokenDecoder(access_token_codec, verified_tokens)
+
+register_collector("verified_tokens", verified_tokens.stats)
+
+
 def generate_access_token(data: dict) -> str:
     """Generate JWT access token"""
     expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode.update({"exp": int(expire.timestamp())})
+    return access_token_codec.encode(to_encode)
 
 
 def decode_jwt(token: str) -> dict:
-    """Decode and validate JWT token"""
+    """Decode and validate JWT token, verified tokens are served from memory"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError as e:
+        return access_token_decoder.decode(token)
+    except TokenError as e:
         logger.warning(f"Token verification failed: {str(e)}")
         raise AuthenticationError()
 
 
-def set_session(user: User, redis_client: RedisClient) -> AuthResponse:
-    token_payload = {"sub": str(user.id), "username": user.username, "role": user.role}
-    access_token = generate_access_token(token_payload)
-    refresh_token = secrets.token_urlsafe(32)
+def user_sessions_key(user_id: UUID | str) -> str:
+    return f"{RedisKeys.USER_SESSIONS.value}:{user_id}"
 
-    old_refresh_token = get_redis_value(redis_client, RedisKeys.USER_SESSION, str(user.id))
 
-    if old_refresh_token:
-        delete_redis_value(redis_client, RedisKeys.REFRESH_TOKEN, old_refresh_token)
+async def session_exists(
+    user_id: UUID, session_id: str, redis_client: RedisClient
+) -> bool:
+    """Whether the device session is still live, revoked ones are removed"""
+    return bool(await redis_client.hexists(user_sessions_key(user_id), session_id))
 
-    set_redis_value(
-        redis_client,
-        RedisKeys.USER_SESSION,
-        str(user.id),
-        refresh_token,
-        REFRESH_TOKEN_EXPIRE_SECONDS,
-    )
 
-    set_redis_value(
-        redis_client,
-        RedisKeys.REFRESH_TOKEN,
-        refresh_token,
-        str(user.id),
-        REFRESH_TOKEN_EXPIRE_SECONDS,
+# Sessions of a user live in one hash, session id -> "<last rotation ms>:<refresh
+# token>", capped at MAX_USER_SESSIONS. Refresh tokens are "<user id>.<session
+# id>.<secret>" and are checked against the hash, so every script below only
+# touches that one key. Each is one round trip with no other command in between.
+# The hash expires with its most recently rotated session, each session on its
+# own once the refresh token ttl has passed since its last rotation.
+
+# Drops the sessions that aged out, then starts a session (ARGV[6] empty),
+# evicting the least recently rotated ones beyond the cap, or rotates the
+# refresh token of an existing one as long as ARGV[6] is still its current
+# token.
+# KEYS: user sessions
+# ARGV: user id, session id, new refresh token, ttl, invalidation channel,
+#       expected current refresh token, now ms, max
+rotate_session_script = register_script("""
+local oldest = tonumber(ARGV[7]) - tonumber(ARGV[4]) * 1000
+local sessions = redis.call('HGETALL', KEYS[1])
+local entries = {}
+local current
+for i = 1, #sessions, 2 do
+    local separator = string.find(sessions[i + 1], ':', 1, true)
+    local rotated_at = tonumber(string.sub(sessions[i + 1], 1, separator - 1))
+    if rotated_at <= oldest then
+        redis.call('HDEL', KEYS[1], sessions[i])
+    else
+        table.insert(entries, {sessions[i], rotated_at})
+        if sessions[i] == ARGV[2] then
+            current = string.sub(sessions[i + 1], separator + 1)
+        end
+    end
+end
+if ARGV[6] ~= '' then
+    if current ~= ARGV[6] then
+        return false
+    end
+else
+    local excess = #entries - tonumber(ARGV[8]) + 1
+    if excess > 0 then
+        table.sort(entries, function(a, b) return a[2] < b[2] end)
+        for i = 1, excess do
+            redis.call('HDEL', KEYS[1], entries[i][1])
+        end
+    end
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[7] .. ':' .. ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('PUBLISH', ARGV[5], ARGV[1])
+return 1
+""")
+
+# Revokes one session (ARGV[3] set) or all sessions of the user
+# KEYS: user sessions
+# ARGV: user id, invalidation channel, session id
+delete_session_script = register_script("""
+local deleted
+if ARGV[3] ~= '' then
+    deleted = redis.call('HDEL', KEYS[1], ARGV[3])
+else
+    deleted = redis.call('HLEN', KEYS[1])
+    redis.call('DEL', KEYS[1])
+end
+redis.call('PUBLISH', ARGV[2], ARGV[1])
+return deleted
+""")
+
+
+async def set_session(
+    user: User,
+    redis_client: RedisClient,
+    session_id: str | None = None,
+    current_refresh_token: str | None = None,
+) -> AuthResponse:
+    """Starts a new device session of the user, or with session_id and
+    current_refresh_token rotates that session's refresh token. The rotation
+    only happens while the token is still the session's, so one refresh
+    token cannot be redeemed twice"""
+    user_id = str(user.id)
+    session_id = session_id or secrets.token_urlsafe(12)
+    refresh_token = f"{user_id}.{session_id}.{secrets.token_urlsafe(32)}"
+
+    rotated = await rotate_session_script(
+        keys=[user_sessions_key(user_id)],
+        args=[
+            user_id,
+            session_id,
+            refresh_token,
+            REFRESH_TOKEN_EXPIRE_SECONDS,
+            RedisChannels.USER_INVALIDATION.value,
+            current_refresh_token or "",
+            int(time.time() * 1000),
+            MAX_USER_SESSIONS,
+        ],
+        client=redis_client,
     )
 
+    if not rotated:
+        raise AuthenticationError()
+
+    token_payload = {
+        "sub": user_id,
+        "username": user.username,
+        "role": user.role,
+        "sid": session_id,
+    }
+    access_token = generate_access_token(token_payload)
+
     return AuthResponse(access_token=access_token, refresh_token=refresh_token)
 
 
-def delete_session(user_id: UUID, redis_client: RedisClient) -> bool:
-    """Delete session bidirectionally by user ID"""
-    user_id_str = str(user_id)
-    refresh_token = get_redis_value(redis_client, RedisKeys.USER_SESSION, user_id_str)
+async def get_refresh_session(
+    refresh_token: str, redis_client: RedisClient
+) -> tuple[UUID, str] | None:
+    """User id and session id a refresh token was issued for, while it is
+    still the session's current token"""
+    parts = refresh_token.split(".")
+    if len(parts) == 1:
+        # Issued before the token named its session, by its own key. Tokens of
+        # the single session era name a bare user id and no session, the user
+        # logs in again
+        session = await get_redis_value(
+            redis_client, RedisKeys.REFRESH_TOKEN, refresh_token
+        )
+        if not session or ":" not in session:
+            return None
+        user_id, session_id = session.split(":", 1)
+    elif len(parts) == 3:
+        user_id, session_id, _ = parts
+    else:
+        return None
 
-    if not refresh_token:
-        return False
+    try:
+        user_id = UUID(user_id)
+    except ValueError:
+        return None
 
-    delete_redis_value(redis_client, RedisKeys.REFRESH_TOKEN, refresh_token)
-    delete_redis_value(redis_client, RedisKeys.USER_SESSION, user_id_str)
+    session = await redis_client.hget(user_sessions_key(user_id), session_id)
+    if not session:
+        return None
+    rotated_at, current_refresh_token = session.split(":", 1)
+    # Aged out, left in the hash until the next rotation of another session
+    if int(rotated_at) <= (time.time() - REFRESH_TOKEN_EXPIRE_SECONDS) * 1000:
+        return None
+    if not secrets.compare_digest(current_refresh_token, refresh_token):
+        return None
+    return user_id, session_id
+
+
+async def delete_session(
+    user_id: UUID, redis_client: RedisClient, session_id: str | None = None
+) -> bool:
+    """Revoke one device session, or every session of the user without
+    session_id, along with the access tokens issued for them"""
+    user_id_str = str(user_id)
+
+    deleted = await delete_session_script(
+        keys=[user_sessions_key(user_id_str)],
+        args=[
+            user_id_str,
+            RedisChannels.USER_INVALIDATION.value,
+            session_id or "",
+        ],
+        client=redis_client,
+    )
 
-    return True
+    return bool(deleted)
 
 
 def generate_otp(length: int = 6) -> str:
@@ -1,14 +1,18 @@
 from datetime import datetime, timezone, timedelta
 from typing import TypedDict
-from jose import jwt
+from src.core.cache import TTLCache
 from src.core.constants import (
     JITSI_JWT_SECRET,
     JITSI_ISSUER,
     JITSI_AUDIENCE,
     JITSI_SUBJECT,
     JITSI_GROUP,
+    JITSI_TOKEN_CACHE_MAX_SIZE,
     JITSI_TOKEN_EXPIRY_HOURS,
+    JWT_BACKEND,
 )
+from src.core.metrics import register_collector
+from src.core.utils.tokens import build_token_codec, load_signing_keys
 
 
 class JitsiUser(TypedDict):
@@ -17,10 +21,31 @@ class JitsiUser(TypedDict):
     username: str
 
 
+jitsi_token_codec = build_token_codec(
+    JWT_BACKEND, load_signing_keys("HS256", JITSI_JWT_SECRET)
+)
+
+# A token is reused while at least half of its lifetime is left
+jitsi_tokens = TTLCache(
+    JITSI_TOKEN_CACHE_MAX_SIZE, JITSI_TOKEN_EXPIRY_HOURS * 60 * 60 / 2
+)
+
+register_collector("jitsi_tokens", jitsi_tokens.stats)
+
+
 def generate_jitsi_token(
     room_id: str,
     user_data: JitsiUser,
 ) -> str:
+    cache_key = (
+        room_id,
+        user_data["username"],
+        user_data["name"],
+        user_data["moderator"],
+    )
+    encoded_jwt = jitsi_tokens.get(cache_key)
+    if encoded_jwt is not None:
+        return encoded_jwt
 
     now = datetime.now(timezone.utc)
     exp_time = now + timedelta(hours=JITSI_TOKEN_EXPIRY_HOURS)
@@ -38,5 +63,6 @@ def generate_jitsi_token(
         "exp": int(exp_time.timestamp()),
     }
 
-    encoded_jwt = jwt.encode(payload, JITSI_JWT_SECRET, algorithm="HS256")
+    encoded_jwt = jitsi_token_codec.encode(payload)
+    jitsi_tokens.set(cache_key, encoded_jwt)
     return encoded_jwt
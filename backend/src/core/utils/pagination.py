@@ -0,0 +1,19 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+from src.core.exceptions import InvalidCursorError
+
+
+def encode_cursor(scheduled_at: datetime, row_id: UUID) -> str:
+    """Opaque keyset cursor pointing at the last row of a page"""
+    payload = json.dumps([scheduled_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        scheduled_at, row_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(scheduled_at), UUID(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursorError()
@@ -0,0 +1,205 @@
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from jose import JOSEError, jwk
+from jose import jwt as jose_jwt
+from src.core.cache import TTLCache
+
+SYMMETRIC_ALGORITHMS = ("HS256", "HS384", "HS512")
+
+
+class TokenError(Exception):
+    """Token that failed to decode, verify or validate, whatever the backend"""
+
+
+@dataclass(frozen=True)
+class SigningKeys:
+    """Keys of one token issuer, parsed once at startup.
+
+    Symmetric algorithms use the secret for both directions. Asymmetric ones
+    sign with the key of active_kid and verify with whichever key the kid
+    header names, so retired public keys keep verifying until their tokens
+    expire.
+    """
+
+    algorithm: str
+    signing_key: Any
+    active_kid: str | None = None
+    verification_keys: dict[str | None, Any] = field(default_factory=dict)
+
+
+def load_signing_keys(
+    algorithm: str,
+    secret: str | None = None,
+    keys_dir: str | None = None,
+    active_kid: str | None = None,
+) -> SigningKeys:
+    """Symmetric keys from the secret, asymmetric ones from keys_dir, which
+    holds a <kid>.pem private key per signing key and <kid>.pub.pem public
+    keys of retired ones"""
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        return SigningKeys(
+            algorithm=algorithm,
+            signing_key=secret,
+            verification_keys={None: secret},
+        )
+
+    private_keys = {}
+    verification_keys = {}
+    for path in sorted(Path(keys_dir).glob("*.pem")):
+        if path.name.endswith(".pub.pem"):
+            kid = path.name.removesuffix(".pub.pem")
+            verification_keys[kid] = serialization.load_pem_public_key(
+                path.read_bytes()
+            )
+        else:
+            kid = path.name.removesuffix(".pem")
+            private_keys[kid] = serialization.load_pem_private_key(
+                path.read_bytes(), None
+            )
+            verification_keys[kid] = private_keys[kid].public_key()
+
+    if active_kid not in private_keys:
+        raise ValueError(f"No private key for kid {active_kid!r} in {keys_dir}")
+
+    return SigningKeys(
+        algorithm=algorithm,
+        signing_key=private_keys[active_kid],
+        active_kid=active_kid,
+        verification_keys=verification_keys,
+    )
+
+
+class TokenCodec(ABC):
+    def __init__(self, keys: SigningKeys):
+        self.keys = keys
+
+    @property
+    def headers(self) -> dict | None:
+        return {"kid": self.keys.active_kid} if self.keys.active_kid else None
+
+    @abstractmethod
+    def encode(self, payload: dict) -> str: ...
+
+    @abstractmethod
+    def decode(self, token: str) -> dict: ...
+
+
+class PyJWTCodec(TokenCodec):
+    """PyJWT on the cryptography backend, supports EdDSA and ES256"""
+
+    def encode(self, payload: dict) -> str:
+        return jwt.encode(
+            payload,
+            self.keys.signing_key,
+            algorithm=self.keys.algorithm,
+            headers=self.headers,
+        )
+
+    def decode(self, token: str) -> dict:
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self.keys.verification_keys.get(kid)
+            if key is None:
+                raise TokenError(f"Unknown kid {kid!r}")
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[self.keys.algorithm],
+                options={"verify_aud": False},
+            )
+        except jwt.PyJWTError as e:
+            raise TokenError(str(e)) from e
+
+
+class JoseCodec(TokenCodec):
+    """python-jose, HMAC and ES256 only, keys wrapped as jose keys up front"""
+
+    def __init__(self, keys: SigningKeys):
+        super().__init__(keys)
+        self.signing_key = self._construct(keys.signing_key)
+        self.verification_keys = {
+            kid: self._construct(key) for kid, key in keys.verification_keys.items()
+        }
+
+    def _construct(self, key):
+        if self.keys.algorithm not in SYMMETRIC_ALGORITHMS:
+            encoding = serialization.Encoding.PEM
+            if hasattr(key, "private_bytes"):
+                key = key.private_bytes(
+                    encoding,
+                    serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption(),
+                )
+            else:
+                key = key.public_bytes(
+                    encoding, serialization.PublicFormat.SubjectPublicKeyInfo
+                )
+        return jwk.construct(key, self.keys.algorithm)
+
+    def encode(self, payload: dict) -> str:
+        return jose_jwt.encode(
+            payload,
+            self.signing_key,
+            algorithm=self.keys.algorithm,
+            headers=self.headers,
+        )
+
+    def decode(self, token: str) -> dict:
+        try:
+            kid = jose_jwt.get_unverified_header(token).get("kid")
+            key = self.verification_keys.get(kid)
+            if key is None:
+                raise TokenError(f"Unknown kid {kid!r}")
+            return jose_jwt.decode(
+                token,
+                key,
+                algorithms=[self.keys.algorithm],
+                options={"verify_aud": False},
+            )
+        except JOSEError as e:
+            raise TokenError(str(e)) from e
+
+
+TOKEN_CODECS: dict[str, type[TokenCodec]] = {
+    "pyjwt": PyJWTCodec,
+    "jose": JoseCodec,
+}
+
+
+def build_token_codec(backend: str, keys: SigningKeys) -> TokenCodec:
+    if backend not in TOKEN_CODECS:
+        raise ValueError(f"Unknown token backend {backend!r}")
+    return TOKEN_CODECS[backend](keys)
+
+
+class CachedTokenDecoder:
+    """Remembers verified payloads by token hash until the token expires or
+    the cache TTL runs out, whichever is first. Only the signature check is
+    skipped on a hit, revocation is checked by the caller on every request.
+    """
+
+    def __init__(self, codec: TokenCodec, cache: TTLCache):
+        self.codec = codec
+        self.cache = cache
+
+    def decode(self, token: str) -> dict:
+        token_hash = hashlib.sha256(token.encode()).digest()
+
+        payload = self.cache.get(token_hash)
+        if payload is not None:
+            return payload
+
+        payload = self.codec.decode(token)
+
+        expires_in = payload.get("exp", 0) - time.time()
+        if expires_in > 0:
+            self.cache.set(token_hash, payload, expires_in)
+
+        return payload
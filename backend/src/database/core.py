@@ -1,20 +1,81 @@
+from datetime import datetime, timezone
 from typing import Annotated
+from uuid import uuid4
 from dotenv import load_dotenv
 
 from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 
-from src.core.constants import DATABASE_URL
+from src.core.constants import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_PGBOUNCER,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_PREPARED_STATEMENT_CACHE_SIZE,
+    DB_QUERY_CACHE_SIZE,
+)
+from src.database.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    PoolTelemetry,
+)
 
 load_dotenv()
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+    "query_cache_size": DB_QUERY_CACHE_SIZE,
+}
+
+if DB_PGBOUNCER:
+    ASYNCPG_CONNECT_ARGS = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        # Unnamed statements of one connection may land on another backend
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+else:
+    ASYNCPG_CONNECT_ARGS = {
+        "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE
+    }
+
+# Sync engine, kept for Alembic migrations and test fixtures
+engine = create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+PoolTelemetry("db_sync_pool").attach(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    connect_args=ASYNCPG_CONNECT_ARGS,
+    **POOL_OPTIONS,
+)
+PoolTelemetry("db_pool").attach(async_engine)
+
+# Attributes must stay loaded after commit, lazy refreshes cannot run under asyncio
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, bind=async_engine
+)
+
 Base = declarative_base()
 
+
+def naive_utcnow() -> datetime:
+    """Naive UTC now, asyncpg rejects aware values for TIMESTAMP WITHOUT TIME ZONE"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -22,4 +83,13 @@ def get_db():
     finally:
         db.close()
 
+
 DbSession = Annotated[Session, Depends(get_db)]
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+AsyncDbSession = Annotated[AsyncSession, Depends(get_async_db)]
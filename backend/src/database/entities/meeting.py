@@ -1,13 +1,36 @@
 from datetime import timezone, datetime
 from uuid import uuid4
-from sqlalchemy import Column, DateTime, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, text
+from sqlalchemy import Enum as SQLAlchemyEnum
 from sqlalchemy.dialects.postgresql import UUID
 from src.core.enums import MeetingStatus
 from src.database.core import Base
 
+# Meetings that still occupy the citizen, see ix_meetings_citizen_id_active
+ACTIVE_MEETING_CONDITION = "status NOT IN ('FINISHED', 'CANCELLED')"
+
 
 class Meeting(Base):
     __tablename__ = "meetings"
+    __table_args__ = (
+        # Operator's meeting list, keyset-paginated on (scheduled_at, id)
+        Index(
+            "ix_meetings_operator_id_scheduled_at", "operator_id", "scheduled_at", "id"
+        ),
+        # At most one meeting per citizen that is not finished or cancelled
+        Index(
+            "ix_meetings_citizen_id_active",
+            "citizen_id",
+            unique=True,
+            postgresql_where=text(ACTIVE_MEETING_CONDITION),
+        ),
+        # Upcoming active meetings of every operator, for the citizen prefetch
+        Index(
+            "ix_meetings_scheduled_at_active",
+            "scheduled_at",
+            postgresql_where=text(ACTIVE_MEETING_CONDITION),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, nullable=False)
     operator_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -21,3 +44,6 @@ class Meeting(Base):
     created_at = Column(
         DateTime(timezone=True), nullable=False, default=datetime.now(timezone.utc)
     )
+    # Bumped by every status transition, which only applies to the version it
+    # read, see src/modules/meetings/transitions.py
+    version = Column(Integer, nullable=False, server_default="1")
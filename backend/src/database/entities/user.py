@@ -1,11 +1,10 @@
-from datetime import datetime, timezone
 from uuid import uuid4
 
 from sqlalchemy import Column, DateTime, String, Enum as SQLAlchemyEnum
 from sqlalchemy.dialects.postgresql import UUID
 
 from src.core.enums import UserRole
-from src.database.core import Base
+from src.database.core import Base, naive_utcnow
 
 
 class User(Base):
@@ -18,5 +17,5 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     role = Column(SQLAlchemyEnum(UserRole, name="user_role"), nullable=False)
     last_login_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, nullable=False, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, nullable=False, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, nullable=False, default=naive_utcnow)
+    updated_at = Column(DateTime, nullable=False, default=naive_utcnow)
@@ -0,0 +1,108 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from src.core.metrics import Counters, LatencyHistograms, register_collector
+
+CHECKOUT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+CONNECTION_LIFETIME_BUCKETS = (60, 300, 900, 1800, 3600, 4 * 3600)
+
+
+class PoolTelemetry:
+    """Checkout latency, waits, overflow use and connection lifetimes of one
+    engine's pool, fed by the instrumented pool and the engine's pool events.
+    Reported on /metrics under name, if given"""
+
+    def __init__(self, name: str | None = None):
+        self.counters = Counters(
+            "checkouts", "waits", "wait_timeouts", "connects", "invalidations"
+        )
+        self.checkout_latency = LatencyHistograms(CHECKOUT_LATENCY_BUCKETS)
+        self.connection_lifetimes = LatencyHistograms(CONNECTION_LIFETIME_BUCKETS)
+        self.peak_overflow = 0
+        self.engine = None
+        if name:
+            register_collector(name, self.snapshot)
+
+    def attach(self, engine) -> None:
+        # Pool events of an async engine are dispatched by its sync engine
+        engine = getattr(engine, "sync_engine", engine)
+        self.engine = engine
+        engine.pool.telemetry = self
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.counters.inc("connects")
+        connection_record.info["connected_at"] = time.monotonic()
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        connected_at = connection_record.info.pop("connected_at", None)
+        if connected_at is not None:
+            self.connection_lifetimes.observe("closed", time.monotonic() - connected_at)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.counters.inc("invalidations")
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine else None
+        state = {}
+        if isinstance(pool, QueuePool):
+            state = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "peak_overflow": self.peak_overflow,
+                "compiled_cache": len(self.engine._compiled_cache or ()),
+            }
+        return {
+            **state,
+            **self.counters.snapshot(),
+            "checkout_latency": self.checkout_latency.snapshot(),
+            "connection_lifetime": self.connection_lifetimes.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """Queue pool timing every checkout into the telemetry attached to it"""
+
+    telemetry: PoolTelemetry | None = None
+
+    def _do_get(self):
+        telemetry = self.telemetry
+        if telemetry is None:
+            return super()._do_get()
+
+        # Every connection is out and no overflow is left, this one waits
+        saturated = self.checkedin() == 0 and (
+            self._max_overflow > -1 and self.overflow() >= self._max_overflow
+        )
+        if saturated:
+            telemetry.counters.inc("waits")
+
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            telemetry.counters.inc("wait_timeouts")
+            telemetry.checkout_latency.observe("timeout", time.perf_counter() - start)
+            raise
+
+        telemetry.counters.inc("checkouts")
+        telemetry.checkout_latency.observe(
+            "waited" if saturated else "ok", time.perf_counter() - start
+        )
+        telemetry.peak_overflow = max(telemetry.peak_overflow, self.overflow())
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,232 @@
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, List, TypeVar
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from src.core.constants import (
+    DATABASE_REPLICA_URLS,
+    DB_REPLICA_CHECK_INTERVAL_SECONDS,
+    DB_REPLICA_MAX_LAG_SECONDS,
+)
+from src.core.enums import RedisKeys
+from src.core.logging import logger
+from src.core.metrics import Counters, register_collector
+from src.core.redis import RedisClient, get_redis_value, set_redis_value
+from src.database.core import ASYNCPG_CONNECT_ARGS, POOL_OPTIONS
+from src.database.pool import InstrumentedAsyncQueuePool, PoolTelemetry
+
+T = TypeVar("T")
+
+# Seconds the replica is behind the primary, a primary answers 0. A replica
+# that has replayed all the WAL it received counts as current only while its
+# WAL receiver is streaming and heard from the primary within the max lag,
+# otherwise an idle primary would make its replicas look further and further
+# behind. Failing that, the lag is the age of the last replayed transaction.
+# Reading the receiver's status takes pg_read_all_stats (e.g. pg_monitor),
+# without it replicas of an idle primary drop out of rotation
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() AND EXISTS ("
+    "  SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'"
+    "  AND last_msg_receipt_time > now() - make_interval(secs => :max_lag)"
+    " ) THEN 0"
+    " ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())"
+    " END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_async_engine(
+            url.replace("postgresql://", "postgresql+asyncpg://", 1),
+            poolclass=InstrumentedAsyncQueuePool,
+            connect_args=ASYNCPG_CONNECT_ARGS,
+            **POOL_OPTIONS,
+        )
+        self.telemetry = PoolTelemetry(f"{name}_pool")
+        self.telemetry.attach(self.engine)
+        self.sessionmaker = async_sessionmaker(
+            autoflush=False, expire_on_commit=False, bind=self.engine
+        )
+        # Wall clock time the replica had replayed up to at its last check,
+        # None while it is unreachable or not checked yet
+        self.replayed_at: float | None = None
+
+    def mark_down(self) -> None:
+        self.replayed_at = None
+
+
+class ReadRouter:
+    """Sends read-only queries to the replicas in rotation.
+
+    A replica is picked only if it had replayed everything committed before
+    the reader's horizon: max lag ago, or the reader's own last write if that
+    is later. Replicas are checked in the background, between checks their
+    recorded position only ages, so the choice errs towards the primary.
+    """
+
+    def __init__(self, urls: List[str], max_lag_seconds: float):
+        self.replicas = [
+            Replica(f"db_replica_{index}", url) for index, url in enumerate(urls)
+        ]
+        self.max_lag_seconds = max_lag_seconds
+        self.counters = Counters(
+            "replica_reads", "primary_reads", "fallbacks", "check_failures"
+        )
+        self._next = 0
+
+    def pick(self, written_at: float | None = None) -> Replica | None:
+        horizon = time.time() - self.max_lag_seconds
+        if written_at:
+            horizon = max(horizon, written_at)
+
+        for offset in range(len(self.replicas)):
+            index = (self._next + offset) % len(self.replicas)
+            replica = self.replicas[index]
+            if replica.replayed_at is not None and replica.replayed_at >= horizon:
+                self._next = index + 1
+                return replica
+        return None
+
+    async def read(
+        self,
+        primary: AsyncSession,
+        query: Callable[[AsyncSession], Awaitable[T]],
+        written_at: float | None = None,
+    ) -> T:
+        """Runs the query on a replica, or on the primary session when none
+        is current enough or the replica fails to answer"""
+        replica = self.pick(written_at)
+        if replica is None:
+            self.counters.inc("primary_reads")
+            return await query(primary)
+
+        try:
+            async with replica.sessionmaker() as db:
+                result = await query(db)
+        except (DBAPIError, OSError) as e:
+            logger.warning(f"Read on {replica.name} failed, using the primary: {e}")
+            replica.mark_down()
+            self.counters.inc("fallbacks")
+            return await query(primary)
+
+        self.counters.inc("replica_reads")
+        return result
+
+    async def check(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        checked_at = time.time()
+        try:
+            async with asyncio.timeout(DB_REPLICA_CHECK_INTERVAL_SECONDS):
+                async with replica.engine.connect() as connection:
+                    lag = await connection.scalar(
+                        LAG_QUERY, {"max_lag": self.max_lag_seconds}
+                    )
+        except (DBAPIError, OSError, TimeoutError) as e:
+            if replica.replayed_at is not None:
+                logger.warning(f"{replica.name} is unavailable: {e}")
+            replica.mark_down()
+            self.counters.inc("check_failures")
+            return
+
+        # No transaction replayed yet, the position is unknown
+        replica.replayed_at = None if lag is None else checked_at - float(lag)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            **self.counters.snapshot(),
+            "replicas": {
+                replica.name: (
+                    None
+                    if replica.replayed_at is None
+                    else round(now - replica.replayed_at, 3)
+                )
+                for replica in self.replicas
+            },
+        }
+
+
+read_router = ReadRouter(DATABASE_REPLICA_URLS, DB_REPLICA_MAX_LAG_SECONDS)
+register_collector("db_replicas", read_router.stats)
+
+_monitor: asyncio.Task | None = None
+
+
+async def mark_write(redis_client: RedisClient, principal_id: UUID) -> None:
+    """Records a committed write of the user, shared by every worker, so their
+    next reads wait for the replicas to replay it"""
+    if not read_router.replicas:
+        return
+    # Past the max lag every replica still in rotation has the write
+    await set_redis_value(
+        redis_client,
+        RedisKeys.LAST_WRITE,
+        str(principal_id),
+        repr(time.time()),
+        math.ceil(DB_REPLICA_MAX_LAG_SECONDS) + 1,
+    )
+
+
+async def read_for(
+    primary: AsyncSession,
+    redis_client: RedisClient,
+    principal_id: UUID,
+    query: Callable[[AsyncSession], Awaitable[T]],
+) -> T:
+    """Runs a read-only query of the user where it sees their own writes"""
+    if not read_router.replicas:
+        return await query(primary)
+
+    written_at = await get_redis_value(
+        redis_client, RedisKeys.LAST_WRITE, str(principal_id)
+    )
+    return await read_router.read(
+        primary, query, float(written_at) if written_at else None
+    )
+
+
+async def _run() -> None:
+    while True:
+        try:
+            await read_router.check()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Replica check failed: {e}")
+        await asyncio.sleep(DB_REPLICA_CHECK_INTERVAL_SECONDS)
+
+
+def start_replica_monitor() -> None:
+    """Track replica lag in a background task of this worker"""
+    global _monitor
+
+    if _monitor or not read_router.replicas:
+        return
+
+    _monitor = asyncio.create_task(_run())
+
+
+async def stop_replica_monitor() -> None:
+    global _monitor
+
+    if _monitor:
+        _monitor.cancel()
+        try:
+            await _monitor
+        except asyncio.CancelledError:
+            pass
+        _monitor = None
+    await read_router.dispose()
@@ -1,10 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from src.core.pubsub import start_listener, stop_listener
+from src.core.utils.auth import calibrate_password_policy
+from src.database.replicas import start_replica_monitor, stop_replica_monitor
 from src.modules.auth.controller import router as auth_router
+from src.modules.auth.service import password_pool
+from src.modules.citizens.asan_service import asan_service
 from src.modules.citizens.controller import router as citizens_router
+from src.modules.citizens.prefetch import start_prefetcher, stop_prefetcher
 from src.modules.meetings.controller import router as meetings_router
+from src.modules.metrics.controller import router as metrics_router
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    asan_service.check_configured()
+    calibrate_password_policy()
+    await start_listener()
+    start_replica_monitor()
+    start_prefetcher()
+    yield
+    await stop_prefetcher()
+    await stop_replica_monitor()
+    await stop_listener()
+    password_pool.shutdown()
+    await asan_service.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(auth_router)
 app.include_router(citizens_router)
 app.include_router(meetings_router)
+app.include_router(metrics_router)
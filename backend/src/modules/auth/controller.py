@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Response
+from typing import Annotated
+from fastapi import APIRouter, Query, Response
 from starlette.status import HTTP_204_NO_CONTENT
 
 from src.modules.auth.service import AuthServiceDep, BearerToken
@@ -13,21 +14,25 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/login", response_model=AuthResponse)
-def login(request: LoginRequest, auth_service: AuthServiceDep):
-    return auth_service.login_user(request)
+async def login(request: LoginRequest, auth_service: AuthServiceDep):
+    return await auth_service.login_user(request)
 
 
 @router.post("/register", response_model=AuthResponse)
-def register(request: RegisterRequest, auth_service: AuthServiceDep):
-    return auth_service.register_user(request)
+async def register(request: RegisterRequest, auth_service: AuthServiceDep):
+    return await auth_service.register_user(request)
 
 
 @router.post("/refresh", response_model=AuthResponse)
-def refresh(request: RefreshRequest, auth_service: AuthServiceDep):
-    return auth_service.refresh_user_session(request)
+async def refresh(request: RefreshRequest, auth_service: AuthServiceDep):
+    return await auth_service.refresh_user_session(request)
 
 
 @router.post("/logout", status_code=HTTP_204_NO_CONTENT)
-def logout(auth_service: AuthServiceDep, bearer_token: BearerToken):
-    auth_service.logout_user(bearer_token)
+async def logout(
+    auth_service: AuthServiceDep,
+    bearer_token: BearerToken,
+    all_devices: Annotated[bool, Query(alias="allDevices")] = False,
+):
+    await auth_service.logout_user(bearer_token, all_devices)
     return Response(status_code=HTTP_204_NO_CONTENT)
@@ -1,10 +1,22 @@
-from datetime import datetime, timezone
 from typing import Annotated
 from uuid import UUID
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer
-from src.core.enums import RedisKeys, UserRole
-from src.core.redis import RedisClient, get_redis_value
+from sqlalchemy import select
+from src.core.cache import TTLCache
+from src.core.constants import (
+    PASSWORD_POOL_MAX_PENDING,
+    PASSWORD_POOL_WORKERS,
+    USER_CACHE_MAX_SIZE,
+    USER_CACHE_TTL_SECONDS,
+)
+from src.core.enums import RedisChannels, UserRole
+from src.core.metrics import register_collector
+from src.core.process_pool import BoundedProcessPool
+from src.core.pubsub import subscribe
+from src.core.redis import RedisClient
+from src.core.domain.principal import Principal
+from src.core.domain.user import UserDomain
 from src.modules.auth.model import (
     AuthResponse,
     LoginRequest,
@@ -12,8 +24,9 @@ from src.modules.auth.model import (
     RegisterRequest,
 )
 
-from src.database.core import DbSession
+from src.database.core import AsyncDbSession, naive_utcnow
 from src.database.entities.user import User
+from src.database.replicas import mark_write, read_for
 from src.core.exceptions import (
     AuthenticationError,
     UserAlreadyExistsError,
@@ -22,40 +35,72 @@ from src.core.exceptions import (
 
 from src.core.utils.auth import (
     delete_session,
+    get_refresh_session,
+    session_exists,
     verify_password,
     decode_jwt,
     set_session,
     get_password_hash,
+    get_password_policy,
 )
 
 BearerToken = Annotated[str, Depends(HTTPBearer())]
 
+# Resolved users keyed by (user id, session id), evicted on every worker
+# through pub/sub whenever a session of the user is created or deleted
+user_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(user_id: str) -> None:
+    user_cache.delete_where(lambda key: key[0] == UUID(user_id))
+
+
+subscribe(RedisChannels.USER_INVALIDATION, invalidate_cached_user)
+register_collector("user_cache", user_cache.stats)
+
+# bcrypt holds a core for the whole hash, so it runs outside the event loop
+# process and away from the threadpool that sync routes share
+password_pool = BoundedProcessPool(PASSWORD_POOL_WORKERS, PASSWORD_POOL_MAX_PENDING)
+register_collector("password_pool", password_pool.stats)
+
 
 class AuthService:
 
-    def __init__(self, db: DbSession, redis_client: RedisClient):
+    def __init__(self, db: AsyncDbSession, redis_client: RedisClient):
         self.db = db
         self.redis_client = redis_client
 
-    def login_user(self, request: LoginRequest) -> AuthResponse:
-        user = self.db.query(User).filter(User.username == request.username).first()
+    async def login_user(self, request: LoginRequest) -> AuthResponse:
+        user = await self.db.scalar(
+            select(User).where(User.username == request.username)
+        )
         if not user:
             raise AuthenticationError()
 
-        if not verify_password(request.password, user.password_hash):
+        verified, new_password_hash = await password_pool.run(
+            verify_password, request.password, user.password_hash, get_password_policy()
+        )
+        if not verified:
             raise AuthenticationError()
 
-        auth_response = set_session(user, self.redis_client)
-        user.last_login_at = datetime.now(timezone.utc)
-        self.db.commit()
+        auth_response = await set_session(user, self.redis_client)
+        if new_password_hash:
+            user.password_hash = new_password_hash
+        user.last_login_at = naive_utcnow()
+        await self.db.commit()
+        await mark_write(self.redis_client, user.id)
         return auth_response
 
-    def register_user(self, request: RegisterRequest) -> AuthResponse:
-        user = self.db.query(User).filter(User.username == request.username).first()
+    async def register_user(self, request: RegisterRequest) -> AuthResponse:
+        user = await self.db.scalar(
+            select(User).where(User.username == request.username)
+        )
         if user:
             raise UserAlreadyExistsError()
 
-        password_hash = get_password_hash(request.password)
+        password_hash = await password_pool.run(
+            get_password_hash, request.password, get_password_policy()
+        )
         new_user = User(
             username=request.username,
             password_hash=password_hash,
@@ -65,60 +110,117 @@ class AuthService:
         )
 
         self.db.add(new_user)
-        self.db.commit()
-        self.db.refresh(new_user)
+        await self.db.commit()
+        await mark_write(self.redis_client, new_user.id)
 
-        auth_response = set_session(new_user, self.redis_client)
+        auth_response = await set_session(new_user, self.redis_client)
         return auth_response
 
-    def refresh_user_session(self, request: RefreshRequest) -> AuthResponse:
+    async def refresh_user_session(self, request: RefreshRequest) -> AuthResponse:
 
-        user_id = get_redis_value(
-            self.redis_client, RedisKeys.REFRESH_TOKEN, request.refresh_token
+        refresh_session = await get_refresh_session(
+            request.refresh_token, self.redis_client
         )
 
-        if not user_id:
+        if not refresh_session:
             raise AuthenticationError()
 
-        user = self.db.query(User).filter(User.id == UUID(user_id)).first()
+        user_id, session_id = refresh_session
+
+        user = await read_for(
+            self.db,
+            self.redis_client,
+            user_id,
+            lambda db: db.scalar(select(User).where(User.id == user_id)),
+        )
         if not user:
             raise UserNotFoundError()
 
-        auth_response = set_session(user, self.redis_client)
+        auth_response = await set_session(
+            user,
+            self.redis_client,
+            session_id=session_id,
+            current_refresh_token=request.refresh_token,
+        )
         return auth_response
 
-    def logout_user(self, bearer_token: BearerToken) -> bool:
-        user_session = decode_jwt(bearer_token.credentials)
+    async def logout_user(
+        self, bearer_token: BearerToken, all_devices: bool = False
+    ) -> bool:
+        principal = await self.get_principal(bearer_token)
+        return await delete_session(
+            principal.id,
+            self.redis_client,
+            session_id=None if all_devices else principal.session_id,
+        )
+
+    async def get_principal(self, bearer_token: BearerToken) -> Principal:
+        token_payload = decode_jwt(bearer_token.credentials)
 
-        if not user_session:
+        if "sid" not in token_payload:
             raise AuthenticationError()
 
-        user = self.db.query(User).filter(User.id == UUID(user_session["sub"])).first()
+        principal = Principal(
+            id=UUID(token_payload["sub"]),
+            username=token_payload["username"],
+            role=token_payload["role"],
+            session_id=token_payload["sid"],
+        )
 
-        if not user:
-            raise UserNotFoundError()
+        if not await session_exists(
+            principal.id, principal.session_id, self.redis_client
+        ):
+            raise AuthenticationError()
 
-        return delete_session(user.id, self.redis_client)
+        return principal
 
-    def get_current_user(self, bearer_token: BearerToken) -> User:
-        token_payload = decode_jwt(bearer_token.credentials)
-        user_id = UUID(token_payload["sub"])
+    async def get_current_user(self, bearer_token: BearerToken) -> UserDomain:
+        principal = await self.get_principal(bearer_token)
+        cache_key = (principal.id, principal.session_id)
 
-        user = self.db.query(User).filter(User.id == user_id).first()
+        cached_user = user_cache.get(cache_key)
+        if cached_user:
+            return cached_user
+
+        user = await read_for(
+            self.db,
+            self.redis_client,
+            principal.id,
+            lambda db: db.scalar(select(User).where(User.id == principal.id)),
+        )
         if not user:
             raise UserNotFoundError()
-        return user
 
-    def get_operator_user(self, bearer_token: BearerToken) -> User:
-        user = self.get_current_user(bearer_token)
+        user_domain = UserDomain.model_validate(user)
+        user_cache.set(cache_key, user_domain)
+        return user_domain
+
+    async def get_operator_principal(self, bearer_token: BearerToken) -> Principal:
+        principal = await self.get_principal(bearer_token)
+        if principal.role != UserRole.OPERATOR:
+            raise HTTPException(
+                status_code=403, detail="Only operators can access this resource"
+            )
+        return principal
+
+    async def get_admin_principal(self, bearer_token: BearerToken) -> Principal:
+        principal = await self.get_principal(bearer_token)
+        if principal.role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=403, detail="Only admins can access this resource"
+            )
+        return principal
+
+    async def get_operator_user(self, bearer_token: BearerToken) -> UserDomain:
+        user = await self.get_current_user(bearer_token)
         if user.role != UserRole.OPERATOR:
             raise HTTPException(
                 status_code=403, detail="Only operators can access this resource"
             )
         return user
 
-    def get_admin_user(self, bearer_token: BearerToken) -> User:
-        user = self.get_current_user(bearer_token)
+    async def get_admin_user(self, bearer_token: BearerToken) -> UserDomain:
+        user = await self.get_current_user(bearer_token)
         if user.role != UserRole.ADMIN:
             raise HTTPException(
                 status_code=403, detail="Only admins can access this resource"
@@ -126,26 +228,44 @@ class AuthService:
         return user
 
 
-def get_auth_service(db: DbSession, redis_client: RedisClient) -> AuthService:
+def get_auth_service(db: AsyncDbSession, redis_client: RedisClient) -> AuthService:
     return AuthService(db, redis_client)
 
 
 AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
 
 
-def get_operator_user_dependency(
+async def get_operator_user_dependency(
+    auth_service: AuthServiceDep, bearer_token: BearerToken
+) -> UserDomain:
+    return await auth_service.get_operator_user(bearer_token)
+
+
+GetOperatorUser = Annotated[UserDomain, Depends(get_operator_user_dependency)]
+
+
+async def get_admin_user_dependency(
+    auth_service: AuthServiceDep, bearer_token: BearerToken
+) -> UserDomain:
+    return await auth_service.get_admin_user(bearer_token)
+
+
+GetAdminUser = Annotated[UserDomain, Depends(get_admin_user_dependency)]
+
+
+async def get_operator_principal_dependency(
     auth_service: AuthServiceDep, bearer_token: BearerToken
-) -> User:
-    return auth_service.get_operator_user(bearer_token)
+) -> Principal:
+    return await auth_service.get_operator_principal(bearer_token)
 
 
-GetOperatorUser = Annotated[User, Depends(get_operator_user_dependency)]
+GetOperatorPrincipal = Annotated[Principal, Depends(get_operator_principal_dependency)]
 
 
-def get_admin_user_dependency(
+async def get_admin_principal_dependency(
     auth_service: AuthServiceDep, bearer_token: BearerToken
-) -> User:
-    return auth_service.get_admin_user(bearer_token)
+) -> Principal:
+    return await auth_service.get_admin_principal(bearer_token)
 
 
-GetAdminUser = Annotated[User, Depends(get_admin_user_dependency)]
+GetAdminPrincipal = Annotated[Principal, Depends(get_admin_principal_dependency)]
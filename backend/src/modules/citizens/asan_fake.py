@@ -0,0 +1,62 @@
+"""Local stand-in for the ASAN citizen registry.
+
+Serves in-process in tests, which can slow it down or make it fail. Runs
+standalone for local development, with ASAN_BASE_URL pointed at it:
+
+    uvicorn src.modules.citizens.asan_fake:app --port 8090
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Response, status
+from src.core.constants import ASAN_FAKE_LATENCY_SECONDS
+from src.core.domain.citizen import CitizenDomain
+
+FAKE_CITIZENS = {
+    "2dnxyd8": CitizenDomain(
+        pin_code="2DNXYD8",
+        first_name="Ahmad",
+        last_name="Jafarov",
+        patronymic="Roman",
+        document_number="AA1234567",
+        address_line="Azerbaijan, Baku",
+        date_of_birth=datetime(2002, 3, 12, tzinfo=timezone.utc),
+    )
+}
+
+
+class FakeAsan:
+    def __init__(
+        self,
+        latency: float = ASAN_FAKE_LATENCY_SECONDS,
+        citizens: dict[str, CitizenDomain] = FAKE_CITIZENS,
+    ):
+        self.latency = latency
+        self.citizens = citizens
+        # The next `failures` requests answer failure_status
+        self.failures = 0
+        self.failure_status = status.HTTP_503_SERVICE_UNAVAILABLE
+        self.calls = 0
+        self.app = FastAPI()
+        self.app.add_api_route("/citizens/{pin_code}", self.get_citizen)
+
+    async def get_citizen(self, pin_code: str, response: Response):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+        if self.failures:
+            self.failures -= 1
+            response.status_code = self.failure_status
+            return None
+
+        citizen = self.citizens.get(pin_code.lower())
+        if citizen is None:
+            response.status_code = status.HTTP_404_NOT_FOUND
+            return None
+
+        return citizen
+
+
+fake_asan = FakeAsan()
+app = fake_asan.app
@@ -1,37 +1,182 @@
 import asyncio
-from datetime import datetime, timezone
+import random
+import time
 from typing import Annotated
 
+import httpx
 from fastapi import Depends
-from src.core.exceptions import CitizenNotFoundError
+from pydantic import ValidationError
+from src.core.circuit_breaker import CircuitBreaker
+from src.core.constants import (
+    ASAN_BASE_URL,
+    ASAN_CIRCUIT_FAILURE_THRESHOLD,
+    ASAN_CIRCUIT_RESET_SECONDS,
+    ASAN_DEADLINE_SECONDS,
+    ASAN_KEEPALIVE_SECONDS,
+    ASAN_MAX_CONNECTIONS,
+    ASAN_MAX_KEEPALIVE_CONNECTIONS,
+    ASAN_MAX_RETRIES,
+    ASAN_RETRY_BACKOFF_MAX_SECONDS,
+    ASAN_RETRY_BACKOFF_SECONDS,
+    ASAN_TIMEOUT_SECONDS,
+)
+from src.core.exceptions import CitizenNotFoundError, UpstreamUnavailableError
 from src.core.domain.citizen import CitizenDomain
+from src.core.logging import logger
+from src.core.metrics import LatencyHistograms, register_collector
+
+ASAN_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AsanAttemptError(Exception):
+    """Failed attempt, retried unless upstream rejected the request itself.
+    Only attempts that found upstream down count towards opening the circuit,
+    not answers to a bad request."""
+
+    def __init__(
+        self, outcome: str, retryable: bool = True, upstream_down: bool = True
+    ):
+        super().__init__(outcome)
+        self.outcome = outcome
+        self.retryable = retryable
+        self.upstream_down = upstream_down
 
 
 class AsanService:
-    def __init__(self):
-        pass
+    """Client of the ASAN citizen registry, shared by every request.
+
+    Connections are pooled and kept alive for the lifetime of the app. Each
+    attempt has its own timeout and the call as a whole a deadline, failed
+    attempts are retried with full jitter backoff, and a circuit breaker
+    rejects calls outright while upstream keeps failing.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = ASAN_BASE_URL,
+        transport: httpx.AsyncBaseTransport | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.base_url = base_url
+        self.transport = transport
+        self.breaker = breaker or CircuitBreaker(
+            ASAN_CIRCUIT_FAILURE_THRESHOLD, ASAN_CIRCUIT_RESET_SECONDS
+        )
+        self.latencies = LatencyHistograms(ASAN_LATENCY_BUCKETS)
+        self.retries = 0
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                transport=self.transport,
+                timeout=ASAN_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=ASAN_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASAN_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=ASAN_KEEPALIVE_SECONDS,
+                ),
+            )
+        return self._client
+
+    def check_configured(self) -> None:
+        """Refuses to start without a registry to ask"""
+        if not self.base_url:
+            raise RuntimeError("ASAN_BASE_URL is not set")
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def get_citizen(self, pin_code: str) -> CitizenDomain:
+        deadline = time.monotonic() + ASAN_DEADLINE_SECONDS
 
-        # dummy sleep
-        await asyncio.sleep(1)
+        for attempt in range(ASAN_MAX_RETRIES + 1):
+            if not self.breaker.allow():
+                self.latencies.observe("rejected", 0)
+                raise UpstreamUnavailableError()
 
-        if pin_code != "2dnxyd8":
+            start = time.monotonic()
+            try:
+                citizen = await self._attempt(pin_code, deadline - start)
+            except AsanAttemptError as e:
+                if e.upstream_down:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                self.latencies.observe(e.outcome, time.monotonic() - start)
+                logger.warning(f"ASAN attempt {attempt + 1} failed: {e.outcome}")
+                if not e.retryable:
+                    break
+            except CitizenNotFoundError:
+                self.breaker.record_success()
+                self.latencies.observe("not_found", time.monotonic() - start)
+                raise
+            else:
+                self.breaker.record_success()
+                self.latencies.observe("ok", time.monotonic() - start)
+                return citizen
+
+            backoff = random.uniform(
+                0,
+                min(
+                    ASAN_RETRY_BACKOFF_MAX_SECONDS,
+                    ASAN_RETRY_BACKOFF_SECONDS * 2**attempt,
+                ),
+            )
+            if attempt == ASAN_MAX_RETRIES or time.monotonic() + backoff >= deadline:
+                break
+
+            self.retries += 1
+            await asyncio.sleep(backoff)
+
+        raise UpstreamUnavailableError()
+
+    async def _attempt(self, pin_code: str, remaining: float) -> CitizenDomain:
+        try:
+            async with asyncio.timeout(min(ASAN_TIMEOUT_SECONDS, remaining)):
+                response = await self.client.get(f"/citizens/{pin_code}")
+        except (TimeoutError, httpx.TimeoutException):
+            raise AsanAttemptError("timeout")
+        except httpx.TransportError:
+            raise AsanAttemptError("connection_error")
+
+        if response.status_code == 404:
             raise CitizenNotFoundError()
 
-        return CitizenDomain(
-            pin_code="2DNXYD8",
-            first_name="Ahmad",
-            last_name="Jafarov",
-            patronymic="Roman",
-            document_number="AA1234567",
-            address_line="Azerbaijan, Baku",
-            date_of_birth=datetime(2002, 3, 12, tzinfo=timezone.utc),
-        )
+        if response.status_code != 200:
+            raise AsanAttemptError(
+                f"http_{response.status_code}",
+                retryable=response.status_code in RETRYABLE_STATUS_CODES,
+                upstream_down=response.status_code >= 500,
+            )
+
+        try:
+            return CitizenDomain.model_validate_json(response.content)
+        except ValidationError:
+            raise AsanAttemptError(
+                "invalid_response", retryable=False, upstream_down=False
+            )
+
+    def stats(self) -> dict:
+        return {
+            "circuit": self.breaker.stats(),
+            "retries": self.retries,
+            "latency": self.latencies.snapshot(),
+        }
+
+
+asan_service = AsanService()
+register_collector("asan", asan_service.stats)
 
 
 def get_asan_service() -> AsanService:
-    return AsanService()
+    return asan_service
 
 
 AsanServiceDep = Annotated[AsanService, Depends(get_asan_service)]
@@ -0,0 +1,113 @@
+import time
+from typing import Dict, List
+
+from src.core.cache import TTLCache
+from src.core.constants import (
+    CITIZEN_EXPIRE_SECONDS,
+    CITIZEN_FRESH_SECONDS,
+    CITIZEN_L1_MAX_SIZE,
+    CITIZEN_L1_TTL_SECONDS,
+    CITIZEN_NOT_FOUND_EXPIRE_SECONDS,
+)
+from src.core.domain.citizen import CitizenDomain
+from src.core.enums import RedisChannels, RedisKeys
+from src.core.metrics import register_collector
+from src.core.pubsub import publish, subscribe
+from src.core.redis import (
+    RedisClient,
+    get_redis_object,
+    get_redis_objects,
+    set_redis_object,
+)
+from src.modules.citizens.model import CitizenRedisData
+
+# L1: parsed entries of this worker, dropped on every worker through pub/sub
+# whenever an entry is rewritten in Redis (L2)
+citizen_l1 = TTLCache(CITIZEN_L1_MAX_SIZE, CITIZEN_L1_TTL_SECONDS)
+
+subscribe(RedisChannels.CITIZEN_INVALIDATION, citizen_l1.delete)
+register_collector("citizen_l1", citizen_l1.stats)
+
+
+class CitizenCache:
+    """Citizens cached in Redis with a soft (fresh) and a hard (expire) TTL"""
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+
+    async def get(self, pin_code: str) -> CitizenRedisData | None:
+        pin_code = pin_code.lower()
+
+        citizen_redis = citizen_l1.get(pin_code)
+        if citizen_redis:
+            return citizen_redis
+
+        citizen_redis = await get_redis_object(
+            self.redis_client, RedisKeys.CITIZEN, pin_code, CitizenRedisData
+        )
+
+        return self._load(pin_code, citizen_redis)
+
+    async def get_many(self, pin_codes: List[str]) -> Dict[str, CitizenRedisData]:
+        """Like get for several PINs with one MGET, keyed by lower-cased PIN"""
+        citizens = {}
+        missing = []
+        for pin_code in {pin_code.lower() for pin_code in pin_codes}:
+            citizen_redis = citizen_l1.get(pin_code)
+            if citizen_redis:
+                citizens[pin_code] = citizen_redis
+            else:
+                missing.append(pin_code)
+
+        cached_citizens = await get_redis_objects(
+            self.redis_client, RedisKeys.CITIZEN, missing, CitizenRedisData
+        )
+
+        for pin_code, citizen_redis in zip(missing, cached_citizens):
+            citizen_redis = self._load(pin_code, citizen_redis)
+            if citizen_redis:
+                citizens[pin_code] = citizen_redis
+
+        return citizens
+
+    def _load(
+        self, pin_code: str, citizen_redis: CitizenRedisData | None
+    ) -> CitizenRedisData | None:
+        # Missing, or unreadable like entries of an older release without TTL
+        # metadata, which are refetched
+        if not citizen_redis:
+            return None
+
+        # Only fresh entries go to L1, stale ones must keep reaching the
+        # refresh path, and fresh_until never outlives the Redis TTL
+        fresh_seconds = citizen_redis.fresh_until - time.time()
+        if fresh_seconds > 0:
+            citizen_l1.set(pin_code, citizen_redis, fresh_seconds)
+
+        return citizen_redis
+
+    async def set(self, pin_code: str, citizen: CitizenDomain) -> None:
+        citizen_redis = CitizenRedisData(
+            citizen=citizen, fresh_until=time.time() + CITIZEN_FRESH_SECONDS
+        )
+
+        await self._write(pin_code, citizen_redis, CITIZEN_EXPIRE_SECONDS)
+
+    async def set_not_found(self, pin_code: str) -> None:
+        citizen_redis = CitizenRedisData(
+            fresh_until=time.time() + CITIZEN_NOT_FOUND_EXPIRE_SECONDS
+        )
+
+        await self._write(pin_code, citizen_redis, CITIZEN_NOT_FOUND_EXPIRE_SECONDS)
+
+    async def _write(
+        self, pin_code: str, citizen_redis: CitizenRedisData, expire: int
+    ) -> None:
+        pin_code = pin_code.lower()
+
+        await set_redis_object(
+            self.redis_client, RedisKeys.CITIZEN, pin_code, citizen_redis, expire
+        )
+
+        citizen_l1.delete(pin_code)
+        await publish(self.redis_client, RedisChannels.CITIZEN_INVALIDATION, pin_code)
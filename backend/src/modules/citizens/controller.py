@@ -1,6 +1,11 @@
 from fastapi import APIRouter
-from src.modules.auth.service import GetOperatorUser
-from src.modules.citizens.model import PinCodePath, CitizenResponse
+from src.modules.auth.service import GetOperatorPrincipal
+from src.modules.citizens.model import (
+    CitizenBatchRequest,
+    CitizenBatchResponse,
+    PinCodePath,
+    CitizenResponse,
+)
 from src.modules.citizens.service import CitizenServiceDep
 
 router = APIRouter(prefix="/citizens", tags=["Citizens"])
@@ -10,7 +15,17 @@ router = APIRouter(prefix="/citizens", tags=["Citizens"])
 async def get_citizen(
     pin_code: PinCodePath,
     citizen_service: CitizenServiceDep,
-    current_user: GetOperatorUser,
+    current_user: GetOperatorPrincipal,
 ) -> CitizenResponse:
 
     return await citizen_service.get_citizen(pin_code)
+
+
+@router.post("/batch", response_model=CitizenBatchResponse)
+async def get_citizens(
+    request: CitizenBatchRequest,
+    citizen_service: CitizenServiceDep,
+    current_user: GetOperatorPrincipal,
+) -> CitizenBatchResponse:
+
+    return await citizen_service.get_citizens(request.pin_codes)
@@ -1,13 +1,18 @@
+import time
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Dict, List
 from fastapi import Path
-from pydantic import Field
+from pydantic import BaseModel, Field
 from src.core.base_model import CamelModel
+from src.core.constants import CITIZENS_BATCH_MAX_SIZE
+from src.core.domain.citizen import CitizenDomain
 
 PinCodePath = Annotated[
     str, Path(pattern=r"^[A-HJ-NP-Za-hj-np-z0-9]{7}$", alias="pinCode")
 ]
 
+PinCode = Annotated[str, Field(pattern=r"^[A-HJ-NP-Za-hj-np-z0-9]{7}$")]
+
 
 class CitizenResponse(CamelModel):
     first_name: str
@@ -17,3 +22,32 @@ class CitizenResponse(CamelModel):
     document_number: str = Field(pattern=r"^(AA\d{7}|AZE\d{8})$")
     address_line: str
     date_of_birth: datetime
+
+
+class CitizenRedisData(BaseModel):
+    # citizen is None for a cached "not found" answer from ASAN
+    citizen: CitizenDomain | None = None
+    fresh_until: float
+
+    @property
+    def is_stale(self) -> bool:
+        return self.fresh_until <= time.time()
+
+
+class CitizenBatchRequest(CamelModel):
+    pin_codes: List[PinCode] = Field(min_length=1, max_length=CITIZENS_BATCH_MAX_SIZE)
+
+
+class CitizenError(CamelModel):
+    status_code: int
+    detail: str
+
+
+class CitizenBatchResult(CamelModel):
+    citizen: CitizenResponse | None = None
+    error: CitizenError | None = None
+
+
+class CitizenBatchResponse(CamelModel):
+    # Keyed by upper-cased PIN, a PIN requested twice is looked up once
+    items: Dict[str, CitizenBatchResult]
@@ -0,0 +1,152 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.constants import (
+    CITIZEN_PREFETCH_CONCURRENCY,
+    CITIZEN_PREFETCH_INTERVAL_SECONDS,
+    CITIZEN_PREFETCH_WINDOW_SECONDS,
+)
+from src.core.enums import MeetingStatus, RedisKeys
+from src.core.exceptions import CitizenNotFoundError
+from src.core.logging import logger
+from src.core.metrics import Counters, register_collector
+from src.core.redis import RedisClient, get_redis, get_redis_lock
+from src.database.core import AsyncSessionLocal
+from src.database.entities.citizen import Citizen
+from src.database.entities.meeting import Meeting
+from src.modules.citizens.asan_service import AsanService, asan_service
+from src.modules.citizens.cache import CitizenCache
+from src.modules.citizens.service import CitizenService, citizen_fetches
+
+citizen_prefetch_counters = Counters(
+    "passes", "skipped_passes", "scanned", "prefetched", "not_found", "failures"
+)
+register_collector("citizen_prefetch", citizen_prefetch_counters.snapshot)
+
+_prefetcher: asyncio.Task | None = None
+
+
+async def get_upcoming_pin_codes(db: AsyncSession) -> Dict[str, datetime]:
+    """Lower-cased PINs of citizens with an active meeting within the prefetch
+    window, mapped to their earliest meeting time"""
+    now = datetime.now(timezone.utc)
+    statement = (
+        select(Citizen.pin_code, func.min(Meeting.scheduled_at))
+        .join(Citizen, Meeting.citizen_id == Citizen.id)
+        .where(
+            Meeting.status.notin_((MeetingStatus.FINISHED, MeetingStatus.CANCELLED)),
+            Meeting.scheduled_at >= now,
+            Meeting.scheduled_at
+            < now + timedelta(seconds=CITIZEN_PREFETCH_WINDOW_SECONDS),
+        )
+        .group_by(Citizen.pin_code)
+    )
+    rows = await db.execute(statement)
+    return {pin_code.lower(): scheduled_at for pin_code, scheduled_at in rows}
+
+
+async def prefetch_citizens(
+    db: AsyncSession, redis_client: RedisClient, asan: AsanService
+) -> int:
+    """Refreshes the cached citizens that would not be fresh anymore when their
+    meeting starts, a few at a time. One worker of the cluster runs a pass per
+    interval, the lease is left to expire rather than released so the others
+    skip theirs. Returns how many citizens were refreshed."""
+    lock = get_redis_lock(
+        redis_client,
+        RedisKeys.CITIZEN_PREFETCH_LOCK,
+        "pass",
+        CITIZEN_PREFETCH_INTERVAL_SECONDS or 60,
+    )
+    if not await lock.acquire():
+        citizen_prefetch_counters.inc("skipped_passes")
+        return 0
+
+    citizen_prefetch_counters.inc("passes")
+
+    upcoming = await get_upcoming_pin_codes(db)
+    cached = await CitizenCache(redis_client).get_many(list(upcoming))
+    citizen_prefetch_counters.inc("scanned", len(upcoming))
+
+    def is_due(pin_code: str, scheduled_at: datetime) -> bool:
+        citizen_redis = cached.get(pin_code)
+        if not citizen_redis:
+            return True
+        if not citizen_redis.citizen:
+            # Known not to exist, asked again once the negative entry lapses
+            return citizen_redis.is_stale
+        return citizen_redis.fresh_until < scheduled_at.timestamp()
+
+    due = {
+        pin_code: scheduled_at.timestamp()
+        for pin_code, scheduled_at in upcoming.items()
+        if is_due(pin_code, scheduled_at)
+    }
+
+    citizen_service = CitizenService(redis_client, asan)
+    semaphore = asyncio.Semaphore(CITIZEN_PREFETCH_CONCURRENCY)
+
+    async def prefetch(pin_code: str, needed_until: float) -> bool:
+        async with semaphore:
+            try:
+                # Shares the fetch with lookups of the same PIN in flight, and
+                # takes the PIN's lease like they do
+                await citizen_fetches.do(
+                    pin_code,
+                    lambda: citizen_service.fetch_citizen(pin_code, needed_until),
+                )
+            except CitizenNotFoundError:
+                citizen_prefetch_counters.inc("not_found")
+                return False
+            except Exception as e:
+                citizen_prefetch_counters.inc("failures")
+                logger.warning(f"Citizen prefetch failed: {e}")
+                return False
+        citizen_prefetch_counters.inc("prefetched")
+        return True
+
+    return sum(
+        await asyncio.gather(
+            *(
+                prefetch(pin_code, needed_until)
+                for pin_code, needed_until in due.items()
+            )
+        )
+    )
+
+
+async def _run() -> None:
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await prefetch_citizens(db, get_redis(), asan_service)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Citizen prefetch pass failed: {e}")
+        await asyncio.sleep(CITIZEN_PREFETCH_INTERVAL_SECONDS)
+
+
+def start_prefetcher() -> None:
+    """Refresh citizens of upcoming meetings in a background task of this worker"""
+    global _prefetcher
+
+    if _prefetcher or not CITIZEN_PREFETCH_INTERVAL_SECONDS:
+        return
+
+    _prefetcher = asyncio.create_task(_run())
+
+
+async def stop_prefetcher() -> None:
+    global _prefetcher
+
+    if _prefetcher:
+        _prefetcher.cancel()
+        try:
+            await _prefetcher
+        except asyncio.CancelledError:
+            pass
+        _prefetcher = None
@@ -1,40 +1,219 @@
-from typing import Annotated
+import asyncio
+import time
+from typing import Annotated, Dict, List
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException
+from redis.exceptions import LockError
 from src.modules.citizens.asan_service import AsanServiceDep
+from src.modules.citizens.cache import CitizenCache
+from src.core.domain.citizen import CitizenDomain
 from src.core.enums import RedisKeys
-from src.modules.citizens.model import CitizenResponse, PinCodePath
-from src.core.redis import RedisClient, get_redis_value, set_redis_value
-from src.core.constants import CITIZEN_EXPIRE_SECONDS
+from src.core.exceptions import CitizenNotFoundError
+from src.core.logging import logger
+from src.core.metrics import Counters, register_collector
+from src.core.singleflight import SingleFlight
+from src.modules.citizens.model import (
+    CitizenBatchResponse,
+    CitizenBatchResult,
+    CitizenError,
+    CitizenRedisData,
+    CitizenResponse,
+    PinCodePath,
+)
+from src.core.redis import RedisClient, get_redis_lock
+from src.core.constants import (
+    CITIZENS_BATCH_CONCURRENCY,
+    CITIZEN_FETCH_LOCK_SECONDS,
+    CITIZEN_FETCH_POLL_SECONDS,
+    CITIZEN_FETCH_WAIT_SECONDS,
+)
+
+# One ASAN fetch per PIN per worker, concurrent lookups await the same result
+citizen_fetches = SingleFlight()
+register_collector("citizen_fetches", citizen_fetches.stats)
+
+citizen_cache_counters = Counters(
+    "hits", "stale_hits", "negative_hits", "misses", "refreshes", "refresh_failures"
+)
+register_collector("citizen_cache", citizen_cache_counters.snapshot)
+
+# Strong references so pending background refreshes are not garbage collected
+_background_refreshes: set[asyncio.Task] = set()
+
+
+def _on_refresh_done(task: asyncio.Task) -> None:
+    _background_refreshes.discard(task)
+
+    if task.cancelled():
+        return
+
+    error = task.exception()
+    if error and not isinstance(error, CitizenNotFoundError):
+        citizen_cache_counters.inc("refresh_failures")
+        logger.warning(f"Background citizen refresh failed: {error}")
+
+
+def citizen_error(exception: Exception) -> CitizenError:
+    if isinstance(exception, HTTPException):
+        return CitizenError(status_code=exception.status_code, detail=exception.detail)
+    return CitizenError(status_code=500, detail="Citizen lookup failed")
+
+
+def resolve_cached_citizen(citizen_redis: CitizenRedisData) -> CitizenDomain:
+    if not citizen_redis.citizen:
+        raise CitizenNotFoundError()
+    return citizen_redis.citizen
 
 
 class CitizenService:
     def __init__(self, redis_client: RedisClient, asan_service: AsanServiceDep):
         self.redis_client = redis_client
         self.asan_service = asan_service
+        self.citizen_cache = CitizenCache(redis_client)
 
     async def get_citizen(self, pin_code: PinCodePath) -> CitizenResponse:
         pin_code = pin_code.lower()
 
-        cached_citizen_json = get_redis_value(
-            self.redis_client, RedisKeys.CITIZEN, pin_code
+        citizen_redis = await self.citizen_cache.get(pin_code)
+
+        if not citizen_redis:
+            citizen_cache_counters.inc("misses")
+            citizen = await citizen_fetches.do(
+                pin_code, lambda: self.fetch_citizen(pin_code)
+            )
+        elif not citizen_redis.citizen:
+            citizen_cache_counters.inc("negative_hits")
+            raise CitizenNotFoundError()
+        else:
+            if citizen_redis.is_stale:
+                citizen_cache_counters.inc("stale_hits")
+                self.refresh_citizen_in_background(pin_code)
+            else:
+                citizen_cache_counters.inc("hits")
+            citizen = citizen_redis.citizen
+
+        return CitizenResponse(**citizen.model_dump())
+
+    async def get_citizens(self, pin_codes: List[str]) -> CitizenBatchResponse:
+        """Cached citizens come from one MGET, the misses are fetched a few at
+        a time the way single lookups fetch them"""
+        pin_codes = list(dict.fromkeys(pin_code.lower() for pin_code in pin_codes))
+        citizens_cached = await self.citizen_cache.get_many(pin_codes)
+
+        results: Dict[str, CitizenBatchResult] = {}
+        missing = []
+        for pin_code in pin_codes:
+            citizen_redis = citizens_cached.get(pin_code)
+
+            if not citizen_redis:
+                citizen_cache_counters.inc("misses")
+                missing.append(pin_code)
+            elif not citizen_redis.citizen:
+                citizen_cache_counters.inc("negative_hits")
+                results[pin_code] = CitizenBatchResult(
+                    error=citizen_error(CitizenNotFoundError())
+                )
+            else:
+                if citizen_redis.is_stale:
+                    citizen_cache_counters.inc("stale_hits")
+                    self.refresh_citizen_in_background(pin_code)
+                else:
+                    citizen_cache_counters.inc("hits")
+                results[pin_code] = CitizenBatchResult(
+                    citizen=CitizenResponse(**citizen_redis.citizen.model_dump())
+                )
+
+        semaphore = asyncio.Semaphore(CITIZENS_BATCH_CONCURRENCY)
+
+        async def fetch(pin_code: str) -> CitizenDomain:
+            async with semaphore:
+                # Shares the fetch with lookups of the same PIN in flight
+                return await citizen_fetches.do(
+                    pin_code, lambda: self.fetch_citizen(pin_code)
+                )
+
+        fetched = await asyncio.gather(
+            *(fetch(pin_code) for pin_code in missing), return_exceptions=True
         )
 
-        if cached_citizen_json:
-            return CitizenResponse.model_validate_json(cached_citizen_json)
+        for pin_code, citizen in zip(missing, fetched):
+            if isinstance(citizen, CitizenDomain):
+                results[pin_code] = CitizenBatchResult(
+                    citizen=CitizenResponse(**citizen.model_dump())
+                )
+            else:
+                if not isinstance(citizen, CitizenNotFoundError):
+                    logger.warning(f"Batch citizen lookup failed: {citizen}")
+                results[pin_code] = CitizenBatchResult(error=citizen_error(citizen))
 
-        citizen = await self.asan_service.get_citizen(pin_code)
-        citizen_json = citizen.model_dump_json()
+        return CitizenBatchResponse(
+            items={pin_code.upper(): result for pin_code, result in results.items()}
+        )
+
+    def refresh_citizen_in_background(self, pin_code: str) -> None:
+        if citizen_fetches.in_flight(pin_code):
+            return
 
-        set_redis_value(
-            self.redis_client,
-            RedisKeys.CITIZEN,
-            pin_code,
-            citizen_json,
-            CITIZEN_EXPIRE_SECONDS,
+        citizen_cache_counters.inc("refreshes")
+        task = asyncio.create_task(
+            citizen_fetches.do(pin_code, lambda: self.fetch_citizen(pin_code))
         )
+        _background_refreshes.add(task)
+        task.add_done_callback(_on_refresh_done)
 
-        return CitizenResponse(**citizen.model_dump())
+    async def fetch_citizen(
+        self, pin_code: str, needed_until: float | None = None
+    ) -> CitizenDomain:
+        """Fetch from ASAN under a cluster-wide lease, or wait for its holder.
+        An entry cached meanwhile is used if it stays fresh until needed_until,
+        now by default."""
+        deadline = time.monotonic() + CITIZEN_FETCH_WAIT_SECONDS
+
+        def is_fresh(citizen_redis: CitizenRedisData | None) -> bool:
+            return bool(citizen_redis) and citizen_redis.fresh_until > (
+                needed_until or time.time()
+            )
+
+        while time.monotonic() < deadline:
+            lock = get_redis_lock(
+                self.redis_client,
+                RedisKeys.CITIZEN_LOCK,
+                pin_code,
+                CITIZEN_FETCH_LOCK_SECONDS,
+            )
+
+            if await lock.acquire():
+                try:
+                    # The previous holder may have refreshed the cache just now
+                    citizen_redis = await self.citizen_cache.get(pin_code)
+                    if is_fresh(citizen_redis):
+                        return resolve_cached_citizen(citizen_redis)
+
+                    return await self.fetch_and_cache_citizen(pin_code)
+                finally:
+                    try:
+                        await lock.release()
+                    except LockError:
+                        pass
+
+            await asyncio.sleep(CITIZEN_FETCH_POLL_SECONDS)
+
+            citizen_redis = await self.citizen_cache.get(pin_code)
+            if is_fresh(citizen_redis):
+                return resolve_cached_citizen(citizen_redis)
+
+        # The lease holder is stuck, fall back to fetching ourselves
+        return await self.fetch_and_cache_citizen(pin_code)
+
+    async def fetch_and_cache_citizen(self, pin_code: str) -> CitizenDomain:
+        try:
+            citizen = await self.asan_service.get_citizen(pin_code)
+        except CitizenNotFoundError:
+            await self.citizen_cache.set_not_found(pin_code)
+            raise
+
+        await self.citizen_cache.set(pin_code, citizen)
+        return citizen
 
 
 def get_citizen_service(
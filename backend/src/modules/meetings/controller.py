@@ -1,10 +1,15 @@
-from fastapi import APIRouter
+from typing import Annotated, List
+from fastapi import APIRouter, Body, Query
+from fastapi.responses import StreamingResponse
 from starlette.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT
 
-from src.modules.auth.service import GetOperatorUser
+from src.core.constants import MEETINGS_BULK_MAX_SIZE
+from src.modules.auth.service import GetOperatorPrincipal, GetOperatorUser
+from src.modules.meetings.events import meeting_event_hub
 from src.modules.meetings.service import MeetingServiceDep
 from src.modules.meetings.model import (
     JoinMeetingCitizenRequest,
+    MeetingListQuery,
     MeetingRequest,
 )
 from src.modules.meetings.model import MeetingIdPath
@@ -13,41 +18,65 @@ router = APIRouter(prefix="/meetings", tags=["Meetings"])
 
 
 @router.get("/")
-def get_meetings(meeting_service: MeetingServiceDep, operator: GetOperatorUser):
-    return meeting_service.get_meetings(operator)
+async def get_meetings(
+    query: Annotated[MeetingListQuery, Query()],
+    meeting_service: MeetingServiceDep,
+    operator: GetOperatorPrincipal,
+):
+    return await meeting_service.get_meetings(operator, query)
+
+
+@router.get("/events")
+async def get_meeting_events(operator: GetOperatorPrincipal):
+    return StreamingResponse(
+        meeting_event_hub.stream(operator.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/", status_code=HTTP_201_CREATED)
-def create_meeting(
+async def create_meeting(
     request: MeetingRequest,
     meeting_service: MeetingServiceDep,
-    operator: GetOperatorUser,
+    operator: GetOperatorPrincipal,
 ):
-    return meeting_service.create_meeting(request, operator)
+    return await meeting_service.create_meeting(request, operator)
+
+
+@router.post("/bulk")
+async def create_meetings(
+    requests: Annotated[
+        List[MeetingRequest], Body(min_length=1, max_length=MEETINGS_BULK_MAX_SIZE)
+    ],
+    meeting_service: MeetingServiceDep,
+    operator: GetOperatorPrincipal,
+):
+    return await meeting_service.create_meetings(requests, operator)
 
 
 @router.post("/{meetingId}/join/operator")
-def join_meeting_operator(
+async def join_meeting_operator(
     meeting_id: MeetingIdPath,
     meeting_service: MeetingServiceDep,
     operator: GetOperatorUser,
 ):
-    return meeting_service.join_meeting_operator(meeting_id, operator)
+    return await meeting_service.join_meeting_operator(meeting_id, operator)
 
 
 @router.post("/{meetingId}/join/citizen")
-def join_meeting_citizen(
+async def join_meeting_citizen(
     meeting_id: MeetingIdPath,
     request: JoinMeetingCitizenRequest,
     meeting_service: MeetingServiceDep,
 ):
-    return meeting_service.join_meeting_citizen(meeting_id, request)
+    return await meeting_service.join_meeting_citizen(meeting_id, request)
 
 
 @router.post("/{meetingId}/finish", status_code=HTTP_204_NO_CONTENT)
-def finish_meeting(
+async def finish_meeting(
     meeting_id: MeetingIdPath,
     meeting_service: MeetingServiceDep,
-    operator: GetOperatorUser,
+    operator: GetOperatorPrincipal,
 ):
-    return meeting_service.finish_meeting(meeting_id)
+    return await meeting_service.finish_meeting(meeting_id)
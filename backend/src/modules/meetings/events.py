@@ -0,0 +1,139 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Set, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+from src.core.constants import (
+    MEETING_EVENTS_HEARTBEAT_SECONDS,
+    MEETING_EVENTS_QUEUE_SIZE,
+)
+from src.core.enums import RedisChannels
+from src.core.logging import logger
+from src.core.metrics import Counters, LatencyHistograms, register_collector
+from src.core.pubsub import publish, subscribe
+from src.core.redis import RedisClient
+from src.modules.meetings.model import MeetingStatusEvent
+from src.modules.meetings.transitions import MeetingStatusChanged, on_status_changed
+
+FANOUT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+# Published at, server-sent event. None closes the stream
+StreamItem = Tuple[float, str] | None
+
+
+class MeetingEventHub:
+    """Status events of this worker's connected operators.
+
+    Every worker receives every event through pub/sub and hands it to the
+    streams of the meeting's operator only, serialized once for all of them.
+    A stream that cannot keep up is closed rather than silently skipping
+    events, its client reconnects and reloads the meeting list.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._streams: Dict[UUID, Set[asyncio.Queue[StreamItem]]] = {}
+        self.counters = Counters("connects", "published", "delivered", "overflows")
+        self.fanout_latency = LatencyHistograms(FANOUT_LATENCY_BUCKETS)
+
+    def connect(self, operator_id: UUID) -> asyncio.Queue[StreamItem]:
+        queue = asyncio.Queue(self.queue_size + 1)
+        self._streams.setdefault(operator_id, set()).add(queue)
+        self.counters.inc("connects")
+        return queue
+
+    def disconnect(self, operator_id: UUID, queue: asyncio.Queue[StreamItem]) -> None:
+        streams = self._streams.get(operator_id)
+        if streams is None:
+            return
+        streams.discard(queue)
+        if not streams:
+            del self._streams[operator_id]
+
+    def dispatch(self, message: str) -> None:
+        """Pub/sub handler, queues the event on the operator's streams"""
+        try:
+            event = MeetingStatusEvent.model_validate_json(message)
+        except ValidationError as e:
+            logger.warning(f"Unreadable meeting status event: {e}")
+            return
+
+        streams = self._streams.get(event.operator_id)
+        if not streams:
+            return
+
+        self.fanout_latency.observe("queued", time.time() - event.published_at)
+        item = (
+            event.published_at,
+            f"id: {event.meeting_id}:{event.version}\n"
+            f"event: meeting_status\ndata: {message}\n\n",
+        )
+        for queue in streams:
+            if queue.qsize() < self.queue_size:
+                queue.put_nowait(item)
+            elif not queue.full():
+                # The slot kept free past queue_size holds the close marker
+                queue.put_nowait(None)
+                self.counters.inc("overflows")
+
+    async def stream(self, operator_id: UUID) -> AsyncIterator[str]:
+        """Server-sent events of the operator's meetings until disconnected"""
+        queue = self.connect(operator_id)
+        try:
+            # Sent right away so clients and proxies see the stream is open
+            yield ": connected\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(
+                        queue.get(), MEETING_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if item is None:
+                    return
+
+                published_at, data = item
+                self.counters.inc("delivered")
+                self.fanout_latency.observe("delivered", time.time() - published_at)
+                yield data
+        finally:
+            self.disconnect(operator_id, queue)
+
+    def stats(self) -> dict:
+        return {
+            "connections": sum(len(streams) for streams in self._streams.values()),
+            "operators": len(self._streams),
+            **self.counters.snapshot(),
+            "fanout_latency": self.fanout_latency.snapshot(),
+        }
+
+
+meeting_event_hub = MeetingEventHub(MEETING_EVENTS_QUEUE_SIZE)
+subscribe(RedisChannels.MEETING_STATUS, meeting_event_hub.dispatch)
+register_collector("meeting_events", meeting_event_hub.stats)
+
+
+async def publish_status_changed(
+    event: MeetingStatusChanged, redis_client: RedisClient
+) -> None:
+    message = MeetingStatusEvent(
+        meeting_id=event.meeting_id,
+        operator_id=event.operator_id,
+        previous_status=event.previous,
+        status=event.status,
+        version=event.version,
+        changed_at=event.changed_at,
+        published_at=time.time(),
+    )
+    await publish(
+        redis_client,
+        RedisChannels.MEETING_STATUS,
+        message.model_dump_json(by_alias=True),
+    )
+    meeting_event_hub.counters.inc("published")
+
+
+on_status_changed(publish_status_changed)
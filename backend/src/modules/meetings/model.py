@@ -1,8 +1,9 @@
 from datetime import datetime
 from uuid import UUID
-from typing import Annotated
+from typing import Annotated, List
 from fastapi import Path
 from pydantic import BaseModel, Field
+from src.core.constants import MEETINGS_PAGE_DEFAULT_LIMIT, MEETINGS_PAGE_MAX_LIMIT
 from src.core.enums import MeetingStatus
 from src.core.base_model import CamelModel
 from src.core.domain.citizen import CitizenDomain
@@ -27,6 +28,34 @@ class MeetingResponse(CamelModel):
     phone: str
 
 
+class MeetingError(CamelModel):
+    status_code: int
+    detail: str
+
+
+class BulkMeetingResult(CamelModel):
+    index: int
+    meeting: MeetingResponse | None = None
+    error: MeetingError | None = None
+
+
+class BulkMeetingResponse(CamelModel):
+    items: List[BulkMeetingResult]
+
+
+class MeetingListQuery(CamelModel):
+    limit: int = Field(MEETINGS_PAGE_DEFAULT_LIMIT, ge=1, le=MEETINGS_PAGE_MAX_LIMIT)
+    cursor: str | None = None
+    status: List[MeetingStatus] | None = None
+    scheduled_from: datetime | None = None
+    scheduled_to: datetime | None = None
+
+
+class MeetingListResponse(CamelModel):
+    items: List[MeetingResponse]
+    next_cursor: str | None = None
+
+
 class JoinMeetingCitizenRequest(CamelModel):
     otp: str = Field(pattern=r"^[0-9]{6}$")
 
@@ -38,3 +67,14 @@ class JoinMeetingResponse(CamelModel):
 class MeetingRedisData(BaseModel):
     otp: str = Field(pattern=r"^[0-9]{6}$")
     citizen_data: CitizenDomain
+
+
+class MeetingStatusEvent(CamelModel):
+    meeting_id: UUID
+    operator_id: UUID
+    previous_status: MeetingStatus
+    status: MeetingStatus
+    version: int
+    changed_at: datetime
+    # Wall clock time of the publish, for the fan-out latency of each worker
+    published_at: float
@@ -1,8 +1,11 @@
 from datetime import datetime, timedelta, timezone
-from typing import Annotated, List
+from typing import Annotated, Dict, List, Tuple
+from uuid import UUID, uuid4
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 from pydantic import TypeAdapter
+from sqlalchemy import column, literal, select, text, tuple_, values
+from sqlalchemy.dialects.postgresql import insert
 
 from src.core.utils.jitsi import generate_jitsi_token, JitsiUser
 from src.database.entities.citizen import Citizen
@@ -11,178 +14,353 @@ from src.core.exceptions import (
     CitizenNotFoundError,
     MeetingAlreadyScheduledError,
     MeetingNotFoundError,
+    MeetingTimePassedError,
     InvalidOTPError,
 )
 from src.core.redis import (
     RedisClient,
     delete_redis_value,
-    get_redis_value,
-    set_redis_value,
+    get_redis_object,
+    set_redis_objects,
 )
 from src.core.domain.citizen import CitizenDomain
+from src.core.domain.principal import Principal
+from src.core.domain.user import UserDomain
 from src.core.utils.auth import generate_otp
-from src.database.core import DbSession
-from src.database.entities.meeting import Meeting
-from src.database.entities.user import User
+from src.core.utils.pagination import decode_cursor, encode_cursor
+from src.database.core import AsyncDbSession
+from src.database.entities.meeting import ACTIVE_MEETING_CONDITION, Meeting
+from src.database.replicas import mark_write, read_for
+from src.modules.citizens.cache import CitizenCache
+from src.modules.meetings.transitions import (
+    FINISH,
+    JOIN,
+    MeetingStatusChanged,
+    MeetingTransition,
+    TransitionResult,
+    apply_transition,
+    emit_status_changed,
+)
 from src.modules.meetings.model import (
+    BulkMeetingResponse,
+    BulkMeetingResult,
     JoinMeetingCitizenRequest,
     MeetingIdPath,
     JoinMeetingResponse,
+    MeetingListQuery,
+    MeetingListResponse,
     MeetingRequest,
     MeetingResponse,
     MeetingRedisData,
+    MeetingError,
 )
 
+meeting_list_adapter = TypeAdapter(List[MeetingResponse])
+
+# The citizen's OTP is kept until this long after the scheduled time
+MEETING_OTP_WINDOW = timedelta(hours=1)
+
+
+def meeting_error(exception: HTTPException) -> MeetingError:
+    return MeetingError(status_code=exception.status_code, detail=exception.detail)
+
+
+def is_past_otp_window(scheduled_at: datetime, now: datetime) -> bool:
+    if scheduled_at.tzinfo is None:
+        scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+    return scheduled_at + MEETING_OTP_WINDOW <= now
+
 
 class MeetingService:
-    def __init__(self, db: DbSession, redis_client: RedisClient):
+    def __init__(self, db: AsyncDbSession, redis_client: RedisClient):
         self.redis_client = redis_client
         self.db = db
-
-    def get_meetings(self, operator: User) -> List[MeetingResponse]:
-        meetings_with_citizens = (
-            self.db.query(Meeting, Citizen)
+        self.citizen_cache = CitizenCache(redis_client)
+
+    async def get_meetings(
+        self, operator: Principal, query: MeetingListQuery
+    ) -> MeetingListResponse:
+        statement = (
+            select(
+                Meeting.id,
+                Meeting.status,
+                Meeting.scheduled_at,
+                Citizen.first_name,
+                Citizen.last_name,
+                Citizen.patronymic,
+                Citizen.pin_code,
+                Citizen.phone,
+            )
             .join(Citizen, Meeting.citizen_id == Citizen.id)
-            .filter(Meeting.operator_id == operator.id)
-            .all()
+            .where(Meeting.operator_id == operator.id)
+            .order_by(Meeting.scheduled_at, Meeting.id)
+            .limit(query.limit + 1)
         )
 
-        meetings_raw_data = [
-            {
-                "id": meeting.id,
-                "status": meeting.status,
-                "scheduled_at": meeting.scheduled_at,
-                "first_name": citizen.first_name,
-                "last_name": citizen.last_name,
-                "patronymic": citizen.patronymic,
-                "pin_code": citizen.pin_code,
-                "phone": citizen.phone,
-            }
-            for meeting, citizen in meetings_with_citizens
-        ]
-
-        ta = TypeAdapter(List[MeetingResponse])
-        return ta.validate_python(meetings_raw_data)
-
-    def create_meeting(
-        self, request: MeetingRequest, operator: User
-    ) -> MeetingResponse:
+        if query.cursor:
+            statement = statement.where(
+                tuple_(Meeting.scheduled_at, Meeting.id)
+                > tuple_(*decode_cursor(query.cursor))
+            )
+        if query.status:
+            statement = statement.where(Meeting.status.in_(query.status))
+        if query.scheduled_from:
+            statement = statement.where(Meeting.scheduled_at >= query.scheduled_from)
+        if query.scheduled_to:
+            statement = statement.where(Meeting.scheduled_at < query.scheduled_to)
 
-        citizen_redis_json = get_redis_value(
-            self.redis_client, RedisKeys.CITIZEN, request.citizen_pin_code.lower()
-        )
+        async def select_meetings(db):
+            return (await db.execute(statement)).mappings().all()
 
-        if not citizen_redis_json:
-            raise CitizenNotFoundError()
+        rows = await read_for(self.db, self.redis_client, operator.id, select_meetings)
+        meetings = meeting_list_adapter.validate_python(rows[: query.limit])
 
-        citizen_redis = CitizenDomain.model_validate_json(citizen_redis_json)
+        next_cursor = None
+        if len(rows) > query.limit:
+            last_meeting = meetings[-1]
+            next_cursor = encode_cursor(last_meeting.scheduled_at, last_meeting.id)
 
-        citizen_db = (
-            self.db.query(Citizen)
-            .filter(Citizen.pin_code == citizen_redis.pin_code)
-            .first()
-        )
+        return MeetingListResponse(items=meetings, next_cursor=next_cursor)
 
-        if not citizen_db:
-            citizen = Citizen(
-                first_name=citizen_redis.first_name,
-                last_name=citizen_redis.last_name,
-                patronymic=citizen_redis.patronymic,
-                pin_code=citizen_redis.pin_code,
-                phone=request.citizen_phone,
-            )
-            self.db.add(citizen)
-            self.db.commit()
-            self.db.refresh(citizen)
-            citizen_db = citizen
-
-        meeting = (
-            self.db.query(Meeting)
-            .filter(Meeting.citizen_id == citizen_db.id)
-            .filter(
-                Meeting.status.notin_([MeetingStatus.FINISHED, MeetingStatus.CANCELLED])
-            )
-            .first()
+    async def create_meeting(
+        self, request: MeetingRequest, operator: Principal
+    ) -> MeetingResponse:
+        if is_past_otp_window(request.scheduled_at, datetime.now(timezone.utc)):
+            raise MeetingTimePassedError()
+
+        citizen_cached = await self.citizen_cache.get(request.citizen_pin_code)
+
+        if not citizen_cached or not citizen_cached.citizen:
+            raise CitizenNotFoundError()
+
+        meeting_id = uuid4()
+        booked = await self._book_meetings(
+            {meeting_id: (request, citizen_cached.citizen)}, operator
         )
 
-        if meeting:
+        if meeting_id not in booked:
+            await self.db.rollback()
             raise MeetingAlreadyScheduledError()
 
-        new_meeting = Meeting(
-            operator_id=operator.id,
-            citizen_id=citizen_db.id,
-            scheduled_at=request.scheduled_at,
-        )
+        await self.db.commit()
+        await mark_write(self.redis_client, operator.id)
 
-        self.db.add(new_meeting)
-        self.db.commit()
-        self.db.refresh(new_meeting)
+        await self._store_otps(booked)
 
-        otp = generate_otp()
+        return booked[meeting_id][0]
 
-        meeting_redis = MeetingRedisData(otp=otp, citizen_data=citizen_redis)
+    async def create_meetings(
+        self, requests: List[MeetingRequest], operator: Principal
+    ) -> BulkMeetingResponse:
+        citizens_cached = await self.citizen_cache.get_many(
+            [request.citizen_pin_code for request in requests]
+        )
+
+        results = [BulkMeetingResult(index=index) for index in range(len(requests))]
+        bookings = {}
+        booking_indexes = {}
+        now = datetime.now(timezone.utc)
+
+        for index, request in enumerate(requests):
+            citizen_cached = citizens_cached.get(request.citizen_pin_code.lower())
+
+            if is_past_otp_window(request.scheduled_at, now):
+                # Booked, it would have no OTP for the citizen to join with
+                results[index].error = meeting_error(MeetingTimePassedError())
+            elif not citizen_cached or not citizen_cached.citizen:
+                results[index].error = meeting_error(CitizenNotFoundError())
+            elif citizen_cached.citizen.pin_code in booking_indexes:
+                # Only the first row of a citizen can get the active meeting
+                results[index].error = meeting_error(MeetingAlreadyScheduledError())
+            else:
+                meeting_id = uuid4()
+                booking_indexes[citizen_cached.citizen.pin_code] = index
+                bookings[meeting_id] = (request, citizen_cached.citizen)
+
+        booked = {}
+        if bookings:
+            booked = await self._book_meetings(bookings, operator)
+            await self.db.commit()
+            await mark_write(self.redis_client, operator.id)
+
+        for meeting_id, (_, citizen) in bookings.items():
+            index = booking_indexes[citizen.pin_code]
+            if meeting_id in booked:
+                results[index].meeting = booked[meeting_id][0]
+            else:
+                results[index].error = meeting_error(MeetingAlreadyScheduledError())
+
+        await self._store_otps(booked)
+
+        return BulkMeetingResponse(items=results)
+
+    async def _book_meetings(
+        self,
+        bookings: Dict[UUID, Tuple[MeetingRequest, CitizenDomain]],
+        operator: Principal,
+    ) -> Dict[UUID, Tuple[MeetingResponse, CitizenDomain]]:
+        """Upserts the citizens and inserts the meetings in one statement.
+
+        The no-op update makes RETURNING yield already existing citizens, and
+        the partial unique index on active meetings skips citizens that are
+        already booked, so those meeting ids are missing from the result.
+        Leaves the transaction open for the caller to commit or roll back.
+        """
+        now = datetime.now(timezone.utc)
+
+        citizens = {}
+        for request, citizen in bookings.values():
+            citizens.setdefault(
+                citizen.pin_code,
+                {
+                    "id": uuid4(),
+                    "first_name": citizen.first_name,
+                    "last_name": citizen.last_name,
+                    "patronymic": citizen.patronymic,
+                    "pin_code": citizen.pin_code,
+                    "phone": request.citizen_phone,
+                    "created_at": now.replace(tzinfo=None),
+                },
+            )
 
-        meeting_expire_seconds = int(
-            (
-                request.scheduled_at + timedelta(hours=1) - datetime.now(timezone.utc)
-            ).total_seconds()
+        # Rows are locked in the order given, the same order in every booking
+        # keeps concurrent bookings of overlapping citizens from deadlocking
+        citizen_upsert = insert(Citizen).values(
+            sorted(citizens.values(), key=lambda row: row["pin_code"])
+        )
+        citizen_cte = (
+            citizen_upsert.on_conflict_do_update(
+                index_elements=[Citizen.pin_code],
+                set_={"pin_code": citizen_upsert.excluded.pin_code},
+            )
+            .returning(Citizen)
+            .cte("citizen")
         )
 
-        set_redis_value(
-            self.redis_client,
-            RedisKeys.MEETING,
-            str(new_meeting.id),
-            meeting_redis.model_dump_json(),
-            meeting_expire_seconds,
+        booking = values(
+            column("id", Meeting.id.type),
+            column("pin_code", Citizen.pin_code.type),
+            column("scheduled_at", Meeting.scheduled_at.type),
+            name="booking",
+        ).data(
+            [
+                (meeting_id, citizen.pin_code, request.scheduled_at)
+                for meeting_id, (request, citizen) in bookings.items()
+            ]
+        )
+        meeting_cte = (
+            insert(Meeting)
+            .from_select(
+                [
+                    "id",
+                    "operator_id",
+                    "citizen_id",
+                    "scheduled_at",
+                    "status",
+                    "created_at",
+                ],
+                select(
+                    booking.c.id,
+                    literal(operator.id, Meeting.operator_id.type),
+                    citizen_cte.c.id,
+                    booking.c.scheduled_at,
+                    literal(MeetingStatus.CREATED, Meeting.status.type),
+                    literal(now, Meeting.created_at.type),
+                ).join_from(
+                    booking, citizen_cte, citizen_cte.c.pin_code == booking.c.pin_code
+                ),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Meeting.citizen_id],
+                index_where=text(ACTIVE_MEETING_CONDITION),
+            )
+            .returning(
+                Meeting.id, Meeting.citizen_id, Meeting.status, Meeting.scheduled_at
+            )
+            .cte("meeting")
         )
 
-        return MeetingResponse(
-            id=new_meeting.id,
-            status=new_meeting.status,
-            scheduled_at=new_meeting.scheduled_at,
-            first_name=citizen_db.first_name,
-            last_name=citizen_db.last_name,
-            patronymic=citizen_db.patronymic,
-            pin_code=citizen_db.pin_code,
-            phone=citizen_db.phone,
+        rows = await self.db.execute(
+            select(
+                meeting_cte.c.id,
+                meeting_cte.c.status,
+                meeting_cte.c.scheduled_at,
+                citizen_cte.c.first_name,
+                citizen_cte.c.last_name,
+                citizen_cte.c.patronymic,
+                citizen_cte.c.pin_code,
+                citizen_cte.c.phone,
+            ).join_from(
+                meeting_cte, citizen_cte, citizen_cte.c.id == meeting_cte.c.citizen_id
+            )
         )
 
-    def join_meeting(self, meeting_id: MeetingIdPath) -> Meeting:
-        meeting = self.db.query(Meeting).filter(Meeting.id == meeting_id).first()
+        return {
+            row.id: (MeetingResponse.model_validate(row._mapping), bookings[row.id][1])
+            for row in rows
+        }
+
+    async def _store_otps(
+        self, booked: Dict[UUID, Tuple[MeetingResponse, CitizenDomain]]
+    ) -> None:
+        """Writes the OTP of every booked meeting in one pipeline"""
+        now = datetime.now(timezone.utc)
+
+        meetings_redis = {}
+        for meeting_id, (meeting, citizen) in booked.items():
+            meeting_redis = MeetingRedisData(otp=generate_otp(), citizen_data=citizen)
+            # At least a second, the window may have closed since the check
+            meeting_expire_seconds = max(
+                int((meeting.scheduled_at + MEETING_OTP_WINDOW - now).total_seconds()),
+                1,
+            )
+            meetings_redis[str(meeting_id)] = (meeting_redis, meeting_expire_seconds)
 
-        if not meeting:
-            raise MeetingNotFoundError()
+        await set_redis_objects(self.redis_client, RedisKeys.MEETING, meetings_redis)
 
-        if meeting.status == MeetingStatus.CREATED:
-            meeting.status = MeetingStatus.PENDING
-            self.db.commit()
-            self.db.refresh(meeting)
-        elif meeting.status == MeetingStatus.PENDING:
-            meeting.status = MeetingStatus.IN_PROGRESS
-            self.db.commit()
-            self.db.refresh(meeting)
-        elif meeting.status in [MeetingStatus.CANCELLED, MeetingStatus.FINISHED]:
+    async def _transition(
+        self, meeting_id: MeetingIdPath, transition: MeetingTransition
+    ) -> TransitionResult:
+        result = await apply_transition(self.db, meeting_id, transition)
+
+        if not result:
             raise MeetingNotFoundError()
 
-        return meeting
+        if result.changed:
+            await self.db.commit()
+            await mark_write(self.redis_client, result.operator_id)
+            await emit_status_changed(
+                MeetingStatusChanged(
+                    meeting_id=meeting_id,
+                    operator_id=result.operator_id,
+                    previous=result.previous,
+                    status=result.status,
+                    version=result.version,
+                    changed_at=datetime.now(timezone.utc),
+                ),
+                self.redis_client,
+            )
+
+        return result
 
-    def join_meeting_citizen(
+    async def join_meeting(self, meeting_id: MeetingIdPath) -> TransitionResult:
+        return await self._transition(meeting_id, JOIN)
+
+    async def join_meeting_citizen(
         self, meeting_id: MeetingIdPath, request: JoinMeetingCitizenRequest
     ) -> JoinMeetingResponse:
 
-        meeting_redis_json = get_redis_value(
-            self.redis_client, RedisKeys.MEETING, str(meeting_id)
+        meeting_redis = await get_redis_object(
+            self.redis_client, RedisKeys.MEETING, str(meeting_id), MeetingRedisData
         )
 
-        if not meeting_redis_json:
+        if not meeting_redis:
             raise MeetingNotFoundError()
 
-        meeting_redis = MeetingRedisData.model_validate_json(meeting_redis_json)
-
         if meeting_redis.otp != request.otp:
             raise InvalidOTPError()
 
-        self.join_meeting(meeting_id)
+        await self.join_meeting(meeting_id)
 
         jitsi_token_payload: JitsiUser = {
             "moderator": False,
@@ -194,11 +372,11 @@ class MeetingService:
 
         return JoinMeetingResponse(jitsi_token=jitsi_token)
 
-    def join_meeting_operator(
-        self, meeting_id: MeetingIdPath, operator: User
+    async def join_meeting_operator(
+        self, meeting_id: MeetingIdPath, operator: UserDomain
     ) -> JoinMeetingResponse:
 
-        self.join_meeting(meeting_id)
+        await self.join_meeting(meeting_id)
 
         jitsi_token_payload: JitsiUser = {
             "moderator": True,
@@ -210,20 +388,15 @@ class MeetingService:
 
         return JoinMeetingResponse(jitsi_token=jitsi_token)
 
-    def finish_meeting(self, meeting_id: MeetingIdPath) -> None:
-        meeting = self.db.query(Meeting).filter(Meeting.id == meeting_id).first()
-
-        if not meeting:
-            raise MeetingNotFoundError()
-
-        meeting.status = MeetingStatus.FINISHED
-        self.db.commit()
-        self.db.refresh(meeting)
+    async def finish_meeting(self, meeting_id: MeetingIdPath) -> None:
+        await self._transition(meeting_id, FINISH)
 
-        delete_redis_value(self.redis_client, RedisKeys.MEETING, str(meeting_id))
+        await delete_redis_value(self.redis_client, RedisKeys.MEETING, str(meeting_id))
 
 
-def get_meeting_service(db: DbSession, redis_client: RedisClient) -> MeetingService:
+def get_meeting_service(
+    db: AsyncDbSession, redis_client: RedisClient
+) -> MeetingService:
     return MeetingService(db, redis_client)
 
 
@@ -0,0 +1,197 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, FrozenSet, List, NamedTuple
+from uuid import UUID
+
+from sqlalchemy import case, literal, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.enums import MeetingStatus
+from src.core.logging import logger
+from src.core.metrics import Counters, register_collector
+from src.core.redis import RedisClient
+from src.database.entities.meeting import Meeting
+
+# Every status a meeting may move to from each status, FINISHED and CANCELLED
+# are final
+MEETING_TRANSITIONS: Dict[MeetingStatus, FrozenSet[MeetingStatus]] = {
+    MeetingStatus.CREATED: frozenset(
+        {MeetingStatus.PENDING, MeetingStatus.FINISHED, MeetingStatus.CANCELLED}
+    ),
+    MeetingStatus.PENDING: frozenset(
+        {MeetingStatus.IN_PROGRESS, MeetingStatus.FINISHED, MeetingStatus.CANCELLED}
+    ),
+    MeetingStatus.IN_PROGRESS: frozenset({MeetingStatus.FINISHED}),
+    MeetingStatus.FINISHED: frozenset(),
+    MeetingStatus.CANCELLED: frozenset(),
+}
+
+meeting_transition_counters = Counters("applied", "settled", "rejected", "conflicts")
+register_collector("meeting_transitions", meeting_transition_counters.snapshot)
+
+
+@dataclass(frozen=True)
+class MeetingTransition:
+    """Status a meeting moves to from each status the action applies to.
+
+    Statuses in `settled` already have the action's effect, the action is a
+    no-op there instead of an illegal move.
+    """
+
+    name: str
+    moves: Dict[MeetingStatus, MeetingStatus]
+    settled: FrozenSet[MeetingStatus] = field(default_factory=frozenset)
+
+    def __post_init__(self):
+        for source, target in self.moves.items():
+            if target not in MEETING_TRANSITIONS[source]:
+                raise ValueError(
+                    f"{self.name}: {source.value} -> {target.value} is not allowed"
+                )
+
+
+JOIN = MeetingTransition(
+    "join",
+    {
+        MeetingStatus.CREATED: MeetingStatus.PENDING,
+        MeetingStatus.PENDING: MeetingStatus.IN_PROGRESS,
+    },
+    settled=frozenset({MeetingStatus.IN_PROGRESS}),
+)
+
+FINISH = MeetingTransition(
+    "finish",
+    {
+        MeetingStatus.CREATED: MeetingStatus.FINISHED,
+        MeetingStatus.PENDING: MeetingStatus.FINISHED,
+        MeetingStatus.IN_PROGRESS: MeetingStatus.FINISHED,
+    },
+    settled=frozenset({MeetingStatus.FINISHED}),
+)
+
+
+class TransitionResult(NamedTuple):
+    operator_id: UUID
+    previous: MeetingStatus
+    status: MeetingStatus
+    version: int
+    # False when the meeting was already settled and nothing was written
+    changed: bool
+
+
+@dataclass(frozen=True)
+class MeetingStatusChanged:
+    meeting_id: UUID
+    operator_id: UUID
+    previous: MeetingStatus
+    status: MeetingStatus
+    version: int
+    changed_at: datetime
+
+
+StatusListener = Callable[[MeetingStatusChanged, RedisClient], Awaitable[None]]
+
+_listeners: List[StatusListener] = []
+
+
+def on_status_changed(listener: StatusListener) -> None:
+    """Register a coroutine called with every committed status transition and
+    the Redis client of the service that made it"""
+    _listeners.append(listener)
+
+
+async def emit_status_changed(
+    event: MeetingStatusChanged, redis_client: RedisClient
+) -> None:
+    results = await asyncio.gather(
+        *(listener(event, redis_client) for listener in _listeners),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Meeting status listener failed: {result}")
+
+
+def _compare_and_set(meeting_id: UUID, transition: MeetingTransition):
+    """Reads the meeting and moves it in one statement, on the condition that
+    its version is still the one read.
+
+    A concurrent transition that commits first bumps the version, the update
+    then re-checks the newer row, skips it and returns the status it read
+    with no new status, a conflict the caller retries.
+    """
+    current = (
+        select(Meeting.id, Meeting.operator_id, Meeting.status, Meeting.version)
+        .where(Meeting.id == meeting_id)
+        .cte("current")
+    )
+    moved = (
+        update(Meeting)
+        .where(
+            Meeting.id == current.c.id,
+            Meeting.version == current.c.version,
+            current.c.status.in_(transition.moves),
+        )
+        .values(
+            status=case(
+                {
+                    source: literal(target, Meeting.status.type)
+                    for source, target in transition.moves.items()
+                },
+                value=current.c.status,
+            ),
+            version=Meeting.version + 1,
+        )
+        .returning(Meeting.status, Meeting.version)
+        .cte("moved")
+    )
+    return select(
+        current.c.operator_id,
+        current.c.status.label("previous"),
+        current.c.version.label("previous_version"),
+        moved.c.status,
+        moved.c.version,
+    ).select_from(current.outerjoin(moved, true()))
+
+
+async def apply_transition(
+    db: AsyncSession, meeting_id: UUID, transition: MeetingTransition
+) -> TransitionResult | None:
+    """Moves the meeting by the transition without taking row locks up front.
+
+    One round trip per attempt. None if the meeting is missing or its status
+    does not allow the transition. Leaves the transaction open for the
+    caller to commit.
+    """
+    # Every conflict means another transition moved the meeting on, which
+    # happens at most once per status before it reaches a final one
+    for _ in MeetingStatus:
+        row = (await db.execute(_compare_and_set(meeting_id, transition))).first()
+
+        if not row:
+            meeting_transition_counters.inc("rejected")
+            return None
+
+        if row.status:
+            meeting_transition_counters.inc("applied")
+            return TransitionResult(
+                row.operator_id, row.previous, row.status, row.version, True
+            )
+
+        if row.previous in transition.settled:
+            meeting_transition_counters.inc("settled")
+            return TransitionResult(
+                row.operator_id,
+                row.previous,
+                row.previous,
+                row.previous_version,
+                False,
+            )
+
+        if row.previous not in transition.moves:
+            meeting_transition_counters.inc("rejected")
+            return None
+
+        meeting_transition_counters.inc("conflicts")
+
+    raise RuntimeError(f"Meeting {meeting_id} kept changing under {transition.name}")
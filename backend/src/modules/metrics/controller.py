@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from src.core.metrics import collect
+from src.modules.auth.service import GetAdminPrincipal
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/")
+async def get_metrics(admin: GetAdminPrincipal):
+    return collect()
@@ -1,20 +1,49 @@
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from redis import ConnectionPool, Redis
+from redis.client import NEVER_DECODE
+from redis.asyncio import ConnectionPool as AsyncConnectionPool, Redis as AsyncRedis
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from src.database.core import Base, get_db
+from src.database.core import Base, get_db, get_async_db
 from src.main import app
-from src.core.constants import TEST_DATABASE_URL, TEST_REDIS_URL
+from src.core.constants import (
+    TEST_ASYNC_DATABASE_URL,
+    TEST_DATABASE_URL,
+    TEST_REDIS_URL,
+)
 from src.core.redis import get_redis
+from src.core.serialization import redis_serializer
+from src.modules.citizens.asan_fake import FakeAsan, fake_asan
+from src.modules.citizens.asan_service import asan_service
+from src.modules.citizens.cache import citizen_l1
 
 test_engine = create_engine(TEST_DATABASE_URL)
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+test_async_engine = create_async_engine(TEST_ASYNC_DATABASE_URL)
+TestAsyncSessionLocal = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, bind=test_async_engine
+)
+
+FAKE_ASAN_URL = "http://asan.test"
+
+
+def fake_asan_transport(asan: FakeAsan = fake_asan) -> httpx.ASGITransport:
+    """Serves ASAN calls from the fake registry in-process"""
+    return httpx.ASGITransport(app=asan.app)
+
+
 test_redis_pool = ConnectionPool.from_url(
     TEST_REDIS_URL, decode_responses=True, max_connections=10
 )
 
+test_async_redis_pool = AsyncConnectionPool.from_url(
+    TEST_REDIS_URL, decode_responses=True, max_connections=10
+)
+
 
 def test_get_db():
     test_db = TestSessionLocal()
@@ -24,13 +53,19 @@ def test_get_db():
         test_db.close()
 
 
+async def test_get_async_db():
+    async with TestAsyncSessionLocal() as test_db:
+        yield test_db
+
+
 def test_get_redis():
-    try:
-        redis_client = Redis(connection_pool=test_redis_pool)
-        redis_client.ping()
-        return redis_client
-    except Exception as e:
-        raise pytest.fail(f"Failed to connect to test Redis: {e}")
+    return AsyncRedis(connection_pool=test_async_redis_pool)
+
+
+def get_redis_object(redis_client: Redis, key: str, model_type):
+    """Model stored under the key in whatever format the app writes"""
+    value = redis_client.execute_command("GET", key, **{NEVER_DECODE: True})
+    return None if value is None else redis_serializer.loads(value, model_type)
 
 
 @pytest.fixture
@@ -39,18 +74,30 @@ def redis_client():
     try:
         redis_client = Redis(connection_pool=test_redis_pool)
         redis_client.ping()
+        citizen_l1.clear()
         yield redis_client
         redis_client.flushdb()
+        citizen_l1.clear()
     except Exception as e:
         raise pytest.fail(f"Failed to connect to test Redis: {e}")
 
 
+@pytest.fixture
+def db_session():
+    """Sync session on the test database for arranging rows directly"""
+    with TestSessionLocal() as db_session:
+        yield db_session
+
+
 @pytest.fixture(scope="session")
 def testing_client():
     Base.metadata.create_all(bind=test_engine)
 
     app.dependency_overrides[get_db] = test_get_db
+    app.dependency_overrides[get_async_db] = test_get_async_db
     app.dependency_overrides[get_redis] = test_get_redis
+    asan_service.base_url = FAKE_ASAN_URL
+    asan_service.transport = fake_asan_transport()
 
     with TestClient(app) as client:
         yield client
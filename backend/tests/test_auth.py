@@ -1,3 +1,25 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from passlib.hash import bcrypt
+
+from src.core.constants import MAX_USER_SESSIONS, REFRESH_TOKEN_EXPIRE_SECONDS
+from src.core.enums import UserRole
+from src.core.process_pool import BoundedProcessPool
+from src.core.utils.auth import get_password_policy
+from src.database.entities.user import User
+from src.core.utils.tokens import TokenError, build_token_codec, load_signing_keys
+from src.modules.auth.service import AuthService, password_pool, user_cache
+from tests import conftest
+
+
 def test_register_user(testing_client, operator_user_payload):
     response = testing_client.post("/auth/register", json=operator_user_payload)
 
@@ -27,6 +49,21 @@ def test_refresh_token(testing_client, login_response):
     assert data["refreshToken"]
 
 
+def test_refresh_token_redeemed_once_under_concurrency(testing_client, login_response):
+    payload = {"refreshToken": login_response["refreshToken"]}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(
+            executor.map(
+                lambda _: testing_client.post("/auth/refresh", json=payload),
+                range(8),
+            )
+        )
+
+    status_codes = sorted(response.status_code for response in responses)
+    assert status_codes == [200] + [401] * 7
+
+
 def test_logout_user(testing_client, login_response):
     access_token = login_response["accessToken"]
 
@@ -56,14 +93,335 @@ def test_refresh_token_security_flow(
 
     assert new_login_response.status_code == 200
 
+    # A login on another device leaves the first device's session alone
     payload = {"refreshToken": refresh_response.json()["refreshToken"]}
 
-    invalid_token_response = testing_client.post("/auth/refresh", json=payload)
+    other_device_response = testing_client.post("/auth/refresh", json=payload)
+
+    assert other_device_response.status_code == 200
 
-    assert invalid_token_response.status_code == 401
+    replayed_token_response = testing_client.post("/auth/refresh", json=refresh_payload)
+
+    assert replayed_token_response.status_code == 401
 
     headers = {"Authorization": f"Bearer {new_login_response.json()['accessToken']}"}
 
     logout_response = testing_client.post("/auth/logout", headers=headers)
 
     assert logout_response.status_code == 204
+
+
+def test_refresh_token_is_checked_against_its_session(
+    testing_client, login_response, redis_client
+):
+    refresh_token = login_response["refreshToken"]
+    user_id, session_id, _ = refresh_token.split(".")
+
+    # The session hash is the only key the session scripts write
+    assert redis_client.keys("refresh_token:*") == []
+    assert redis_client.hexists(f"user_sessions:{user_id}", session_id)
+
+    for forged_token in (
+        f"{user_id}.{session_id}.forged",
+        f"{user_id}.other-session.forged",
+        f"not-a-uuid.{session_id}.forged",
+        "legacy-token-without-key",
+    ):
+        response = testing_client.post(
+            "/auth/refresh", json={"refreshToken": forged_token}
+        )
+        assert response.status_code == 401
+
+    # Tokens issued with their own key keep working until rotated once
+    legacy_token = "legacy-token"
+    redis_client.hset(
+        f"user_sessions:{user_id}",
+        session_id,
+        f"{int(time.time() * 1000)}:{legacy_token}",
+    )
+    redis_client.set(f"refresh_token:{legacy_token}", f"{user_id}:{session_id}", ex=60)
+    response = testing_client.post("/auth/refresh", json={"refreshToken": legacy_token})
+    assert response.status_code == 200
+    assert response.json()["refreshToken"].startswith(f"{user_id}.{session_id}.")
+
+    response = testing_client.post("/auth/refresh", json={"refreshToken": legacy_token})
+    assert response.status_code == 401
+
+    # Tokens of single session logins name the user only, they are refused
+    single_session_token = "single-session-token"
+    redis_client.set(f"refresh_token:{single_session_token}", user_id, ex=60)
+    response = testing_client.post(
+        "/auth/refresh", json={"refreshToken": single_session_token}
+    )
+    assert response.status_code == 401
+
+
+def test_idle_session_expires_while_another_stays_active(
+    testing_client, login_response, operator_user_payload, redis_client
+):
+    idle_token = login_response["refreshToken"]
+    user_id, idle_session_id, _ = idle_token.split(".")
+    active = testing_client.post(
+        "/auth/login",
+        json={
+            "username": operator_user_payload["username"],
+            "password": operator_user_payload["password"],
+        },
+    ).json()
+
+    # Last rotated longer ago than refresh tokens live
+    rotated_at = int((time.time() - REFRESH_TOKEN_EXPIRE_SECONDS - 1) * 1000)
+    redis_client.hset(
+        f"user_sessions:{user_id}", idle_session_id, f"{rotated_at}:{idle_token}"
+    )
+
+    response = testing_client.post("/auth/refresh", json={"refreshToken": idle_token})
+    assert response.status_code == 401
+
+    # The active device's rotation drops the idle session from the hash
+    response = testing_client.post(
+        "/auth/refresh", json={"refreshToken": active["refreshToken"]}
+    )
+    assert response.status_code == 200
+    assert not redis_client.hexists(f"user_sessions:{user_id}", idle_session_id)
+
+
+def test_logout_revokes_access_token(testing_client, login_response):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    response = testing_client.get("/meetings", headers=headers)
+    assert response.status_code == 200
+
+    logout_response = testing_client.post("/auth/logout", headers=headers)
+    assert logout_response.status_code == 204
+
+    revoked_response = testing_client.get("/meetings", headers=headers)
+    assert revoked_response.status_code == 401
+
+
+def test_cached_user_is_evicted_when_its_sessions_change(
+    testing_client, login_response, db_session
+):
+    access_token = login_response["accessToken"]
+    claims = jwt.get_unverified_claims(access_token)
+    cache_key = (UUID(claims["sub"]), claims["sid"])
+
+    async def current_user(token):
+        bearer_token = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        async with conftest.TestAsyncSessionLocal() as db:
+            return await AuthService(db, conftest.test_get_redis()).get_current_user(
+                bearer_token
+            )
+
+    def wait_for_eviction():
+        deadline = time.monotonic() + 5
+        while user_cache.get(cache_key) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return user_cache.get(cache_key) is None
+
+    user = db_session.query(User).filter(User.id == cache_key[0]).first()
+    try:
+        # The login's own invalidation may land after the first lookup
+        deadline = time.monotonic() + 5
+        while not user_cache.get(cache_key) and time.monotonic() < deadline:
+            assert testing_client.portal.call(current_user, access_token)
+            time.sleep(0.1)
+        assert user_cache.get(cache_key)
+
+        # Changed under the cache, the cached user is served until evicted
+        user.first_name = "Renamed"
+        db_session.commit()
+        cached = testing_client.portal.call(current_user, access_token)
+        assert cached.first_name == "Operator"
+
+        # Rotating the session's refresh token evicts it on every worker
+        response = testing_client.post(
+            "/auth/refresh", json={"refreshToken": login_response["refreshToken"]}
+        )
+        assert response.status_code == 200
+        assert wait_for_eviction()
+
+        access_token = response.json()["accessToken"]
+        reloaded = testing_client.portal.call(current_user, access_token)
+        assert reloaded.first_name == "Renamed"
+        assert user_cache.get(cache_key) == reloaded
+
+        # So does logging out
+        headers = {"Authorization": f"Bearer {access_token}"}
+        assert testing_client.post("/auth/logout", headers=headers).status_code == 204
+        assert wait_for_eviction()
+    finally:
+        user.first_name = "Operator"
+        db_session.commit()
+
+
+def test_logout_one_device_or_all_devices(
+    testing_client, login_response, operator_user_payload
+):
+    login_payload = {
+        "username": operator_user_payload["username"],
+        "password": operator_user_payload["password"],
+    }
+    devices = [login_response] + [
+        testing_client.post("/auth/login", json=login_payload).json() for _ in range(2)
+    ]
+    headers = [
+        {"Authorization": f"Bearer {device['accessToken']}"} for device in devices
+    ]
+
+    response = testing_client.post("/auth/logout", headers=headers[0])
+    assert response.status_code == 204
+
+    assert testing_client.get("/meetings", headers=headers[0]).status_code == 401
+    assert testing_client.get("/meetings", headers=headers[1]).status_code == 200
+
+    response = testing_client.post(
+        "/auth/logout", params={"allDevices": "true"}, headers=headers[1]
+    )
+    assert response.status_code == 204
+
+    for device, device_headers in zip(devices, headers):
+        assert (
+            testing_client.get("/meetings", headers=device_headers).status_code == 401
+        )
+        response = testing_client.post(
+            "/auth/refresh", json={"refreshToken": device["refreshToken"]}
+        )
+        assert response.status_code == 401
+
+
+def test_login_evicts_least_recently_used_session(
+    testing_client, login_response, operator_user_payload
+):
+    login_payload = {
+        "username": operator_user_payload["username"],
+        "password": operator_user_payload["password"],
+    }
+    devices = [
+        testing_client.post("/auth/login", json=login_payload).json()
+        for _ in range(MAX_USER_SESSIONS)
+    ]
+
+    # Refreshing the first device makes the second one the least recently used
+    first_device = testing_client.post(
+        "/auth/refresh", json={"refreshToken": devices[0]["refreshToken"]}
+    ).json()
+    testing_client.post("/auth/login", json=login_payload)
+
+    response = testing_client.post(
+        "/auth/refresh", json={"refreshToken": devices[1]["refreshToken"]}
+    )
+    assert response.status_code == 401
+
+    for device in [first_device] + devices[2:]:
+        response = testing_client.post(
+            "/auth/refresh", json={"refreshToken": device["refreshToken"]}
+        )
+        assert response.status_code == 200
+
+
+def test_login_sheds_load_when_password_pool_is_full(
+    testing_client, login_response, operator_user_payload
+):
+    login_payload = {
+        "username": operator_user_payload["username"],
+        "password": operator_user_payload["password"],
+    }
+
+    max_pending = password_pool.max_pending
+    password_pool.max_pending = 0
+    try:
+        response = testing_client.post("/auth/login", json=login_payload)
+    finally:
+        password_pool.max_pending = max_pending
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    response = testing_client.post("/auth/login", json=login_payload)
+    assert response.status_code == 200
+
+
+def test_process_pool_counts_failed_calls_apart():
+    pool = BoundedProcessPool(max_workers=1, max_pending=2)
+
+    async def scenario():
+        assert await pool.run(int, "7") == 7
+        with pytest.raises(ValueError):
+            await pool.run(int, "seven")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    stats = pool.stats()
+    assert (stats["pending"], stats["completed"], stats["failed"]) == (0, 1, 1)
+
+
+def test_login_rehashes_password_below_policy(testing_client, db_session):
+    user = User(
+        username="legacy",
+        first_name="Legacy",
+        last_name="Operator",
+        password_hash=bcrypt.hash("legacy", rounds=4),
+        role=UserRole.OPERATOR,
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    response = testing_client.post(
+        "/auth/login", json={"username": "legacy", "password": "legacy"}
+    )
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    policy_rounds = get_password_policy().bcrypt_rounds
+    assert user.password_hash.startswith(f"$2b${policy_rounds:02d}$")
+
+    response = testing_client.post(
+        "/auth/login", json={"username": "legacy", "password": "legacy"}
+    )
+    assert response.status_code == 200
+
+
+def test_asymmetric_tokens_verify_across_key_rotation(tmp_path):
+    def write_key(name):
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        (tmp_path / name).write_bytes(
+            private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+        return private_key
+
+    old_key = write_key("2025.pem")
+    old_codec = build_token_codec(
+        "pyjwt", load_signing_keys("EdDSA", keys_dir=str(tmp_path), active_kid="2025")
+    )
+    old_token = old_codec.encode({"sub": "user", "exp": int(time.time()) + 60})
+
+    # Rotation: a new signing key, the old one is kept for verification only
+    write_key("2026.pem")
+    (tmp_path / "2025.pem").unlink()
+    (tmp_path / "2025.pub.pem").write_bytes(
+        old_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    codec = build_token_codec(
+        "pyjwt", load_signing_keys("EdDSA", keys_dir=str(tmp_path), active_kid="2026")
+    )
+
+    assert codec.decode(old_token)["sub"] == "user"
+    assert codec.decode(codec.encode({"sub": "next"}))["sub"] == "next"
+
+    (tmp_path / "2025.pub.pem").unlink()
+    codec = build_token_codec(
+        "pyjwt", load_signing_keys("EdDSA", keys_dir=str(tmp_path), active_kid="2026")
+    )
+    with pytest.raises(TokenError):
+        codec.decode(old_token)
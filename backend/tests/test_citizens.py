@@ -1,9 +1,29 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from src.core.domain.citizen import CitizenDomain
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
-from src.core.enums import RedisKeys
+import pytest
+import zstandard
+
+from src.core.circuit_breaker import CircuitBreaker
+from src.core.constants import CITIZEN_NOT_FOUND_EXPIRE_SECONDS
+from src.core.enums import RedisChannels, RedisKeys
+from src.core.exceptions import UpstreamUnavailableError
 from src.core.redis import get_redis_value
-from src.modules.citizens.model import CitizenResponse
+from src.core.serialization import RedisSerializer, SerializationError
+from src.main import app
+from src.modules.citizens import asan_service as asan_service_module
+from src.database.entities.citizen import Citizen
+from src.database.entities.meeting import Meeting
+from src.database.entities.user import User
+from src.modules.citizens.asan_fake import FakeAsan
+from src.modules.citizens.asan_service import AsanService, get_asan_service
+from src.modules.citizens.cache import citizen_l1
+from src.modules.citizens.model import CitizenRedisData, CitizenResponse
+from src.modules.citizens.prefetch import citizen_prefetch_counters, prefetch_citizens
+from tests import conftest
 
 
 def test_get_citizen(testing_client, login_response):
@@ -52,11 +72,428 @@ def test_get_citizen_redis_caching(testing_client, login_response, redis_client)
     redis_client.delete("citizen:2dnxyd8")
 
     # Verify cache is empty
-    cached_data = redis_client.get("citizen:2dnxyd8")
-    assert cached_data is None
+    cached_data = redis_client.exists("citizen:2dnxyd8")
+    assert not cached_data
 
     response1 = testing_client.get("/citizens/2DNXYD8", headers=headers)
     assert response1.status_code == 200
 
-    cached_data = redis_client.get("citizen:2dnxyd8")
+    cached_data = conftest.get_redis_object(
+        redis_client, "citizen:2dnxyd8", CitizenRedisData
+    )
     assert cached_data is not None
+
+
+def test_get_citizen_coalesces_concurrent_lookups(
+    testing_client, login_response, redis_client
+):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+    upstream_calls = []
+
+    class CountingAsanService(AsanService):
+        async def get_citizen(self, pin_code: str) -> CitizenDomain:
+            upstream_calls.append(pin_code)
+            return await super().get_citizen(pin_code)
+
+    redis_client.delete("citizen:2dnxyd8")
+    counting_asan_service = CountingAsanService(
+        conftest.FAKE_ASAN_URL, conftest.fake_asan_transport()
+    )
+    app.dependency_overrides[get_asan_service] = lambda: counting_asan_service
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(
+                executor.map(
+                    lambda _: testing_client.get("/citizens/2DNXYD8", headers=headers),
+                    range(8),
+                )
+            )
+    finally:
+        del app.dependency_overrides[get_asan_service]
+
+    assert all(response.status_code == 200 for response in responses)
+    assert upstream_calls == ["2dnxyd8"]
+
+
+def test_get_citizen_not_found_is_cached(testing_client, login_response, redis_client):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    response = testing_client.get("/citizens/ABC1234", headers=headers)
+    assert response.status_code == 404
+
+    cached_data = conftest.get_redis_object(
+        redis_client, "citizen:abc1234", CitizenRedisData
+    )
+    assert cached_data.citizen is None
+    assert 0 < redis_client.ttl("citizen:abc1234") <= CITIZEN_NOT_FOUND_EXPIRE_SECONDS
+
+    cached_response = testing_client.get("/citizens/ABC1234", headers=headers)
+    assert cached_response.status_code == 404
+
+
+def test_get_citizen_serves_stale_and_refreshes(
+    testing_client, login_response, redis_client
+):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    stale_citizen = CitizenRedisData(
+        citizen=CitizenDomain(
+            pin_code="2DNXYD8",
+            first_name="Stale",
+            last_name="Jafarov",
+            patronymic="Roman",
+            document_number="AA1234567",
+            address_line="Azerbaijan, Baku",
+            date_of_birth=datetime(2002, 3, 12, tzinfo=timezone.utc),
+        ),
+        fresh_until=time.time() - 1,
+    )
+    redis_client.set("citizen:2dnxyd8", stale_citizen.model_dump_json())
+
+    response = testing_client.get("/citizens/2DNXYD8", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["firstName"] == "Stale"
+
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        cached_data = conftest.get_redis_object(
+            redis_client, "citizen:2dnxyd8", CitizenRedisData
+        )
+        if cached_data.fresh_until > time.time():
+            break
+        time.sleep(0.1)
+
+    assert cached_data.citizen.first_name == "Ahmad"
+
+
+def test_get_citizen_l1_invalidation(testing_client, login_response, redis_client):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    testing_client.get("/citizens/2DNXYD8", headers=headers)
+
+    # The fetch's own invalidation may arrive after a read refilled L1
+    deadline = time.time() + 5
+    while citizen_l1.get("2dnxyd8") is None and time.time() < deadline:
+        testing_client.get("/citizens/2DNXYD8", headers=headers)
+        time.sleep(0.05)
+    assert citizen_l1.get("2dnxyd8") is not None
+
+    redis_client.publish(RedisChannels.CITIZEN_INVALIDATION.value, "2dnxyd8")
+
+    deadline = time.time() + 5
+    while citizen_l1.get("2dnxyd8") is not None and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert citizen_l1.get("2dnxyd8") is None
+
+
+def fake_asan_service(fake_asan: FakeAsan, **kwargs) -> AsanService:
+    return AsanService(
+        conftest.FAKE_ASAN_URL, conftest.fake_asan_transport(fake_asan), **kwargs
+    )
+
+
+def test_asan_service_retries_transient_failures():
+    fake_asan = FakeAsan(latency=0)
+    fake_asan.failures = 2
+    asan_service = fake_asan_service(fake_asan)
+
+    async def scenario():
+        try:
+            return await asan_service.get_citizen("2dnxyd8")
+        finally:
+            await asan_service.aclose()
+
+    citizen = asyncio.run(scenario())
+
+    assert citizen.pin_code == "2DNXYD8"
+    assert fake_asan.calls == 3
+
+    stats = asan_service.stats()
+    assert stats["retries"] == 2
+    assert stats["latency"]["http_503"]["count"] == 2
+    assert stats["latency"]["ok"]["count"] == 1
+    assert stats["circuit"]["state"] == CircuitBreaker.CLOSED
+
+
+def test_asan_service_circuit_breaker_fails_fast():
+    fake_asan = FakeAsan(latency=0)
+    fake_asan.failures = 100
+    asan_service = fake_asan_service(
+        fake_asan, breaker=CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    )
+
+    async def scenario():
+        try:
+            for _ in range(2):
+                with pytest.raises(UpstreamUnavailableError):
+                    await asan_service.get_citizen("2dnxyd8")
+        finally:
+            await asan_service.aclose()
+
+    asyncio.run(scenario())
+
+    # The second call never reached upstream
+    assert fake_asan.calls == 3
+
+    stats = asan_service.stats()
+    assert stats["circuit"]["state"] == CircuitBreaker.OPEN
+    assert stats["latency"]["rejected"]["count"] == 1
+
+
+def test_asan_service_circuit_ignores_rejected_requests():
+    fake_asan = FakeAsan(latency=0)
+    fake_asan.failures = 100
+    fake_asan.failure_status = 400
+    asan_service = fake_asan_service(
+        fake_asan, breaker=CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    )
+
+    async def scenario():
+        try:
+            for _ in range(5):
+                with pytest.raises(UpstreamUnavailableError):
+                    await asan_service.get_citizen("2dnxyd8")
+        finally:
+            await asan_service.aclose()
+
+    asyncio.run(scenario())
+
+    # Not retried, and bad requests do not shut ASAN off for everyone
+    assert fake_asan.calls == 5
+    stats = asan_service.stats()
+    assert stats["circuit"]["state"] == CircuitBreaker.CLOSED
+    assert stats["latency"]["http_400"]["count"] == 5
+
+
+def test_asan_service_gives_up_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(asan_service_module, "ASAN_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(asan_service_module, "ASAN_DEADLINE_SECONDS", 0.3)
+    asan_service = fake_asan_service(FakeAsan(latency=10))
+
+    async def scenario():
+        try:
+            with pytest.raises(UpstreamUnavailableError):
+                await asan_service.get_citizen("2dnxyd8")
+        finally:
+            await asan_service.aclose()
+
+    start = time.monotonic()
+    asyncio.run(scenario())
+
+    assert time.monotonic() - start < 1
+    assert asan_service.stats()["latency"]["timeout"]["count"] >= 1
+
+
+def test_prefetch_warms_citizens_of_upcoming_meetings(
+    testing_client, login_response, redis_client, db_session
+):
+    operator = db_session.query(User).filter(User.username == "operator").first()
+    now = datetime.now(timezone.utc)
+
+    citizens = {}
+    for pin_code, starts_in in [
+        ("PREF001", timedelta(minutes=10)),
+        ("PREF002", timedelta(days=3)),
+        ("PREF003", timedelta(minutes=10)),
+    ]:
+        citizen = Citizen(
+            first_name="Prefetched",
+            last_name="Citizen",
+            patronymic="Prefetched",
+            pin_code=pin_code,
+            phone="994501234567",
+        )
+        db_session.add(citizen)
+        db_session.flush()
+        db_session.add(
+            Meeting(
+                operator_id=operator.id,
+                citizen_id=citizen.id,
+                scheduled_at=now + starts_in,
+            )
+        )
+        citizens[pin_code.lower()] = CitizenDomain(
+            pin_code=pin_code,
+            first_name="Prefetched",
+            last_name="Citizen",
+            patronymic="Prefetched",
+            document_number="AA7654321",
+            address_line="Azerbaijan, Baku",
+            date_of_birth=datetime(1990, 1, 1, tzinfo=timezone.utc),
+        )
+    db_session.commit()
+
+    # Fresh now, though not anymore when its meeting starts
+    redis_client.set(
+        "citizen:pref001",
+        CitizenRedisData(
+            citizen=citizens["pref001"], fresh_until=time.time() + 60
+        ).model_dump_json(),
+    )
+    # Already known not to exist, the prefetch leaves it to the negative cache
+    del citizens["pref003"]
+    redis_client.set(
+        "citizen:pref003",
+        CitizenRedisData(fresh_until=time.time() + 60).model_dump_json(),
+    )
+
+    fake_asan = FakeAsan(latency=0, citizens=citizens)
+    asan_service = fake_asan_service(fake_asan)
+
+    async def prefetch_pass():
+        async with conftest.TestAsyncSessionLocal() as db:
+            return await prefetch_citizens(db, conftest.test_get_redis(), asan_service)
+
+    try:
+        assert testing_client.portal.call(prefetch_pass) == 1
+        # The lease outlives the pass, another pass in the same interval skips
+        skipped = citizen_prefetch_counters.snapshot()["skipped_passes"]
+        assert testing_client.portal.call(prefetch_pass) == 0
+        assert citizen_prefetch_counters.snapshot()["skipped_passes"] == skipped + 1
+
+        # Fresh until after the meeting, the next interval's pass leaves it alone
+        redis_client.delete(f"{RedisKeys.CITIZEN_PREFETCH_LOCK.value}:pass")
+        assert testing_client.portal.call(prefetch_pass) == 0
+    finally:
+        testing_client.portal.call(asan_service.aclose)
+        db_session.query(Meeting).filter(
+            Meeting.citizen_id.in_(
+                db_session.query(Citizen.id).filter(Citizen.pin_code.like("PREF%"))
+            )
+        ).delete(synchronize_session=False)
+        db_session.query(Citizen).filter(Citizen.pin_code.like("PREF%")).delete(
+            synchronize_session=False
+        )
+        db_session.commit()
+
+    assert fake_asan.calls == 1
+    assert redis_client.exists("citizen:pref001")
+    assert not redis_client.exists("citizen:pref002")
+
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+    citizen_l1.clear()
+    response = testing_client.get("/citizens/PREF001", headers=headers)
+    assert response.status_code == 200
+    assert fake_asan.calls == 1
+
+
+def test_get_citizens_batch(testing_client, login_response, redis_client):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+    payload = {"pinCodes": ["2DNXYD8", "ABC1234", "2dnxyd8"]}
+
+    response = testing_client.post("/citizens/batch", json=payload, headers=headers)
+    assert response.status_code == 200
+
+    items = response.json()["items"]
+    assert items.keys() == {"2DNXYD8", "ABC1234"}
+    assert items["2DNXYD8"]["citizen"]["firstName"] == "Ahmad"
+    assert items["ABC1234"]["citizen"] is None
+    assert items["ABC1234"]["error"]["statusCode"] == 404
+
+    cached_citizens = [
+        conftest.get_redis_object(redis_client, key, CitizenRedisData)
+        for key in ["citizen:2dnxyd8", "citizen:abc1234"]
+    ]
+    assert cached_citizens[0].citizen is not None
+    assert cached_citizens[1].citizen is None
+
+    upstream_calls = []
+
+    class CountingAsanService(AsanService):
+        async def get_citizen(self, pin_code: str) -> CitizenDomain:
+            upstream_calls.append(pin_code)
+            return await super().get_citizen(pin_code)
+
+    counting_asan_service = CountingAsanService(
+        conftest.FAKE_ASAN_URL, conftest.fake_asan_transport()
+    )
+    app.dependency_overrides[get_asan_service] = lambda: counting_asan_service
+    try:
+        response = testing_client.post("/citizens/batch", json=payload, headers=headers)
+    finally:
+        del app.dependency_overrides[get_asan_service]
+
+    assert response.json()["items"] == items
+    assert upstream_calls == []
+
+    response = testing_client.post(
+        "/citizens/batch", json={"pinCodes": ["ABCD12"]}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+def test_get_citizens_batch_waits_for_another_workers_fetch(
+    testing_client, login_response, redis_client
+):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+    upstream_calls = []
+
+    class CountingAsanService(AsanService):
+        async def get_citizen(self, pin_code: str) -> CitizenDomain:
+            upstream_calls.append(pin_code)
+            return await super().get_citizen(pin_code)
+
+    counting_asan_service = CountingAsanService(
+        conftest.FAKE_ASAN_URL, conftest.fake_asan_transport()
+    )
+    app.dependency_overrides[get_asan_service] = lambda: counting_asan_service
+
+    # Another worker holds the PIN's lease and caches the citizen shortly
+    redis_client.set("citizen_lock:2dnxyd8", "other-worker", ex=5)
+    cached_citizen = CitizenRedisData(
+        citizen=FakeAsan().citizens["2dnxyd8"], fresh_until=time.time() + 60
+    )
+
+    def cache_from_other_worker():
+        time.sleep(0.3)
+        redis_client.set("citizen:2dnxyd8", cached_citizen.model_dump_json())
+
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(cache_from_other_worker)
+            response = testing_client.post(
+                "/citizens/batch", json={"pinCodes": ["2DNXYD8"]}, headers=headers
+            )
+    finally:
+        del app.dependency_overrides[get_asan_service]
+
+    assert response.status_code == 200
+    assert response.json()["items"]["2DNXYD8"]["citizen"]["firstName"] == "Ahmad"
+    assert upstream_calls == []
+
+
+def test_redis_serializers_read_every_format():
+    citizen_redis = CitizenRedisData(
+        citizen=CitizenDomain(
+            pin_code="2DNXYD8",
+            first_name="Ahmad",
+            last_name="Jafarov",
+            patronymic="Roman",
+            document_number="AA1234567",
+            address_line="Azerbaijan, Baku",
+            date_of_birth=datetime(2002, 3, 12, tzinfo=timezone.utc),
+        ),
+        fresh_until=time.time(),
+    )
+    samples = [RedisSerializer("msgpack").dumps(citizen_redis)[1:]] * 10
+    zstd_dict = zstandard.train_dictionary(1024, samples * 10).as_bytes()
+
+    writers = [
+        RedisSerializer("json"),
+        RedisSerializer("orjson"),
+        RedisSerializer("msgpack"),
+        RedisSerializer("msgpack", zstd_dict),
+    ]
+    reader = RedisSerializer("msgpack", zstd_dict)
+
+    for writer in writers:
+        value = writer.dumps(citizen_redis)
+        assert reader.loads(value, CitizenRedisData) == citizen_redis
+
+    assert len(writers[2].dumps(citizen_redis)) < len(writers[0].dumps(citizen_redis))
+
+    # A schema version from a newer release reads as unreadable, not garbage
+    with pytest.raises(SerializationError):
+        reader.loads(bytes([0xF2]) + value[1:], CitizenRedisData)
@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.core.constants import TEST_DATABASE_URL
+from src.database.pool import InstrumentedQueuePool, PoolTelemetry
+
+
+def test_pool_telemetry_tracks_waits_overflow_and_lifetimes():
+    engine = create_engine(
+        TEST_DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.1,
+    )
+    # Unnamed, the throwaway pool stays out of the app's /metrics
+    telemetry = PoolTelemetry()
+    telemetry.attach(engine)
+
+    try:
+        first = engine.connect()
+        second = engine.connect()
+        first.execute(text("SELECT 1"))
+
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+        stats = telemetry.snapshot()
+        assert stats["checked_out"] == 2
+        assert stats["overflow"] == 1
+        assert stats["peak_overflow"] == 1
+        assert stats["checkouts"] == 2
+        assert stats["waits"] == 1
+        assert stats["wait_timeouts"] == 1
+        assert stats["checkout_latency"]["timeout"]["count"] == 1
+
+        first.close()
+        second.close()
+    finally:
+        engine.dispose()
+
+    stats = telemetry.snapshot()
+    assert stats["connects"] == 2
+    # The overflow connection is closed on checkin, the other on dispose
+    assert stats["connection_lifetime"]["closed"]["count"] == 2
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert telemetry.snapshot()["checkouts"] == 3
+    engine.dispose()
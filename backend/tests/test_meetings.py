@@ -1,5 +1,22 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-import json
+import time
+from uuid import uuid4
+
+from src.core.domain.citizen import CitizenDomain
+from src.core.enums import MeetingStatus
+from src.database.entities.citizen import Citizen
+from src.database.entities.meeting import Meeting
+from src.database.entities.user import User
+from src.modules.citizens.model import CitizenRedisData
+from src.core.serialization import redis_serializer
+from src.modules.meetings import transitions
+from src.modules.meetings.events import MeetingEventHub, meeting_event_hub
+from src.modules.meetings.model import MeetingRedisData, MeetingStatusEvent
+from src.modules.meetings.service import MeetingService
+from tests import conftest
+from tests.conftest import get_redis_object
 
 
 def test_create_meeting(testing_client, login_response, redis_client):
@@ -47,7 +64,7 @@ def test_create_meeting(testing_client, login_response, redis_client):
     meeting_id = str(meeting_data["id"])
     redis_key = f"meeting:{meeting_id}"
 
-    meeting_redis_data = redis_client.get(redis_key)
+    meeting_redis_data = get_redis_object(redis_client, redis_key, MeetingRedisData)
     assert (
         meeting_redis_data is not None
     ), f"Meeting data not found in Redis with key: {redis_key}"
@@ -84,6 +101,115 @@ def test_create_duplicate_meeting(testing_client, login_response):
     assert duplicate_meeting_response.status_code == 409
 
 
+def test_create_meeting_concurrent_duplicates(
+    testing_client, login_response, redis_client
+):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    cached_citizen = CitizenRedisData(
+        citizen=CitizenDomain(
+            pin_code="RACE001",
+            first_name="Race",
+            last_name="Citizen",
+            patronymic="Race",
+            document_number="AA7654321",
+            address_line="Azerbaijan, Baku",
+            date_of_birth=datetime(2000, 1, 1, tzinfo=timezone.utc),
+        ),
+        fresh_until=time.time() + 60,
+    )
+    redis_client.set("citizen:race001", cached_citizen.model_dump_json())
+
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    meeting_payload = {
+        "citizenPinCode": "RACE001",
+        "citizenPhone": "994501234567",
+        "scheduledAt": tomorrow.isoformat().replace("+00:00", "Z"),
+    }
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(
+            executor.map(
+                lambda _: testing_client.post(
+                    "/meetings", json=meeting_payload, headers=headers
+                ),
+                range(8),
+            )
+        )
+
+    status_codes = sorted(response.status_code for response in responses)
+    assert status_codes == [201] + [409] * 7
+
+
+def test_create_meetings_bulk(testing_client, login_response, redis_client):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    for pin_code in ("BULK001", "BULK002", "BULK003"):
+        cached_citizen = CitizenRedisData(
+            citizen=CitizenDomain(
+                pin_code=pin_code,
+                first_name="Bulk",
+                last_name="Citizen",
+                patronymic="Bulk",
+                document_number="AA7654321",
+                address_line="Azerbaijan, Baku",
+                date_of_birth=datetime(2000, 1, 1, tzinfo=timezone.utc),
+            ),
+            fresh_until=time.time() + 60,
+        )
+        redis_client.set(
+            f"citizen:{pin_code.lower()}", cached_citizen.model_dump_json()
+        )
+
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    meeting_payloads = [
+        {
+            "citizenPinCode": pin_code,
+            "citizenPhone": "994501234567",
+            "scheduledAt": tomorrow.isoformat().replace("+00:00", "Z"),
+        }
+        for pin_code in ("bulk001", "BULK002", "BULK001", "ABC1234")
+    ]
+    # Its OTP would already have expired, the rest of the batch is still booked
+    two_hours_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+    meeting_payloads.append(
+        {
+            "citizenPinCode": "BULK003",
+            "citizenPhone": "994501234567",
+            "scheduledAt": two_hours_ago.isoformat().replace("+00:00", "Z"),
+        }
+    )
+
+    response = testing_client.post(
+        "/meetings/bulk", json=meeting_payloads, headers=headers
+    )
+    assert response.status_code == 200
+
+    items = response.json()["items"]
+    assert [item["index"] for item in items] == [0, 1, 2, 3, 4]
+    assert items[0]["meeting"]["pinCode"] == "BULK001"
+    assert items[1]["meeting"]["pinCode"] == "BULK002"
+    assert items[2]["error"]["statusCode"] == 409
+    assert items[2]["meeting"] is None
+    assert items[3]["error"]["statusCode"] == 404
+    assert items[4]["error"]["statusCode"] == 400
+    assert items[4]["meeting"] is None
+
+    for item in items[:2]:
+        meeting_redis = get_redis_object(
+            redis_client, f"meeting:{item['meeting']['id']}", MeetingRedisData
+        )
+        assert meeting_redis.citizen_data.pin_code == item["meeting"]["pinCode"]
+
+    response = testing_client.post(
+        "/meetings/bulk", json=meeting_payloads[:1], headers=headers
+    )
+    assert response.json()["items"][0]["error"]["statusCode"] == 409
+
+    response = testing_client.post("/meetings/bulk", json=[], headers=headers)
+    assert response.status_code == 422
+
+
 # def test_join_meeting_operator(testing_client, login_response, redis_client):
 #     # Get access token from login
 #     access_token = login_response["accessToken"]
@@ -180,3 +306,309 @@ def test_create_duplicate_meeting(testing_client, login_response):
 #     meetings = meetings_response.json()
 #     updated_meeting = next(m for m in meetings if m["id"] == meeting_id)
 #     assert updated_meeting["status"] == "IN_PROGRESS"
+
+
+def test_meeting_status_transitions(
+    testing_client, login_response, db_session, redis_client
+):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    operator = db_session.query(User).filter(User.username == "operator").first()
+    citizen = Citizen(
+        first_name="Joining",
+        last_name="Citizen",
+        patronymic="Joining",
+        pin_code="JNM0001",
+        phone="994501234567",
+    )
+    db_session.add(citizen)
+    db_session.flush()
+    meeting = Meeting(
+        operator_id=operator.id,
+        citizen_id=citizen.id,
+        scheduled_at=datetime.now(timezone.utc) + timedelta(hours=1),
+    )
+    db_session.add(meeting)
+    db_session.commit()
+
+    redis_client.set(
+        f"meeting:{meeting.id}",
+        redis_serializer.dumps(
+            MeetingRedisData(
+                otp="123456",
+                citizen_data=CitizenDomain(
+                    pin_code="JNM0001",
+                    first_name="Joining",
+                    last_name="Citizen",
+                    patronymic="Joining",
+                    document_number="AA7654321",
+                    address_line="Azerbaijan, Baku",
+                    date_of_birth=datetime(2000, 1, 1, tzinfo=timezone.utc),
+                ),
+            )
+        ),
+    )
+
+    def status():
+        db_session.expire_all()
+        return db_session.get(Meeting, meeting.id).status
+
+    response = testing_client.post(
+        f"/meetings/{meeting.id}/join/operator", headers=headers
+    )
+    assert response.status_code == 200
+    assert status() == MeetingStatus.PENDING
+
+    response = testing_client.post(
+        f"/meetings/{meeting.id}/join/citizen", json={"otp": "000000"}
+    )
+    assert response.status_code == 400
+    assert status() == MeetingStatus.PENDING
+
+    response = testing_client.post(
+        f"/meetings/{meeting.id}/join/citizen", json={"otp": "123456"}
+    )
+    assert response.status_code == 200
+    assert "jitsiToken" in response.json()
+    assert status() == MeetingStatus.IN_PROGRESS
+
+    # Rejoining a meeting in progress leaves it as is
+    response = testing_client.post(
+        f"/meetings/{meeting.id}/join/operator", headers=headers
+    )
+    assert response.status_code == 200
+    assert status() == MeetingStatus.IN_PROGRESS
+
+    response = testing_client.post(f"/meetings/{meeting.id}/finish", headers=headers)
+    assert response.status_code == 204
+    assert status() == MeetingStatus.FINISHED
+    assert not redis_client.exists(f"meeting:{meeting.id}")
+
+    response = testing_client.post(f"/meetings/{meeting.id}/finish", headers=headers)
+    assert response.status_code == 204
+
+    response = testing_client.post(
+        f"/meetings/{meeting.id}/join/operator", headers=headers
+    )
+    assert response.status_code == 404
+
+    response = testing_client.post(
+        f"/meetings/{uuid4()}/join/operator", headers=headers
+    )
+    assert response.status_code == 404
+
+
+def test_concurrent_joins_apply_every_transition_once(
+    testing_client, login_response, db_session, monkeypatch
+):
+    operator = db_session.query(User).filter(User.username == "operator").first()
+    meeting_ids = []
+    for index in range(200):
+        citizen = Citizen(
+            first_name="Racing",
+            last_name="Citizen",
+            patronymic="Racing",
+            pin_code=f"STR{index:04d}",
+            phone="994501234567",
+        )
+        db_session.add(citizen)
+        db_session.flush()
+        meeting = Meeting(
+            operator_id=operator.id,
+            citizen_id=citizen.id,
+            scheduled_at=datetime.now(timezone.utc) + timedelta(hours=1),
+        )
+        db_session.add(meeting)
+        db_session.flush()
+        meeting_ids.append(meeting.id)
+    db_session.commit()
+
+    events = []
+
+    async def record(event, redis_client):
+        events.append(event)
+
+    monkeypatch.setattr(transitions, "_listeners", [record])
+    conflicts = transitions.meeting_transition_counters.snapshot()["conflicts"]
+
+    async def join(meeting_id):
+        async with conftest.TestAsyncSessionLocal() as db:
+            return await MeetingService(db, None).join_meeting(meeting_id)
+
+    async def join_all():
+        # Operator and citizen joins racing, ten per meeting
+        return await asyncio.gather(
+            *(join(meeting_id) for meeting_id in meeting_ids for _ in range(10))
+        )
+
+    results = testing_client.portal.call(join_all)
+
+    assert sum(result.changed for result in results) == 2 * len(meeting_ids)
+    assert {result.status for result in results} == {
+        MeetingStatus.PENDING,
+        MeetingStatus.IN_PROGRESS,
+    }
+
+    db_session.expire_all()
+    meetings = db_session.query(Meeting).filter(Meeting.id.in_(meeting_ids)).all()
+    assert {meeting.status for meeting in meetings} == {MeetingStatus.IN_PROGRESS}
+    # Created at version 1, moved twice
+    assert {meeting.version for meeting in meetings} == {3}
+
+    moves = {}
+    for event in events:
+        moves.setdefault(event.meeting_id, []).append(
+            (event.previous, event.status, event.version)
+        )
+    assert len(moves) == len(meeting_ids)
+    for meeting_moves in moves.values():
+        assert sorted(meeting_moves, key=lambda move: move[2]) == [
+            (MeetingStatus.CREATED, MeetingStatus.PENDING, 2),
+            (MeetingStatus.PENDING, MeetingStatus.IN_PROGRESS, 3),
+        ]
+
+    # Losers of a race retried instead of failing or skipping the move
+    assert transitions.meeting_transition_counters.snapshot()["conflicts"] > conflicts
+
+
+def test_join_pushes_status_to_operator_streams(
+    testing_client, login_response, db_session
+):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    operator = db_session.query(User).filter(User.username == "operator").first()
+    citizen = Citizen(
+        first_name="Pushed",
+        last_name="Citizen",
+        patronymic="Pushed",
+        pin_code="PSH0001",
+        phone="994501234567",
+    )
+    db_session.add(citizen)
+    db_session.flush()
+    meeting = Meeting(
+        operator_id=operator.id,
+        citizen_id=citizen.id,
+        scheduled_at=datetime.now(timezone.utc) + timedelta(hours=1),
+    )
+    db_session.add(meeting)
+    db_session.commit()
+
+    operator_stream = meeting_event_hub.stream(operator.id)
+    other_stream = meeting_event_hub.stream(uuid4())
+
+    async def next_item(stream):
+        return await asyncio.wait_for(anext(stream), 5)
+
+    async def pending_item(stream):
+        try:
+            return await asyncio.wait_for(anext(stream), 0.2)
+        except TimeoutError:
+            return None
+
+    assert testing_client.portal.call(next_item, operator_stream) == ": connected\n\n"
+    assert testing_client.portal.call(next_item, other_stream) == ": connected\n\n"
+    assert meeting_event_hub.stats()["connections"] >= 2
+
+    response = testing_client.post(
+        f"/meetings/{meeting.id}/join/operator", headers=headers
+    )
+    assert response.status_code == 200
+
+    item = testing_client.portal.call(next_item, operator_stream)
+    assert item.startswith(f"id: {meeting.id}:2\nevent: meeting_status\ndata: ")
+    event = MeetingStatusEvent.model_validate_json(item.split("data: ", 1)[1])
+    assert event.previous_status == MeetingStatus.CREATED
+    assert event.status == MeetingStatus.PENDING
+
+    # Streams of other operators do not see the meeting
+    assert testing_client.portal.call(pending_item, other_stream) is None
+
+    testing_client.portal.call(operator_stream.aclose)
+    testing_client.portal.call(other_stream.aclose)
+    stats = meeting_event_hub.stats()
+    assert stats["fanout_latency"]["delivered"]["count"] >= 1
+
+
+def test_slow_meeting_stream_is_closed():
+    hub = MeetingEventHub(queue_size=2)
+    operator_id = uuid4()
+    message = MeetingStatusEvent(
+        meeting_id=uuid4(),
+        operator_id=operator_id,
+        previous_status=MeetingStatus.CREATED,
+        status=MeetingStatus.PENDING,
+        version=2,
+        changed_at=datetime.now(timezone.utc),
+        published_at=time.time(),
+    ).model_dump_json(by_alias=True)
+
+    async def scenario():
+        stream = hub.stream(operator_id)
+        await anext(stream)
+        for _ in range(5):
+            hub.dispatch(message)
+        return [item async for item in stream]
+
+    items = asyncio.run(scenario())
+
+    # The queued events are delivered, then the stream ends for a resync
+    assert len(items) == 2
+    assert hub.stats()["overflows"] == 1
+    assert hub.stats()["connections"] == 0
+
+
+def test_get_meetings_pagination(testing_client, login_response, db_session):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    operator = db_session.query(User).filter(User.username == "operator").first()
+    base_time = datetime(2100, 1, 1, tzinfo=timezone.utc)
+
+    for index in range(5):
+        citizen = Citizen(
+            first_name="Paged",
+            last_name="Citizen",
+            patronymic="Paged",
+            pin_code=f"PAGE00{index}",
+            phone="994501234567",
+        )
+        db_session.add(citizen)
+        db_session.flush()
+        db_session.add(
+            Meeting(
+                operator_id=operator.id,
+                citizen_id=citizen.id,
+                scheduled_at=base_time + timedelta(hours=index),
+                status=(
+                    MeetingStatus.FINISHED if index == 4 else MeetingStatus.CREATED
+                ),
+            )
+        )
+    db_session.commit()
+
+    params = {"limit": 2, "scheduledFrom": base_time.isoformat()}
+    pages = []
+    while True:
+        response = testing_client.get("/meetings", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        pages.append(page["items"])
+        if not page["nextCursor"]:
+            break
+        params["cursor"] = page["nextCursor"]
+
+    assert [len(items) for items in pages] == [2, 2, 1]
+    pin_codes = [meeting["pinCode"] for items in pages for meeting in items]
+    assert pin_codes == [f"PAGE00{index}" for index in range(5)]
+
+    response = testing_client.get(
+        "/meetings",
+        params={"status": "FINISHED", "scheduledFrom": base_time.isoformat()},
+        headers=headers,
+    )
+    assert [meeting["pinCode"] for meeting in response.json()["items"]] == ["PAGE004"]
+
+    response = testing_client.get(
+        "/meetings", params={"cursor": "not-a-cursor"}, headers=headers
+    )
+    assert response.status_code == 400
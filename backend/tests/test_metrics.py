@@ -0,0 +1,28 @@
+def test_get_metrics_requires_admin(testing_client, login_response):
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    response = testing_client.get("/metrics", headers=headers)
+
+    assert response.status_code == 403
+
+
+def test_get_metrics(testing_client):
+    admin_payload = {
+        "username": "admin",
+        "password": "admin",
+        "firstName": "Admin",
+        "lastName": "Admin",
+        "userRole": "ADMIN",
+    }
+    testing_client.post("/auth/register", json=admin_payload)
+
+    login_payload = {"username": "admin", "password": "admin"}
+    login_response = testing_client.post("/auth/login", json=login_payload).json()
+    headers = {"Authorization": f"Bearer {login_response['accessToken']}"}
+
+    response = testing_client.get("/metrics", headers=headers)
+
+    assert response.status_code == 200
+
+    user_cache_stats = response.json()["user_cache"]
+    assert {"size", "hits", "misses", "evictions"} <= user_cache_stats.keys()
@@ -0,0 +1,33 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+# Hot queries of the citizen and meeting services, planned with sequential
+# scans disabled: the plan only contains one if no index can serve it
+HOT_QUERIES = {
+    "citizen by pin code": "SELECT id FROM citizens WHERE pin_code = '2DNXYD8'",
+    "operator meetings page": (
+        f"SELECT id FROM meetings WHERE operator_id = '{uuid4()}' "
+        "AND (scheduled_at, id) > (now(), gen_random_uuid()) "
+        "ORDER BY scheduled_at, id LIMIT 51"
+    ),
+    "active meeting of citizen": (
+        f"SELECT id FROM meetings WHERE citizen_id = '{uuid4()}' "
+        "AND status NOT IN ('FINISHED', 'CANCELLED')"
+    ),
+    "upcoming active meetings": (
+        "SELECT citizen_id FROM meetings WHERE status NOT IN ('FINISHED', 'CANCELLED') "
+        "AND scheduled_at >= now() AND scheduled_at < now() + interval '1 hour'"
+    ),
+}
+
+
+@pytest.mark.parametrize("query", HOT_QUERIES.values(), ids=HOT_QUERIES.keys())
+def test_hot_query_uses_index(testing_client, db_session, query):
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+
+    plan = "\n".join(db_session.execute(text(f"EXPLAIN {query}")).scalars())
+    db_session.rollback()
+
+    assert "Seq Scan" not in plan, plan
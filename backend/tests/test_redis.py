@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+from redis.asyncio import Redis, RedisCluster
+from redis.client import NEVER_DECODE
+from redis.connection import Encoder
+from redis.exceptions import ConnectionError, RedisClusterException
+
+from src.core.constants import TEST_REDIS_URL
+from src.core.enums import RedisKeys
+from src.core.redis import (
+    InstrumentedConnectionPool,
+    get_redis_objects,
+    get_redis_values,
+)
+from src.core.serialization import redis_serializer
+
+
+def test_connection_pool_queues_callers_beyond_its_size():
+    async def scenario():
+        pool = InstrumentedConnectionPool.from_url(
+            TEST_REDIS_URL, max_connections=2, timeout=5, decode_responses=True
+        )
+        client = Redis(connection_pool=pool)
+        try:
+            # Each call holds its connection for a moment, 8 callers share 2
+            results = await asyncio.gather(
+                *(client.blpop(f"pool_test:{index}", 0.1) for index in range(8))
+            )
+            stats = pool.stats()
+
+            pool.timeout = 0.05
+            with pytest.raises(ConnectionError):
+                await asyncio.gather(
+                    *(client.blpop(f"pool_test:{index}", 0.5) for index in range(3))
+                )
+            return results, stats, pool.stats()
+        finally:
+            await pool.disconnect()
+
+    results, stats, timed_out_stats = asyncio.run(scenario())
+
+    assert results == [None] * 8
+    assert stats["max_connections"] == 2
+    assert stats["in_use"] == 0 and stats["idle"] == 2
+    assert stats["waits"] == 6
+    assert stats["wait_seconds"] > 0
+    assert timed_out_stats["wait_timeouts"] == 1
+
+
+class ClusterNodes(RedisCluster):
+    """Cluster client answering MGET from a dict, and rejecting keys of more
+    than one hash slot the way a cluster does"""
+
+    def __init__(self, values: dict):
+        self.encoder = Encoder("utf-8", "strict", True)
+        self.values = values
+        self.mgets = 0
+
+    async def execute_command(self, command, *keys, **options):
+        assert command == "MGET"
+        if len({self.keyslot(key) for key in keys}) > 1:
+            raise RedisClusterException("MGET keys in different slots")
+        self.mgets += 1
+        values = [self.values.get(key) for key in keys]
+        if NEVER_DECODE in options:
+            return values
+        return [value.decode() if value else value for value in values]
+
+
+def test_multi_key_reads_are_split_per_cluster_slot():
+    class Tagged(BaseModel):
+        name: str
+
+    names = [f"name-{index}" for index in range(20)]
+    cluster = ClusterNodes(
+        {f"citizen:{name}": redis_serializer.dumps(Tagged(name=name)) for name in names}
+        | {f"meeting:{name}": name.encode() for name in names}
+    )
+
+    objects = asyncio.run(
+        get_redis_objects(cluster, RedisKeys.CITIZEN, [*names, "missing"], Tagged)
+    )
+    values = asyncio.run(get_redis_values(cluster, RedisKeys.MEETING, names))
+
+    assert [model.name for model in objects[:-1]] == names
+    assert objects[-1] is None
+    assert values == names
+    assert 1 < cluster.mgets <= 2 * (len(names) + 1)